@@ -0,0 +1,297 @@
+import collections
+import math
+
+import cards
+import events
+
+# Statistics over as many games as you like, kept as running totals so the
+# games can be thrown away as they're played.  Nothing in here grows with the
+# number of games, and everything can be merged with the same thing from
+# somewhere else (worker processes, say), so a run can be split up any way and
+# still add up to the same.
+
+# How many standard deviations either side of the mean hold 95% of a normal
+# distribution
+Z_95 = 1.959963984540054
+
+# The count, mean, variance and range of some numbers, worked out one number
+# at a time by Welford's method
+class RunningStats(object):
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        # The sum of squared differences from the mean
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+
+    def merge(self, other):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    # The sample variance, with zero for fewer than two numbers
+    @property
+    def variance(self):
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+    # How far either side of the mean its confidence interval goes
+    def margin(self, z=Z_95):
+        if not self.count:
+            return 0.0
+        return z * self.stddev / math.sqrt(self.count)
+
+# How many standard deviations either side of the mean hold the given share of
+# a normal distribution (Z_95 for 0.95)
+def z_score(confidence):
+    # Solved for by bisection, since the math module has no inverse for erf
+    low, high = 0.0, 40.0
+    for _ in xrange(100):
+        mid = (low + high) / 2
+        if math.erf(mid / math.sqrt(2)) < confidence:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+# The Wilson score interval for a proportion: the range the real rate of
+# something that happened successes times out of n is in, with the confidence
+# z stands for.  Unlike the usual mean +- margin it stays between 0 and 1 and
+# is still some use when the rate is close to either.
+def wilson_interval(successes, n, z=Z_95):
+    if not n:
+        return 0.0, 1.0
+    p = float(successes) / n
+    z2 = z * z
+    centre = (p + z2 / (2 * n)) / (1 + z2 / n)
+    margin = z * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / (1 + z2 / n)
+    return max(centre - margin, 0.0), min(centre + margin, 1.0)
+
+# Counts in buckets width wide from zero, with everything from limit up in the
+# last one.  Only histograms with the same buckets can be merged.
+class FixedHistogram(object):
+    def __init__(self, width, limit):
+        self.width = width
+        self.limit = limit
+        self.counts = [0] * (limit // width + 1)
+        self.count = 0
+
+    def add(self, x):
+        self.counts[min(int(x) // self.width, len(self.counts) - 1)] += 1
+        self.count += 1
+
+    def merge(self, other):
+        if (other.width, other.limit) != (self.width, self.limit):
+            raise ValueError("Can't merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+
+    # The top of the bucket that p percent of everything counted is in or
+    # under
+    def percentile(self, p):
+        if not self.count:
+            return 0
+        rank = max(int(math.ceil(self.count * p / 100.0)), 1)
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min((i + 1) * self.width, self.limit)
+
+# What goes on in one game that its GameResult doesn't say: how often each
+# tile is landed on, how much rent each one takes, and what put each player
+# that went bankrupt out of the game.  It follows the game through its events
+# from when watch is called.
+class GameTally(object):
+    def __init__(self, num_tiles):
+        self.landings = [0] * num_tiles
+        self.rent = [0] * num_tiles
+        # cause -> how many players it put out of the game
+        self.bankruptcies = collections.Counter()
+        # player -> what they were last charged for
+        self._owes = {}
+        self._game = None
+
+    def watch(self, monop_game):
+        self._game = monop_game
+        bus = monop_game.events
+        bus.subscribe_args(self._moved, events.Moved)
+        bus.subscribe_args(self._paid_rent, events.PaidRent)
+        bus.subscribe_args(self._paid_jail_fine, events.PaidJailFine)
+        bus.subscribe_args(self._drew_card, events.DrewCard)
+        bus.subscribe_args(self._resigned, events.Resigned)
+
+    def _moved(self, player, tile):
+        self.landings[tile.index] += 1
+
+    def _paid_rent(self, player, tile, amount, houses, roll):
+        self.rent[tile.index] += amount
+        self._owes[player] = 'rent'
+
+    def _paid_jail_fine(self, player, amount):
+        self._owes[player] = 'jail fine'
+
+    def _drew_card(self, player, card):
+        # Everyone pays on a players card, not just whoever drew it
+        if isinstance(card, cards.MonopolyMonetaryPlayersCard):
+            for other in self._game.players:
+                self._owes[other] = 'card'
+        self._owes[player] = 'card'
+
+    def _resigned(self, player):
+        self.bankruptcies[self._owes.get(player, 'other')] += 1
+
+# Running totals of bot games: win rates for every seat and every strategy,
+# how long games go on for, how often each tile is landed on and how much rent
+# it takes, and what players go bankrupt on.  Games come in as their
+# GameResults, along with the names of the strategies in each seat and, for
+# the per-tile and bankruptcy counts, a GameTally.
+class Aggregator(object):
+    def __init__(self, num_tiles, length_width=10, max_length=1000):
+        self.num_tiles = num_tiles
+        self.games = 0
+        self.unfinished = 0
+        self.lengths = RunningStats()
+        self.length_histogram = FixedHistogram(length_width, max_length)
+
+        # Games played and won from each seat
+        self.seat_games = []
+        self.seat_wins = []
+        # Games played and won by each strategy, and what it was worth at the
+        # end of them
+        self.strategy_games = collections.Counter()
+        self.strategy_wins = collections.Counter()
+        self.strategy_worths = collections.defaultdict(RunningStats)
+
+        self.landings = [0] * num_tiles
+        self.rent = [0] * num_tiles
+        self.bankruptcies = collections.Counter()
+
+    def add(self, names, res, tally=None):
+        self.games += 1
+        self.lengths.add(res.turns)
+        self.length_histogram.add(res.turns)
+        if res.winner is None:
+            self.unfinished += 1
+
+        while len(self.seat_games) < len(names):
+            self.seat_games.append(0)
+            self.seat_wins.append(0)
+        for seat, name in enumerate(names):
+            won = res.winner == seat
+            self.seat_games[seat] += 1
+            self.seat_wins[seat] += won
+            self.strategy_games[name] += 1
+            self.strategy_wins[name] += won
+            self.strategy_worths[name].add(res.net_worths[seat])
+
+        if tally is not None:
+            self.landings = [a + b for a, b in zip(self.landings,
+                tally.landings)]
+            self.rent = [a + b for a, b in zip(self.rent, tally.rent)]
+            self.bankruptcies.update(tally.bankruptcies)
+
+    # Adds up games as they come out of games, which gives (strategy names,
+    # GameResult, GameTally or None) for each
+    def consume(self, games):
+        for names, res, tally in games:
+            self.add(names, res, tally)
+        return self
+
+    def merge(self, other):
+        if other.num_tiles != self.num_tiles:
+            raise ValueError("Can't merge results from different boards")
+        self.games += other.games
+        self.unfinished += other.unfinished
+        self.lengths.merge(other.lengths)
+        self.length_histogram.merge(other.length_histogram)
+
+        while len(self.seat_games) < len(other.seat_games):
+            self.seat_games.append(0)
+            self.seat_wins.append(0)
+        for seat, n in enumerate(other.seat_games):
+            self.seat_games[seat] += n
+            self.seat_wins[seat] += other.seat_wins[seat]
+        self.strategy_games.update(other.strategy_games)
+        self.strategy_wins.update(other.strategy_wins)
+        for name, worths in other.strategy_worths.iteritems():
+            self.strategy_worths[name].merge(worths)
+
+        self.landings = [a + b for a, b in zip(self.landings, other.landings)]
+        self.rent = [a + b for a, b in zip(self.rent, other.rent)]
+        self.bankruptcies.update(other.bankruptcies)
+
+    # The share of the games a strategy played that it won, and the 95%
+    # confidence interval for it
+    def win_rate(self, name):
+        n = self.strategy_games[name]
+        wins = self.strategy_wins[name]
+        return (float(wins) / n if n else 0.0,) + wilson_interval(wins, n)
+
+    def seat_win_rate(self, seat):
+        n = self.seat_games[seat]
+        wins = self.seat_wins[seat]
+        return (float(wins) / n if n else 0.0,) + wilson_interval(wins, n)
+
+    # A summary of it all.  Tiles are named from board if it's given (it
+    # should be the board the games were played on).  Only the top_tiles
+    # tiles landed on the most are listed.
+    def report(self, board=None, top_tiles=10):
+        lines = ['{} games, {} unfinished ({:.1%})'.format(self.games,
+            self.unfinished, float(self.unfinished) / max(self.games, 1))]
+        lines.append('Game length: mean {:.1f} +- {:.1f}, sd {:.1f}, '
+            'p10/p50/p90 {}/{}/{}'.format(self.lengths.mean,
+                self.lengths.margin(), self.lengths.stddev,
+                self.length_histogram.percentile(10),
+                self.length_histogram.percentile(50),
+                self.length_histogram.percentile(90)))
+
+        lines.append('{:<12} {:>8} {:>8} {:>17} {:>12}'.format('strategy',
+            'games', 'win %', '95% interval', 'mean worth'))
+        for name in sorted(self.strategy_games):
+            rate, low, high = self.win_rate(name)
+            lines.append('{:<12} {:>8} {:>8.1%} {:>8.1%} - {:>6.1%} {:>12.0f}'
+                .format(name, self.strategy_games[name], rate, low, high,
+                    self.strategy_worths[name].mean))
+        for seat in xrange(len(self.seat_games)):
+            rate, low, high = self.seat_win_rate(seat)
+            lines.append('{:<12} {:>8} {:>8.1%} {:>8.1%} - {:>6.1%}'.format(
+                'seat {}'.format(seat), self.seat_games[seat], rate, low,
+                high))
+
+        landings = sum(self.landings)
+        if landings:
+            lines.append('{:<24} {:>8} {:>12}'.format('tile', 'landed %',
+                'rent/game'))
+            tiles = sorted(xrange(self.num_tiles),
+                key=lambda i: -self.landings[i])
+            for i in tiles[:top_tiles]:
+                name = board.tiles[i].name if board is not None else i
+                lines.append(u'{:<24} {:>7.2%} {:>12.1f}'.format(name,
+                    float(self.landings[i]) / landings,
+                    float(self.rent[i]) / max(self.games, 1)))
+
+        if self.bankruptcies:
+            lines.append('Bankruptcies: ' + ', '.join('{} {}'.format(cause, n)
+                for cause, n in self.bankruptcies.most_common()))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,120 @@
+#!/usr/bin/python
+
+import math
+import sys
+import unittest
+
+import aggregate
+import bots
+import monop
+import simulate
+
+class RunningStatsTest(unittest.TestCase):
+    def test_add(self):
+        xs = [3, 1, 4, 1, 5, 9, 2, 6]
+        stats = aggregate.RunningStats()
+        for x in xs:
+            stats.add(x)
+
+        mean = float(sum(xs)) / len(xs)
+        variance = sum((x - mean) ** 2 for x in xs) / (len(xs) - 1)
+        self.assertEqual(stats.count, 8)
+        self.assertAlmostEqual(stats.mean, mean)
+        self.assertAlmostEqual(stats.variance, variance)
+        self.assertEqual((stats.min, stats.max), (1, 9))
+        self.assertAlmostEqual(stats.margin(),
+            aggregate.Z_95 * math.sqrt(variance / 8))
+
+    def test_merge(self):
+        xs = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3]
+        whole, first, second = [aggregate.RunningStats() for _ in range(3)]
+        for i, x in enumerate(xs):
+            whole.add(x)
+            (first if i < 3 else second).add(x)
+        first.merge(second)
+        first.merge(aggregate.RunningStats())
+
+        self.assertEqual(first.count, whole.count)
+        self.assertAlmostEqual(first.mean, whole.mean)
+        self.assertAlmostEqual(first.variance, whole.variance)
+        self.assertEqual((first.min, first.max), (whole.min, whole.max))
+
+class WilsonIntervalTest(unittest.TestCase):
+    def test_interval(self):
+        low, high = aggregate.wilson_interval(50, 100)
+        self.assertAlmostEqual(low, 0.4038, places=4)
+        self.assertAlmostEqual(high, 0.5962, places=4)
+
+    def test_none_won(self):
+        low, high = aggregate.wilson_interval(0, 10)
+        self.assertEqual(low, 0.0)
+        self.assertAlmostEqual(high, 0.2775, places=4)
+        self.assertEqual(aggregate.wilson_interval(0, 0), (0.0, 1.0))
+
+class FixedHistogramTest(unittest.TestCase):
+    def test_percentile(self):
+        hist = aggregate.FixedHistogram(10, 100)
+        for x in xrange(100):
+            hist.add(x)
+        hist.add(5000)
+        self.assertEqual(hist.counts[-1], 1)
+        self.assertEqual(hist.percentile(50), 60)
+        self.assertEqual(hist.percentile(100), 100)
+
+    def test_merge(self):
+        first = aggregate.FixedHistogram(10, 100)
+        second = aggregate.FixedHistogram(10, 100)
+        first.add(5)
+        second.add(15)
+        first.merge(second)
+        self.assertEqual(first.counts[:2], [1, 1])
+        self.assertEqual(first.count, 2)
+        self.assertRaises(ValueError, first.merge,
+            aggregate.FixedHistogram(5, 100))
+
+class AggregatorTest(unittest.TestCase):
+    def setUp(self):
+        self.board = monop.load_board()
+        self.num_tiles = len(self.board.tiles)
+
+    def games(self, seeds):
+        names = ['buyer', 'cautious']
+        for seed in seeds:
+            tally = aggregate.GameTally(self.num_tiles)
+            res = simulate.simulate(self.board,
+                [bots.STRATEGIES[n] for n in names], seed=seed,
+                max_turns=300, tally=tally)
+            yield names, res, tally
+
+    def test_consume(self):
+        agg = aggregate.Aggregator(self.num_tiles, max_length=300)
+        agg.consume(self.games(xrange(10)))
+
+        self.assertEqual(agg.games, 10)
+        self.assertEqual(agg.strategy_games['buyer'], 10)
+        finished = 10 - agg.unfinished
+        self.assertEqual(sum(agg.seat_wins), finished)
+        self.assertEqual(sum(agg.bankruptcies.values()), finished)
+        self.assertTrue(sum(agg.landings) > 0)
+        self.assertTrue(sum(agg.rent) > 0)
+
+        rate, low, high = agg.win_rate('buyer')
+        self.assertTrue(low <= rate <= high)
+        self.assertIn('Bankruptcies', agg.report(self.board))
+
+    def test_merge(self):
+        whole = aggregate.Aggregator(self.num_tiles, max_length=300)
+        whole.consume(self.games(xrange(8)))
+        first = aggregate.Aggregator(self.num_tiles, max_length=300)
+        first.consume(self.games(xrange(3)))
+        second = aggregate.Aggregator(self.num_tiles, max_length=300)
+        second.consume(self.games(xrange(3, 8)))
+        first.merge(second)
+
+        self.assertEqual(first.report(), whole.report())
+        self.assertEqual(first.landings, whole.landings)
+        self.assertEqual(first.bankruptcies, whole.bankruptcies)
+        self.assertRaises(ValueError, first.merge, aggregate.Aggregator(10))
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,161 @@
+#!/usr/bin/python
+
+import argparse
+import collections
+import gc
+import sys
+import time
+import types
+
+import board
+import bots
+import cards
+import monop
+import player
+import simulate
+import util
+
+STRATEGIES = [bots.BuyEverythingBot, bots.CautiousBot]
+
+# Adds up the size of obj and everything it refers to, not counting anything
+# in skip (a set of ids) or any classes, modules or functions.
+def deep_size(obj, skip):
+    seen = set(skip)
+    todo = [obj]
+    size = 0
+    while todo:
+        o = todo.pop()
+        if id(o) in seen or isinstance(o,
+                (type, types.ModuleType, types.FunctionType)):
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        todo.extend(gc.get_referents(o))
+    return size
+
+# The memory taken by a game part way through, not counting the board
+# definition that all games share.
+def memory_per_game(num_turns=100, seed=0):
+    b = monop.load_board()
+    monop_game, _ = simulate.start_game(b, STRATEGIES, seed)
+    simulate.play_turns(monop_game, util.NullInputOutput(), num_turns)
+
+    shared = set()
+    for o in [b.definition] + b.definition.cc_cards + \
+            b.definition.chance_cards + list(b.definition.tiles) + \
+            board._rent_tables.values():
+        shared.add(id(o))
+
+    return deep_size(monop_game, shared)
+
+# The classes whose objects are made over and over again while playing
+def hot_classes():
+    for module in [board, cards, player, util, bots]:
+        for o in vars(module).values():
+            if isinstance(o, type) and o.__module__ == module.__name__ and \
+                    not issubclass(o, BaseException):
+                yield o
+
+# Counts the objects of the hot classes that get made during a turn, by
+# wrapping each class's __new__ while the games are played.
+def allocations_per_turn(num_games=50, seed=0):
+    counts = collections.Counter()
+    classes = list(hot_classes())
+    originals = dict((cls, cls.__dict__.get('__new__')) for cls in classes)
+    news = dict((cls, cls.__new__) for cls in classes)
+
+    def wrap(cls):
+        new = news[cls]
+        def counting_new(klass, *args):
+            counts[klass.__name__] += 1
+            if new is object.__new__:
+                return new(klass)
+            return new(klass, *args)
+        return staticmethod(counting_new)
+
+    for cls in classes:
+        cls.__new__ = wrap(cls)
+
+    b = monop.load_board()
+    turns = 0
+    try:
+        for i in xrange(num_games):
+            turns += simulate.simulate(b, STRATEGIES, seed=seed + i).turns
+    finally:
+        for cls, original in originals.iteritems():
+            if original is None:
+                del cls.__new__
+            else:
+                cls.__new__ = original
+
+    return turns, counts
+
+def time_per_turn(num_games=200, seed=0):
+    b = monop.load_board()
+    turns = 0
+    start = time.time()
+    for i in xrange(num_games):
+        turns += simulate.simulate(b, STRATEGIES, seed=seed + i).turns
+    return (time.time() - start) / turns
+
+# Stands in for an unbuffered file or socket, noting the size of every write
+# that would have been a system call of its own
+class _WriteCounter(object):
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(len(data))
+
+    def flush(self):
+        pass
+
+# How many writes the print command makes, and how many bytes each is on
+# average, part way through a game, with and without buffering what's told
+def writes_per_print(buffered, num_turns=100, seed=0):
+    monop_game, _ = simulate.start_game(monop.load_board(), STRATEGIES, seed)
+    simulate.play_turns(monop_game, util.NullInputOutput(), num_turns)
+
+    counter = _WriteCounter()
+    inout = util.CliInputOutput(counter)
+    if buffered:
+        inout = util.BufferedInputOutput(inout)
+    monop_game.print_board(inout)
+    inout.flush()
+    return len(counter.writes), sum(counter.writes) / float(len(counter.writes))
+
+def time_per_print(num_prints=2000, num_turns=100, seed=0):
+    monop_game, _ = simulate.start_game(monop.load_board(), STRATEGIES, seed)
+    inout = util.NullInputOutput()
+    simulate.play_turns(monop_game, inout, num_turns)
+    start = time.time()
+    for _ in xrange(num_prints):
+        monop_game.print_board(inout)
+    return (time.time() - start) / num_prints
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure the cost of playing games headlessly')
+    parser.add_argument('--games', type=int, default=200)
+    args = parser.parse_args()
+
+    print 'Memory per game: {} bytes'.format(memory_per_game())
+
+    turns, counts = allocations_per_turn(max(args.games / 4, 1))
+    print 'Objects made per turn: {:.3f}'.format(
+        sum(counts.values()) / float(turns))
+    for name, n in counts.most_common():
+        if n < turns / 1000.0:
+            break
+        print '    {:<30} {:.3f}'.format(name, n / float(turns))
+
+    print 'Time per turn: {:.1f}us'.format(time_per_turn(args.games) * 1e6)
+
+    print 'Time per print: {:.1f}us'.format(time_per_print() * 1e6)
+    for buffered in (False, True):
+        writes, size = writes_per_print(buffered)
+        print 'Writes per print{}: {} of {:.1f} bytes'.format(
+            ' (buffered)' if buffered else '', writes, size)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,63 +1,212 @@
+import collections
+import hashlib
 import json
-import random
+import os
 
 import game
 import cards
-
-# Abstract class that represents a tile on the Monopoly board
+import events
+
+# The parts of a tile that never change.  These are loaded once into a
+# BoardDefinition and shared by the tiles of every game played on that board.
+# kind is the tile's type in the board file (None if it didn't come from one).
+TileSpec = collections.namedtuple('TileSpec',
+    ['kind', 'name', 'cost', 'monopoly', 'rents'])
+
+def tile_spec(name, kind=None, cost=None, monopoly=None, rents=()):
+    return TileSpec(kind, name, cost, monopoly, tuple(rents))
+
+# Abstract class that represents a tile on the Monopoly board.  A tile object
+# only holds the state for one game, everything else is in its spec.
+#
+# Each tile keeps its row of the board print (see row) until something shown
+# in it changes, so printing the board doesn't have to make them all again.
 class MonopolyBoardTile(object):
+    __slots__ = ('spec', 'board', 'index', '_row')
+
     def __init__(self, board, name):
-        self.name = name
+        self._setup(board, tile_spec(name))
+
+    # Makes a tile for a game on the given board from a shared spec
+    @classmethod
+    def from_spec(cls, board, spec):
+        tile = cls.__new__(cls)
+        tile._setup(board, spec)
+        return tile
+
+    def _setup(self, board, spec):
+        self.spec = spec
         self.board = board
+        # Where the tile is in board.tiles, set when it is added to the board
+        self.index = None
+        self._row = None
+
+    # Notes down attr as about to change, if the game is keeping track of
+    # changes (see MonopolyGame.checkpoint)
+    def record(self, attr):
+        journal = self.board.journal
+        if journal is not None:
+            journal.record(self, attr)
+
+    @property
+    def name(self):
+        return self.spec.name
 
     def __str__(self):
         return self.name
 
+    # The tile's row in the board print, made the first time it's needed after
+    # it changed
+    @property
+    def row(self):
+        if self._row is None:
+            self._row = self.render_row()
+        return self._row
+
+    def render_row(self):
+        return '%-25s' % trun(self, 25) + ' ' * 41
+
     def activate(self, _inout, _player, _game):
         pass
 
+# Rent tables, shared by every tile with the same rents (see rent_table)
+_rent_tables = {}
+
 # Represents a monopoly property
+#
+# Rent is looked up rather than worked out.  Each kind of property has a table
+# of what its rent can be (see make_rent_table), made once when the board is
+# loaded and shared by every game.  Each tile keeps its place in that table,
+# rent_level, up to date as it changes hands and gets built on, so rent is
+# only ever a lookup.
 class MonopolyBoardPropertyTile(MonopolyBoardTile):
+    __slots__ = ('group', '_owner', '_houses', '_mortgaged', 'rent_table',
+        'rent_level')
+
     def __init__(self, board, name, cost, monopoly, rents):
-        super(MonopolyBoardPropertyTile, self).__init__(board, name)
-        self.cost = cost
-        self.owner = None
-        # houses == 5 is used to represent having a hotel
-        self.houses = 0
-        self.mortgaged = False
-        self.monopoly = monopoly
         assert len(rents) == 6 or len(rents) == 0
-        self.rents = rents
+        self._setup(board, tile_spec(name, cost=cost, monopoly=monopoly,
+            rents=rents))
+
+    def _setup(self, board, spec):
+        super(MonopolyBoardPropertyTile, self)._setup(board, spec)
+        # The MonopolyGroup this tile belongs to, set when it is added to the
+        # board.
+        self.group = None
+        self._owner = None
+        # houses == 5 is used to represent having a hotel
+        self._houses = 0
+        self._mortgaged = False
+        # Set along with the group
+        self.rent_table = ()
+        self.rent_level = 0
+
+    @property
+    def cost(self):
+        return self.spec.cost
+
+    @property
+    def monopoly(self):
+        return self.spec.monopoly
+
+    @property
+    def rents(self):
+        return self.spec.rents
+
+    # Changing hands goes through here so the group can keep count of who owns
+    # how much of it.
+    @property
+    def owner(self):
+        return self._owner
+
+    @owner.setter
+    def owner(self, owner):
+        self.record('owner')
+        old_owner = self._owner
+        self._owner = owner
+        self._row = None
+        if self.group is not None:
+            self.group.change_owner(old_owner, owner)
+
+    @property
+    def houses(self):
+        return self._houses
+
+    # Building and mortgaging go through these so the owner's totals (see
+    # MonopolyPlayer.count_holding) keep up.  Undoing a change goes through
+    # them too, which puts the totals back as well.
+    @houses.setter
+    def houses(self, houses):
+        self.record('houses')
+        owner = self._owner
+        if owner is not None:
+            owner.count_holding(self, -1)
+        self._houses = houses
+        if owner is not None:
+            owner.count_holding(self, 1)
+        self._row = None
+        self.update_rent_level()
+
+    @property
+    def mortgaged(self):
+        return self._mortgaged
+
+    @mortgaged.setter
+    def mortgaged(self, mortgaged):
+        self.record('mortgaged')
+        owner = self._owner
+        if owner is not None:
+            owner.count_holding(self, -1)
+        self._mortgaged = mortgaged
+        if owner is not None:
+            owner.count_holding(self, 1)
+        self._row = None
+
+    # The rent for each rent level.  For properties the levels are: not part of
+    # a monopoly, part of a monopoly with no houses, then one house through to
+    # a hotel.
+    @classmethod
+    def make_rent_table(cls, rents, _group_size):
+        if not rents:
+            return ()
+        return (rents[0], rents[0] * 2) + tuple(rents[1:])
+
+    # The table for a tile of this kind with the given rents in a group of the
+    # given size.  Tiles with the same ones share a table.
+    @classmethod
+    def rent_table_for(cls, rents, group_size):
+        key = (cls, rents, group_size)
+        table = _rent_tables.get(key)
+        if table is None:
+            table = _rent_tables[key] = cls.make_rent_table(rents, group_size)
+        return table
+
+    def update_rent_level(self):
+        if self._houses:
+            self.rent_level = self._houses + 1
+        else:
+            self.rent_level = int(self.group is not None and
+                self.group.owned_by(self._owner))
 
     # This is the number of other properties in the monopoly that are managed by
     # the same owner. Zero if no owner.
     @property
     def management_num(self):
-        if self.owner is None:
+        if self._owner is None:
             return 0
 
-        n = 0
-        for tile in self.monopoly_members:
-            if self.owner == tile.owner:
-                n += 1
+        n = self.group.num_owned_by(self._owner)
         assert n >= 1
 
         return n
 
     @property
     def monopoly_members(self):
-        for tile in self.board.get_tiles(monopoly=self.monopoly):
-            yield tile
+        return iter(self.group.tiles)
 
     @property
     def part_of_monopoly(self):
-        if self.owner is None:
-            return False
-
-        for tile in self.monopoly_members:
-            if self.owner != tile.owner:
-                return False
-        return True
+        return self.group.owned_by(self._owner)
 
     @property
     def total_worth(self):
@@ -65,6 +214,11 @@ class MonopolyBoardPropertyTile(MonopolyBoardTile):
         n += self.houses * 25
         return n
 
+    # What mortgaging it gets you, half the cost of the property
+    @property
+    def mortgage_value(self):
+        return int(self.cost / 2)
+
     @property
     def mortgagable(self):
         return not self.mortgaged and not self.houses
@@ -79,10 +233,9 @@ class MonopolyBoardPropertyTile(MonopolyBoardTile):
 
         self.mortgaged = True
 
-        # The mortgage value is half the cost of the property
-        money = int(self.cost / 2)
+        money = self.mortgage_value
         player.award(money)
-        inout.tell('That got you ${}\n'.format(money))
+        player.game.events.emit(events.Mortgaged, player, self, money)
 
     def unmortgage(self, inout, player):
         assert self.unmortgagable
@@ -90,51 +243,82 @@ class MonopolyBoardPropertyTile(MonopolyBoardTile):
 
         self.mortgaged = False
 
-        # To unmortgage you have to pay the mortgage plus 10% interest
-        cost = int((self.cost / 2) * 1.10)
+        # To unmortgage you have to pay the mortgage plus interest
+        cost = player.game.rules.unmortgage_cost(self)
         player.pay(inout, cost)
-        inout.tell('That cost you ${}\n'.format(cost))
+        player.game.events.emit(events.Unmortgaged, player, self, cost)
 
     @property
     def rent(self):
-        if self.part_of_monopoly and self.houses == 0:
-            return self.rents[0] * 2
+        return self.rent_table[self.rent_level]
+
+    # How rent of the given amount came about, with the given number of
+    # houses and dice roll.  Takes them rather than looking at the tile, since
+    # the tile might have changed by the time anyone asks (see events.PaidRent).
+    def rent_text(self, rent, houses, _roll):
+        if houses == 5:
+            return "with a hotel, rent is {}\n".format(rent)
+        elif houses > 0:
+            return "with {} house{}, rent is {}\n".format(
+                houses, 's' if houses > 1 else '', rent)
         else:
-            return self.rents[self.houses]
+            return "rent is {}\n".format(rent)
 
-    def print_rent(self, inout):
-        if self.houses == 5:
-            inout.tell("with a hotel, rent is {}\n".format(self.rent))
-        elif self.houses > 0:
-            inout.tell("with {} house{}, rent is {}\n".format(
-                self.houses, 's' if self.houses > 1 else '', self.rent))
+    def render_row(self):
+        if self._owner:
+            owner = '%-14s ' % trun(self._owner, 14)
         else:
-            inout.tell("rent is {}\n".format(self.rent))
+            owner = ' ' * 15
+        mg = self.management_num
+        return ''.join([
+            '%-25s' % trun(self, 25),
+            owner,
+            '%-10s' % trun(self.monopoly, 10),
+            '%5d ' % self.cost,
+            '%4d ' % mg if mg else ' ' * 5,
+            self.render_rent(),
+        ])
+
+    def render_rent(self):
+        return '%4d ' % self.rent
+
+    def print_rent(self, inout):
+        inout.tell(self.rent_text(self.rent, self.houses, self.board.last_roll))
 
     def purchase(self, inout, player):
         assert self.owner is None
         player.pay(inout, self.cost)
         self.owner = player
         player.add_to_holdings(self)
+        player.game.events.emit(events.Bought, player, self, self.cost)
 
-    def activate(self, inout, player, _game):
+    # rent, if given, works out what someone else's owning it costs instead of
+    # the usual rent, for the cards that send players here (see
+    # cards.MonopolyAdvanceToTileTypeCard).  It's given the tile and the game,
+    # and gives back the rent along with the roll it came from.
+    def activate(self, inout, player, _game, rent=None):
         if self.owner is None:
             assert not self.mortgaged
-            inout.tell("That would cost ${}\n".format(self.cost))
+            _game.events.emit(events.OfferedProperty, player, self)
             player.offer_property(inout, self)
         elif self.owner != player:
-            inout.tell("Owned by {}\n".format(self.owner.name))
+            _game.events.emit(events.LandedOnOwned, player, self, self.owner)
 
             if self.mortgaged:
-                inout.tell('The thing is mortgaged.  You got lucky this time\n')
+                _game.events.emit(events.LandedOnMortgaged, player, self)
                 return
 
-            self.print_rent(inout)
+            if rent is None:
+                rent, roll = self.rent, self.board.last_roll
+            else:
+                rent, roll = rent(self, _game)
+            _game.events.emit(events.PaidRent, player, self, rent,
+                self.houses, roll)
 
-            player.pay(inout, self.rent)
-            self.owner.award(self.rent)
+            player.pay(inout, rent)
+            self.owner.award(rent)
         else:
-            inout.tell("You own it.\n")
+            _game.events.emit(events.LandedOnOwn, player, self)
 
     def place_house(self, inout, player):
         assert self.owner is not None
@@ -143,10 +327,10 @@ class MonopolyBoardPropertyTile(MonopolyBoardTile):
         assert self.part_of_monopoly
         assert self.houses < 4
 
-        # XXX: I'm not sure that houses should always be $100
-        player.pay(inout, 100)
+        player.pay(inout, player.game.rules.house_price)
 
         self.houses += 1
+        player.game.events.emit(events.BuiltHouse, player, self)
 
     def place_hotel(self, inout, player):
         assert self.owner is not None
@@ -155,96 +339,140 @@ class MonopolyBoardPropertyTile(MonopolyBoardTile):
         assert self.part_of_monopoly
         assert self.houses == 4
 
-        player.pay(inout, 100)
+        player.pay(inout, player.game.rules.house_price)
 
         # houses == 5 is used to represent having a hotel
         self.houses += 1
+        player.game.events.emit(events.BuiltHouse, player, self)
 
 class MonopolyBoardRRTile(MonopolyBoardPropertyTile):
+    __slots__ = ()
+
     def __init__(self, board, name, cost):
         super(MonopolyBoardRRTile, self).__init__(board, name, cost,
                 monopoly="Railroad", rents=[])
 
+    # Levels are the number of railroads the owner has
+    @classmethod
+    def make_rent_table(cls, _rents, group_size):
+        return (0,) + tuple(25 << (n - 1) for n in xrange(1, group_size + 1))
+
+    def update_rent_level(self):
+        self.rent_level = self.group.num_owned_by(self._owner) \
+            if self.group is not None else 0
+
     @property
     def rent(self):
         assert self.owner
+        assert self.rent_level
+        return self.rent_table[self.rent_level]
 
-        num_owned = 0
-        for rr in self.monopoly_members:
-            if rr.owner == self.owner:
-                num_owned += 1
-
-        assert num_owned
-        return 25 << (num_owned - 1)
+    # There's no rent until it's owned
+    def render_rent(self):
+        if self._owner is None:
+            return ' ' * 5
+        return super(MonopolyBoardRRTile, self).render_rent()
 
     def place_house(self, inout, player):
         raise game.MonopolyUsageError("Can't place a house on a rail road")
 
+# The rent a utility's row shows goes with the last roll, so the row is made
+# again whenever that's different from the one it was made with
 class MonopolyBoardUtilityTile(MonopolyBoardPropertyTile):
+    __slots__ = ('_row_roll',)
+
     def __init__(self, board, name, cost):
         super(MonopolyBoardUtilityTile, self).__init__(board, name, cost,
             monopoly="Utility", rents=[])
 
+    # Levels are the number of utilities the owner has, and the table holds
+    # what the roll is multiplied by
+    @classmethod
+    def make_rent_table(cls, _rents, group_size):
+        return (0,) + tuple(10 if n == group_size else 4
+            for n in xrange(1, group_size + 1))
+
+    def update_rent_level(self):
+        self.rent_level = self.group.num_owned_by(self._owner) \
+            if self.group is not None else 0
+
     @property
     def rent(self):
         assert self.owner
+        return self.rent_table[self.rent_level] * self.board.last_roll
 
-        if self.part_of_monopoly:
-            return 10 * self.board.last_roll
-        else:
-            return 4 * self.board.last_roll
+    def _setup(self, board, spec):
+        super(MonopolyBoardUtilityTile, self)._setup(board, spec)
+        self._row_roll = None
 
-    def print_rent(self, inout):
-        if self.part_of_monopoly:
-            inout.tell("rent is 10 * roll ({}) = {}\n"
-                .format(self.board.last_roll, self.rent))
-        else:
-            inout.tell("rent is 4 * roll ({}) = {}\n"
-                .format(self.board.last_roll, self.rent))
+    @property
+    def row(self):
+        roll = self.board.last_roll
+        if self._row is None or self._row_roll != roll:
+            self._row = self.render_row()
+            self._row_roll = roll
+        return self._row
+
+    def render_rent(self):
+        if self._owner is None:
+            return ' ' * 5
+        return super(MonopolyBoardUtilityTile, self).render_rent()
+
+    def rent_text(self, rent, _houses, roll):
+        return "rent is {} * roll ({}) = {}\n".format(rent / roll, roll, rent)
 
     def place_house(self, inout, player):
         raise game.MonopolyUsageError("Can't place a house on a utility")
 
 class MonopolyBoardSafeTile(MonopolyBoardTile):
-    def activate(self, inout, _player, _game):
-        inout.tell("This is a safe place\n")
+    __slots__ = ()
+
+    def activate(self, inout, player, _game):
+        _game.events.emit(events.LandedOnSafe, player, self)
 
 class MonopolyBoardGoTile(MonopolyBoardSafeTile):
-    pass
+    __slots__ = ()
 
 class MonopolyBoardCardTile(MonopolyBoardTile):
-    def __init__(self, board, name):
-        super(MonopolyBoardCardTile, self).__init__(board, name)
+    __slots__ = ('deck',)
+
+    def _setup(self, board, spec):
+        super(MonopolyBoardCardTile, self)._setup(board, spec)
         self.deck = None
 
     def activate(self, inout, player, _game):
-        # XXX: Remove the card from the deck when drawn?
-        card = random.choice(self.deck)
-        card.activate(inout, player, _game)
+        self.deck.draw().activate(inout, player, _game)
 
 class MonopolyBoardCCTile(MonopolyBoardCardTile):
-    def __init__(self, board, name):
-        super(MonopolyBoardCCTile, self).__init__(board, name)
+    __slots__ = ()
+
+    def _setup(self, board, spec):
+        super(MonopolyBoardCCTile, self)._setup(board, spec)
         self.deck = board.cc_deck
 
 class MonopolyBoardChanceTile(MonopolyBoardCardTile):
-    def __init__(self, board, name):
-        super(MonopolyBoardChanceTile, self).__init__(board, name)
+    __slots__ = ()
+
+    def _setup(self, board, spec):
+        super(MonopolyBoardChanceTile, self)._setup(board, spec)
         self.deck = board.chance_deck
 
 class MonopolyBoardIncTaxTile(MonopolyBoardTile):
-    pass
+    __slots__ = ()
 class MonopolyBoardLuxTaxTile(MonopolyBoardTile):
-    pass
+    __slots__ = ()
 
 class MonopolyBoardGotoJailTile(MonopolyBoardTile):
+    __slots__ = ()
+
     def activate(self, inout, player, _game):
         _game.board.advance_player_to(inout, player, _game.board.jail_tile)
 
+# The jail isn't part of the normal board rotation.  Its index is that of the
+# tile it sits beside, which is where players leave jail from.  Whether a player
+# there is in jail or just visiting is up to the player (see in_jail).
 class MonopolyBoardJailTile(MonopolyBoardTile):
-    def __init__(self, board, name):
-        super(MonopolyBoardJailTile, self).__init__(board, name)
-        self.board_index = None
+    __slots__ = ()
 
 TILE_TABLE = {
     "PRPRT":   MonopolyBoardPropertyTile,
@@ -260,142 +488,355 @@ TILE_TABLE = {
     "JAIL":    MonopolyBoardJailTile
 }
 
+# For every tile class on a board of tiles of the given classes, in board
+# order, the index of the first tile of that class ahead of each tile going
+# round the board.  Made once for a board, so finding the nearest railroad,
+# say, is a lookup.
+def nearest_tables(kinds):
+    n = len(kinds)
+    tables = {}
+    for cls in set(kinds):
+        indexes = [i for i, kind in enumerate(kinds) if kind is cls]
+        tables[cls] = tuple(min(indexes, key=lambda j: (j - i - 1) % n)
+            for i in xrange(n))
+    return tables
+
+# For each of the given numbers of spaces, the index of the tile that many
+# spaces behind each tile on a board n tiles long, going back past go if need
+# be.  Made for the distances a board's move back cards use, so moving back is
+# a lookup like finding the nearest railroad.
+def back_tables(n, distances):
+    return dict((spaces, tuple((i - spaces) % n for i in xrange(n)))
+        for spaces in set(distances))
+
 def trun(o, n):
-    return str(o)[:n] if len(str(o)) > n else str(o)
-
-def _print_tile(tile, inout):
-    # Name
-    inout.tell('%-25s' % trun(tile, 25))
-    if isinstance(tile, MonopolyBoardPropertyTile):
-        # Owner
-        if tile.owner:
-            inout.tell('%-14s ' % trun(tile.owner, 14))
-        else:
-            inout.tell(' ' * 15)
+    return str(o)[:n]
 
-        # Type
-        inout.tell('%-10s' % trun(tile.monopoly, 10))
+_HEADER = '%-25s%-15s%-10s%-6s%-5s%-5s' % ('Name', 'Owner', 'Type', 'Price',
+    'Mg #', 'Rent')
 
-        # Price
-        inout.tell('%5d ' % tile.cost)
+def print_tiles(tiles, inout):
+    inout.tell('\n'.join([_HEADER] + [tile.row for tile in tiles]) + '\n')
 
-        # Mg #
-        if tile.management_num != 0:
-            inout.tell('%4d ' % tile.management_num)
-        else:
-            inout.tell(' ' * 5)
+def players_print(players, inout):
+    inout.tell(''.join([_HEADER + 'Player\n'] +
+        [p.current_tile.row + trun(p, 14) + '\n' for p in players]))
 
-        # Rent
-        inout.tell('%4d ' % tile.rent)
-    else:
-        inout.tell(' ' * 41)
+# Everything about a board that doesn't change during a game: the tiles and
+# the cards, as loaded from the board and card files.  One definition is shared
+# by every game played on it, see new_board().
+class BoardDefinition(object):
+    def __init__(self):
+        # TileSpecs in board order.  The jail isn't part of the normal board
+        # rotation, so it is kept separately along with the index it sits at.
+        self.tiles = []
+        self.jail = None
+        self.jail_index = None
 
-def _print_header(inout):
-    inout.tell('%-25s' % 'Name')
-    inout.tell('%-15s' % 'Owner')
-    inout.tell('%-10s' % 'Type')
-    inout.tell('%-6s' % 'Price')
-    inout.tell('%-5s' % 'Mg #')
-    inout.tell('%-5s' % 'Rent')
+        self.cc_cards = []
+        self.chance_cards = []
 
-def print_tiles(tiles, inout):
-    _print_header(inout)
-    inout.tell('\n')
-    for tile in tiles:
-        _print_tile(tile, inout)
-        inout.tell('\n')
+        # Tile class -> the nearest one ahead of each tile, see nearest_tables
+        self.nearest = {}
+        # Spaces -> the tile that many behind each tile, see back_tables.
+        # Updated in place as the cards are loaded, since boards share it.
+        self.back = {}
 
-def players_print(players, inout):
-    _print_header(inout)
-    inout.tell('Player')
-    inout.tell('\n')
-    for player in players:
-        _print_tile(player.current_tile, inout)
-        inout.tell(trun(player, 14))
-        inout.tell('\n')
+        # A hash of everything the board was loaded from, so that things worked
+        # out from the board can be cached.  None if it wasn't loaded from files.
+        self.digest = None
+
+    def _add_to_digest(self, contents):
+        h = hashlib.sha1(self.digest or '')
+        h.update(hashlib.sha1(contents).hexdigest())
+        self.digest = h.hexdigest()
+
+    def load_board(self, board_file):
+        assert len(self.tiles) == 0
+        with open(board_file) as f:
+            contents = f.read()
+            self._add_to_digest(contents)
+            for td in json.loads(contents):
+                assert td['type'] in TILE_TABLE
+                spec = tile_spec(kind=td.pop('type'), **td)
+
+                if TILE_TABLE[spec.kind] is MonopolyBoardJailTile:
+                    self.jail = spec
+                    self.jail_index = len(self.tiles) - 1
+                    continue
+
+                self.tiles.append(spec)
+
+        self.nearest = nearest_tables(
+            [TILE_TABLE[spec.kind] for spec in self.tiles])
+        self._update_back()
+
+    # The move back cards' tables, for whichever tiles and cards are loaded
+    def _update_back(self):
+        self.back.clear()
+        self.back.update(back_tables(len(self.tiles),
+            [card.num_spaces for card in self.cc_cards + self.chance_cards
+                if isinstance(card, cards.MonopolyMoveBackCard)]))
+
+    def _load_cards(self, cards_file):
+        with open(cards_file) as f:
+            contents = f.read()
+            self._add_to_digest(contents)
+            return [cards.create_card(**card) for card in json.loads(contents)]
+
+    def load_com_chest_cards(self, com_chest_cards_file):
+        assert len(self.cc_cards) == 0
+        self.cc_cards = self._load_cards(com_chest_cards_file)
+        self._update_back()
+
+    def load_chance_cards(self, chance_cards_file):
+        assert len(self.chance_cards) == 0
+        self.chance_cards = self._load_cards(chance_cards_file)
+        self._update_back()
+
+    # A fresh board to play a game on
+    def new_board(self):
+        return MonopolyBoard(self)
+
+_definitions = {}
+
+# Loads a board definition, only reading the files the first time they are
+# asked for.
+def load_definition(board_file, com_chest_cards_file, chance_cards_file):
+    key = tuple(os.path.abspath(f)
+        for f in (board_file, com_chest_cards_file, chance_cards_file))
+    if key not in _definitions:
+        definition = BoardDefinition()
+        definition.load_board(board_file)
+        definition.load_com_chest_cards(com_chest_cards_file)
+        definition.load_chance_cards(chance_cards_file)
+        _definitions[key] = definition
+
+    return _definitions[key]
+
+# The properties making up one monopoly, along with how many of them each
+# player owns, so checking for a monopoly doesn't mean looking at every tile.
+class MonopolyGroup(object):
+    __slots__ = ('name', 'tiles', 'owned')
+
+    def __init__(self, name):
+        self.name = name
+        self.tiles = []
+        # owner -> number of tiles in the group they own
+        self.owned = {}
+
+    def add_tile(self, tile):
+        self.tiles.append(tile)
+        tile.group = self
+        if tile.owner is not None:
+            self.change_owner(None, tile.owner)
+        # Nobody else has all of it any more
+        for owner in self.owned:
+            self.update_monopoly(owner)
+
+        # The group got bigger, so its rent tables might have changed
+        for t in self.tiles:
+            t.rent_table = t.rent_table_for(t.rents, len(self.tiles))
+        self.update_rent_levels()
+
+    def change_owner(self, old_owner, new_owner):
+        if old_owner is not None:
+            n = self.owned[old_owner] - 1
+            if n:
+                self.owned[old_owner] = n
+            else:
+                del self.owned[old_owner]
+            self.update_monopoly(old_owner)
+        if new_owner is not None:
+            self.owned[new_owner] = self.owned.get(new_owner, 0) + 1
+            self.update_monopoly(new_owner)
+        self.update_rent_levels()
+
+    # Keeps owner's monopolies (see MonopolyPlayer.monopolies) up to date
+    def update_monopoly(self, owner):
+        if self.owned_by(owner):
+            owner.monopolies.add(self.name)
+        else:
+            owner.monopolies.discard(self.name)
+
+    # Ownership changed, so the rents and the rows showing how much of the
+    # group each owner has did too
+    def update_rent_levels(self):
+        for tile in self.tiles:
+            tile.update_rent_level()
+            tile._row = None
+
+    def num_owned_by(self, owner):
+        return self.owned.get(owner, 0)
+
+    # Whether owner has the whole group
+    def owned_by(self, owner):
+        return owner is not None and \
+            self.owned.get(owner, 0) == len(self.tiles)
 
 class MonopolyBoard(object):
-    def __init__(self):
+    def __init__(self, definition=None):
         self.tiles = []
         self.monopolies = set()
+        # monopoly name -> MonopolyGroup
+        self.groups = {}
         self.last_roll = None
+        # Shared with the game being played on the board, see
+        # MonopolyGame.checkpoint
+        self.journal = None
 
         self.jail_tile = None
         self.go_tile = None
 
-        self.cc_deck = []
-        self.chance_deck = []
+        # See nearest_tile and back_tile.  _back is the definition's, which
+        # every board shares, so anything else goes in _own_back.
+        self._nearest = None
+        self._back = None
+        self._own_back = {}
 
-    def load_board(self, board_file):
-        assert len(self.tiles) == 0
-        with open(board_file) as f:
-            for td in json.loads(f.read()):
-                assert td['type'] in TILE_TABLE
-                tile_class = TILE_TABLE[td['type']]
-                del td['type']
-                td['board'] = self
-                tile = tile_class(**td)
-
-                if isinstance(tile, MonopolyBoardJailTile):
-                    self.jail_tile = tile
-                    self.jail_tile.board_index = len(self.tiles) - 1
-                    # This tile isn't part of a normal board rotation
-                    continue
+        if definition is None:
+            definition = BoardDefinition()
+        self.definition = definition
+
+        self.cc_deck = cards.Deck(self, definition.cc_cards)
+        self.chance_deck = cards.Deck(self, definition.chance_cards)
+        # In the order players use the jail cards they hold from them, see
+        # MonopolyPlayer.use_jail_card
+        self.decks = (self.cc_deck, self.chance_deck)
+
+        self._add_tiles_from_definition()
 
-                if isinstance(tile, MonopolyBoardGoTile):
-                    self.go_tile = tile
+    @property
+    def digest(self):
+        return self.definition.digest
+
+    def _add_tiles_from_definition(self):
+        for spec in self.definition.tiles:
+            tile = TILE_TABLE[spec.kind].from_spec(self, spec)
+
+            if isinstance(tile, MonopolyBoardGoTile):
+                self.go_tile = tile
+
+            self.add_tile(tile)
 
-                self.tiles.append(tile)
+        if self.definition.jail is not None:
+            self.jail_tile = MonopolyBoardJailTile.from_spec(self,
+                self.definition.jail)
+            self.jail_tile.index = self.definition.jail_index
 
-                if isinstance(tile, MonopolyBoardPropertyTile):
-                    self.monopolies.add(tile.monopoly)
+        if self.definition.tiles:
+            self._nearest = self.definition.nearest
+            self._back = self.definition.back
+
+    def load_board(self, board_file):
+        assert len(self.tiles) == 0
+        self.definition.load_board(board_file)
+        self._add_tiles_from_definition()
 
         # The board had better have these
         assert self.jail_tile
         assert self.go_tile
 
+    # Puts a tile at the end of the board
+    def add_tile(self, tile):
+        assert tile.board == self
+        tile.index = len(self.tiles)
+        self.tiles.append(tile)
+        self._nearest = None
+        self._back = None
+        self._own_back = {}
+
+        if isinstance(tile, MonopolyBoardPropertyTile):
+            self.monopolies.add(tile.monopoly)
+            if tile.monopoly not in self.groups:
+                self.groups[tile.monopoly] = MonopolyGroup(tile.monopoly)
+            self.groups[tile.monopoly].add_tile(tile)
+
+    # Puts the board back the way it was before any game was played on it, so
+    # that one loaded board can be used for game after game.
+    def reset(self):
+        self.last_roll = None
+        for tile in self.tiles:
+            if isinstance(tile, MonopolyBoardPropertyTile):
+                tile.owner = None
+                tile.houses = 0
+                tile.mortgaged = False
+        self.cc_deck.cards = collections.deque(self.definition.cc_cards)
+        self.chance_deck.cards = collections.deque(
+            self.definition.chance_cards)
+
     def load_com_chest_cards(self, com_chest_cards_file):
-        assert len(self.cc_deck) == 0
-        with open(com_chest_cards_file) as f:
-            for card in json.loads(f.read()):
-                self.cc_deck.append(cards.create_card(**card))
+        self.definition.load_com_chest_cards(com_chest_cards_file)
+        self.cc_deck.cards.extend(self.definition.cc_cards)
 
     def load_chance_cards(self, chance_cards_file):
-        assert len(self.chance_deck) == 0
-        with open(chance_cards_file) as f:
-            for card in json.loads(f.read()):
-                self.chance_deck.append(cards.create_card(**card))
+        self.definition.load_chance_cards(chance_cards_file)
+        self.chance_deck.cards.extend(self.definition.chance_cards)
+
+    # Shuffles every deck, once at the start of a game
+    def shuffle_decks(self, rng):
+        for deck in self.decks:
+            deck.shuffle(rng)
+
+    # The number in decks of the deck card belongs in, or len(decks) for a
+    # card from none of them
+    def deck_number(self, card):
+        if card in self.definition.cc_cards:
+            return 0
+        if card in self.definition.chance_cards:
+            return 1
+        return len(self.decks)
+
+    # The first tile of class cls ahead of the tile at index going round the
+    # board, or None if the board hasn't got one.  Boards loaded from files
+    # share their definition's tables; others make their own when first asked.
+    def nearest_tile(self, cls, index):
+        if self._nearest is None:
+            self._nearest = nearest_tables([type(t) for t in self.tiles])
+        table = self._nearest.get(cls)
+        if table is None:
+            return None
+        return self.tiles[table[index]]
+
+    # The tile spaces behind the tile at index, going back past go if need be.
+    # Boards loaded from files share their definition's tables, which have
+    # every distance the cards use.  Any other distance, or any distance on a
+    # board put together by hand, gets a table of the board's own when first
+    # asked for.
+    def back_tile(self, spaces, index):
+        table = self._back.get(spaces) if self._back is not None else None
+        if table is None:
+            table = self._own_back.get(spaces)
+            if table is None:
+                table = self._own_back[spaces] = \
+                    back_tables(len(self.tiles), [spaces])[spaces]
+        return self.tiles[table[index]]
 
     def advance_player_by_roll(self, inout, player, roll):
+        if self.journal is not None:
+            self.journal.record(self, 'last_roll')
         self.last_roll = roll
-        if player.current_tile != self.jail_tile:
-            i = self.tiles.index(player.current_tile)
-        else:
-            i = self.jail_tile.board_index
-        i = (i + roll) % len(self.tiles)
+        i = (player.position + roll) % len(self.tiles)
         self.advance_player_to(inout, player, self.tiles[i])
 
-    def advance_player_to(self, inout, player, tile, dont_pass_go=False):
-        if tile == self.jail_tile:
-            # Don't collect $200 when going to jail.
+    # rent is passed on to the tile (see MonopolyBoardPropertyTile.activate)
+    def advance_player_to(self, inout, player, tile, dont_pass_go=False,
+            rent=None):
+        if tile is self.jail_tile:
+            # Don't collect anything for GO when going to jail.
             dont_pass_go = True
             player.jail()
 
-        # When rolling from jail, we have to take the player out of jail first.
-        if player.current_tile == self.jail_tile:
-            player.current_tile = self.tiles[self.jail_tile.board_index]
-
         # If the destination index is less than the players index, we had to
         # have passed go (index zero) in the move.  Also if we advance to go
         # from go we treat it as passing go again.
         if dont_pass_go is False:
-            player_tile = self.tiles.index(player.current_tile)
-            destination_tile = self.tiles.index(tile)
-            if destination_tile < player_tile or destination_tile == 0:
-                player.award(200)
-                inout.tell('You pass === GO === and get $200\n')
+            if tile.index < player.position or tile.index == 0:
+                salary = player.game.rules.go_salary
+                player.award(salary)
+                player.game.events.emit(events.PassedGo, player, salary)
 
-        player.place_on_tile(inout, tile)
+        player.place_on_tile(inout, tile, rent)
 
     def get_tiles(self, monopoly=None):
         if monopoly is None:
@@ -403,25 +844,16 @@ class MonopolyBoard(object):
                 yield tile
             return
 
-        for tile in self.tiles:
-            if not isinstance(tile, MonopolyBoardPropertyTile):
-                continue
-            if tile.monopoly == monopoly:
+        if monopoly in self.groups:
+            for tile in self.groups[monopoly].tiles:
                 yield tile
 
+    # Prints the board in two columns, from the tiles' rows
     def full_print(self, inout):
-        for _ in range(2):
-            _print_header(inout)
-            inout.tell(' ' * 5)
-        inout.tell('\n')
-
-        col1 = 0
-        col2 = (len(self.tiles) + 1) / 2
-        while col2 < len(self.tiles):
-            _print_tile(self.tiles[col1], inout)
-            inout.tell(' ' * 5)
-            _print_tile(self.tiles[col2], inout)
-            inout.tell('\n')
-            col1 += 1
-            col2 += 1
+        tiles = self.tiles
+        half = (len(tiles) + 1) / 2
+        lines = [_HEADER + ' ' * 5 + _HEADER + ' ' * 5]
+        for left, right in zip(tiles, tiles[half:]):
+            lines.append(left.row + ' ' * 5 + right.row)
+        inout.tell('\n'.join(lines) + '\n')
 
@@ -3,6 +3,7 @@
 import sys
 import unittest
 
+import monop
 import monop_testing
 import board
 import game
@@ -14,8 +15,8 @@ class MonopolyBoardPropertyTileTest(monop_testing.MonopolyTestCase):
             self.board, "Test Tile", 100, "Red", [5, 15, 20, 25, 30, 35])
         self.ptile2 = board.MonopolyBoardPropertyTile(
             self.board, "Test Tile 2", 200, "Red", [10, 25, 35, 40, 45, 50])
-        self.board.tiles.append(self.ptile1)
-        self.board.tiles.append(self.ptile2)
+        self.board.add_tile(self.ptile1)
+        self.board.add_tile(self.ptile2)
 
     def test_purchase(self):
         self.player.money = 300
@@ -46,6 +47,64 @@ class MonopolyBoardPropertyTileTest(monop_testing.MonopolyTestCase):
         self.assertTrue(self.ptile1.part_of_monopoly)
         self.assertTrue(self.ptile2.part_of_monopoly)
 
+    def test_management_num(self):
+        self.assertEqual(self.ptile1.management_num, 0)
+
+        self.ptile1.purchase(self.inout, self.player)
+        self.assertEqual(self.ptile1.management_num, 1)
+
+        self.ptile2.purchase(self.inout, self.game.players[1])
+        self.assertEqual(self.ptile1.management_num, 1)
+        self.assertEqual(self.ptile2.management_num, 1)
+
+    def test_row(self):
+        row = self.ptile1.row
+        self.assertIs(self.ptile1.row, row)
+        self.assertTrue(row.startswith('Test Tile '))
+        self.assertIn('   5 ', row)
+
+        self.ptile1.purchase(self.inout, self.player)
+        owned = self.ptile1.row
+        self.assertIn(str(self.player), owned)
+        self.assertIn('   1    5 ', owned)
+
+        # The rest of the group is shown as managed too
+        self.ptile2.purchase(self.inout, self.player)
+        self.assertIn('   2   10 ', self.ptile1.row)
+
+        self.ptile1.houses = 1
+        self.assertIn('   2   15 ', self.ptile1.row)
+
+        self.ptile1.houses = 0
+        self.ptile1.mortgage(self.inout, self.player)
+        self.assertIsNot(self.ptile1.row, owned)
+
+    def test_row_after_rollback(self):
+        self.ptile1.purchase(self.inout, self.player)
+        before = self.ptile1.row
+        cp = self.game.checkpoint()
+        self.ptile2.purchase(self.inout, self.player)
+        self.ptile1.mortgage(self.inout, self.player)
+        self.assertNotEqual(self.ptile1.row, before)
+
+        self.game.rollback(cp)
+        self.game.release(cp)
+        self.assertFalse(self.ptile1.mortgaged)
+        self.assertEqual(self.ptile1.row, before)
+
+    def test_part_of_monopoly_after_resign(self):
+        self.ptile1.purchase(self.inout, self.player)
+        other_player = self.game.players[1]
+        self.ptile2.purchase(self.inout, other_player)
+
+        other_player.resign_to(self.player)
+        self.assertTrue(self.ptile1.part_of_monopoly)
+        self.assertEqual(self.ptile2.management_num, 2)
+
+        self.player.resign_to_bank()
+        self.assertFalse(self.ptile1.part_of_monopoly)
+        self.assertEqual(self.ptile1.management_num, 0)
+
     def test_rent_basic(self):
         # ptile1 has rents [5, 15, 20, 25, 30, 35] (see setUp)
         self.ptile1.purchase(self.inout, self.player)
@@ -96,6 +155,26 @@ class MonopolyBoardPropertyTileTest(monop_testing.MonopolyTestCase):
         self.ptile1.print_rent(self.inout)
         self.assertEqual(self.inout.output, 'with a hotel, rent is 35\n')
 
+    def test_rent_table(self):
+        # ptile1 has rents [5, 15, 20, 25, 30, 35] (see setUp)
+        self.assertEqual(self.ptile1.rent_table, (5, 10, 15, 20, 25, 30, 35))
+        self.assertEqual(self.ptile1.rent_level, 0)
+
+        self.ptile1.purchase(self.inout, self.player)
+        self.ptile2.purchase(self.inout, self.player)
+        self.assertEqual(self.ptile1.rent_level, 1)
+
+        self.ptile1.place_house(self.inout, self.player)
+        self.assertEqual(self.ptile1.rent_level, 2)
+
+        self.player.resign_to_bank()
+        self.assertEqual(self.ptile1.rent_level, 0)
+
+    def test_rent_tables_shared(self):
+        b1 = monop.load_board()
+        b2 = monop.load_board()
+        self.assertIs(b1.tiles[1].rent_table, b2.tiles[1].rent_table)
+
 class MonopolyBoardRRTileTest(monop_testing.MonopolyTestCase):
     def setUp(self):
         super(MonopolyBoardRRTileTest, self).setUp()
@@ -106,7 +185,7 @@ class MonopolyBoardRRTileTest(monop_testing.MonopolyTestCase):
         self.tiles = [self.tile1, self.tile2, self.tile3, self.tile4]
 
         for tile in self.tiles:
-            self.board.tiles.append(tile)
+            self.board.add_tile(tile)
 
     def test_rent_one(self):
         self.tile1.purchase(self.inout, self.player)
@@ -122,6 +201,14 @@ class MonopolyBoardRRTileTest(monop_testing.MonopolyTestCase):
         for tile in self.tiles:
             self.assertEqual(tile.rent, 200)
 
+    def test_rent_after_selling(self):
+        for tile in self.tiles:
+            tile.purchase(self.inout, self.player)
+        self.tile4.owner = self.game.players[1]
+
+        self.assertEqual(self.tile1.rent, 100)
+        self.assertEqual(self.tile4.rent, 25)
+
     def test_place_house(self):
         with self.assertRaises(game.MonopolyUsageError):
             self.tile1.place_house(self.inout, self.player)
@@ -136,7 +223,7 @@ class MonopolyBoardUtilityTileTest(monop_testing.MonopolyTestCase):
         self.tiles = [self.tile1, self.tile2]
 
         for tile in self.tiles:
-            self.board.tiles.append(tile)
+            self.board.add_tile(tile)
 
         self.board.last_roll = 10
 
@@ -154,6 +241,13 @@ class MonopolyBoardUtilityTileTest(monop_testing.MonopolyTestCase):
         for tile in self.tiles:
             self.assertEqual(tile.rent, 10 * self.board.last_roll)
 
+    def test_row_follows_roll(self):
+        self.assertTrue(self.tile1.row.endswith(' ' * 5))
+        self.tile1.purchase(self.inout, self.player)
+        self.assertTrue(self.tile1.row.endswith('  40 '))
+        self.board.last_roll = 7
+        self.assertTrue(self.tile1.row.endswith('  28 '))
+
     def test_place_house(self):
         with self.assertRaises(game.MonopolyUsageError):
             self.tile1.place_house(self.inout, self.player)
@@ -163,9 +257,9 @@ class MonopolyBoardUtilityTileTest(monop_testing.MonopolyTestCase):
 class MonopolyBoardTest(monop_testing.MonopolyTestCase):
     def setUp(self):
         super(MonopolyBoardTest, self).setUp()
-        self.board.tiles.append(
+        self.board.add_tile(
             board.MonopolyBoardSafeTile(self.board, 'Safe Tile 1'))
-        self.board.tiles.append(
+        self.board.add_tile(
             board.MonopolyBoardSafeTile(self.board, 'Safe Tile 2'))
 
     def test_passing_go(self):
@@ -196,5 +290,61 @@ class MonopolyBoardTest(monop_testing.MonopolyTestCase):
         # They shouldn't have gotten any money
         self.assertEqual(self.player.money, pre_money)
 
+    def test_advance_by_roll_passing_go(self):
+        self.board.advance_player_to(self.inout, self.player,
+            self.board.tiles[2])
+        pre_money = self.player.money
+
+        # Three tiles on the board, so this wraps around to tile 1
+        self.board.advance_player_by_roll(self.inout, self.player, 2)
+
+        self.assertEqual(self.player.position, 1)
+        self.assertEqual(self.player.current_tile, self.board.tiles[1])
+        self.assertEqual(self.player.money, pre_money + 200)
+
+    def test_leaving_jail(self):
+        self.board.advance_player_to(self.inout, self.player,
+            self.board.jail_tile)
+        self.assertTrue(self.player.in_jail)
+        self.assertEqual(self.player.current_tile, self.board.jail_tile)
+        self.assertEqual(self.player.position, self.board.jail_tile.index)
+
+        # Players leave jail from the tile the jail sits beside
+        self.player.jailbreak_success()
+        self.board.advance_player_by_roll(self.inout, self.player, 1)
+        self.assertEqual(self.player.current_tile,
+            self.board.tiles[self.board.jail_tile.index + 1])
+
+class BoardDefinitionTest(monop_testing.MonopolyTestCase):
+    def test_definition_loaded_once(self):
+        b1 = monop.load_board()
+        b2 = monop.load_board()
+
+        self.assertIs(b1.definition, b2.definition)
+        self.assertEqual(len(b1.tiles), 40)
+        self.assertEqual(b1.jail_tile.index, 10)
+
+    def test_boards_dont_share_state(self):
+        b1 = monop.load_board()
+        b2 = monop.load_board()
+
+        tile1 = b1.tiles[1]
+        tile2 = b2.tiles[1]
+        self.assertIs(tile1.spec, tile2.spec)
+        self.assertIsNot(tile1, tile2)
+        self.assertIsNot(b1.cc_deck, b2.cc_deck)
+
+        tile1.owner = self.player
+        self.assertIsNone(tile2.owner)
+        self.assertEqual(b1.groups[tile1.monopoly].num_owned_by(self.player), 1)
+        self.assertEqual(b2.groups[tile2.monopoly].num_owned_by(self.player), 0)
+
+    def test_full_print(self):
+        b = monop.load_board()
+        b.full_print(self.inout)
+        lines = self.inout.output.split('\n')
+        self.assertEqual(len(lines), 22)
+        self.assertIn('Reading "RR"', self.inout.output)
+
 if __name__ == "__main__":
     sys.exit(unittest.main())
@@ -0,0 +1,89 @@
+import player
+
+# A computer player that never needs to ask anything.  The class attributes
+# below are the knobs that make one bot strategy different from another.
+class BotMonopolyPlayer(player.MonopolyPlayer):
+    __slots__ = ()
+
+    # Cash the bot tries to hold on to when buying property and houses
+    reserve = 0
+    # Whether the bot pays its way out of jail right away or tries for doubles
+    pays_jail = False
+
+    def can_spend(self, amount):
+        return self.money - amount >= self.reserve
+
+    # Monopolies are gone through in board order, rather than in whatever order
+    # the set of them happens to be in, so the same game always plays out the
+    # same way
+    def buildable_monopolies(self):
+        groups = self.game.board.groups
+        for monopoly in sorted(self.monopolies,
+                key=lambda m: groups[m].tiles[0].index):
+            tiles = [h for h in self.holdings if h.monopoly == monopoly]
+            if [t for t in tiles if t.mortgaged or not t.rents]:
+                continue
+            yield tiles
+
+    def build(self, inout):
+        for tiles in self.buildable_monopolies():
+            # Build evenly, always putting the next house on the property with
+            # the fewest
+            while True:
+                tile = min(tiles, key=lambda t: t.houses)
+                if tile.houses == 5 or \
+                        not self.can_spend(self.game.rules.house_price):
+                    break
+                if tile.houses < 4:
+                    tile.place_house(inout, self)
+                else:
+                    tile.place_hotel(inout, self)
+
+    def unmortgage_holdings(self, inout):
+        for holding in self.holdings:
+            if holding.unmortgagable and \
+                    self.can_spend(self.game.rules.unmortgage_cost(holding)):
+                holding.unmortgage(inout, self)
+
+    def leave_jail(self, inout):
+        if self.jail_cards:
+            self.use_jail_card()
+        elif self.pays_jail and self.can_spend(self.game.rules.jail_fine):
+            self.pay_for_jail(inout)
+
+    def have_turn(self, inout):
+        if self.in_jail:
+            self.leave_jail(inout)
+        self.unmortgage_holdings(inout)
+        self.build(inout)
+        self.game.roll_dice(inout)
+
+    def offer_property(self, inout, prop):
+        if self.can_spend(prop.cost):
+            prop.purchase(inout, self)
+
+    def out_of_money(self, inout):
+        for holding in self.holdings:
+            if self.money >= 0:
+                return
+            if holding.mortgagable:
+                holding.mortgage(inout, self)
+
+        if self.money < 0:
+            self.resign_to_bank()
+
+# Buys everything it lands on and builds whenever it can afford to
+class BuyEverythingBot(BotMonopolyPlayer):
+    __slots__ = ()
+    pays_jail = True
+
+# Keeps some cash around to pay rent with, and sits in jail as long as it can
+class CautiousBot(BotMonopolyPlayer):
+    __slots__ = ()
+    reserve = 300
+
+# The bots by the names they go by on the command line
+STRATEGIES = {
+    'buyer': BuyEverythingBot,
+    'cautious': CautiousBot,
+}
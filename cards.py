@@ -1,34 +1,102 @@
+import collections
+
 import board
+import events
+
+# A deck of cards like a real one: cards are drawn off the top and go back
+# underneath, so every card comes up once before any comes up again.  Cards
+# that are kept (see MonopolyCard.kept) stay out of the deck until they are put
+# back.  The deck is shuffled once at the start of a game, see
+# MonopolyBoard.shuffle_decks.
+class Deck(object):
+    __slots__ = ('board', 'cards')
+
+    def __init__(self, board_, cards_):
+        self.board = board_
+        # The top of the deck is on the left
+        self.cards = collections.deque(cards_)
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+    # Notes the order of the cards down as about to change, if the game is
+    # keeping track of changes (see MonopolyGame.checkpoint)
+    def record(self):
+        journal = self.board.journal
+        if journal is not None:
+            journal.record(self, 'cards')
+
+    def shuffle(self, rng):
+        self.record()
+        cards = list(self.cards)
+        rng.shuffle(cards)
+        self.cards = collections.deque(cards)
+
+    def draw(self):
+        self.record()
+        card = self.cards.popleft()
+        if not card.kept:
+            self.cards.append(card)
+        return card
+
+    # Puts a card that was kept back on the bottom
+    def put_back(self, card):
+        self.record()
+        self.cards.append(card)
 
 class MonopolyCard(object):
+    __slots__ = ('message',)
+
+    # Whether whoever draws the card holds on to it rather than it going
+    # straight back in the deck
+    kept = False
+
     def __init__(self, message):
         self.message = message
 
+    # What gets told when the card is drawn
+    def announcement(self):
+        return self.message
+
     def activate(self, _inout, _player, _game):
         pass
 
 class MonopolyMonetaryCard(MonopolyCard):
+    __slots__ = ('amount',)
+
     def __init__(self, amount, message):
         super(MonopolyMonetaryCard, self).__init__(message)
         self.amount = amount
 
+    def announcement(self):
+        return self.message + "\n"
+
     def activate(self, inout, player, _game):
-        inout.tell(self.message + "\n")
+        _game.events.emit(events.DrewCard, player, self)
         if self.amount < 0:
             player.pay(inout, -self.amount)
         else:
             player.award(self.amount)
 
 class MonopolyMonetaryPlayersCard(MonopolyCard):
+    __slots__ = ('amount',)
+
     def __init__(self, amount, message):
         super(MonopolyMonetaryPlayersCard, self).__init__(message)
         self.amount = amount
 
+    def announcement(self):
+        return self.message + "\n"
+
     def activate(self, inout, player, game):
-        inout.tell(self.message + "\n")
+        game.events.emit(events.DrewCard, player, self)
 
         total = 0
-        for other_player in game.players:
+        # Copy the list, since paying might bankrupt someone
+        for other_player in list(game.players):
             if self.amount >= 0:
                 other_player.pay(inout, self.amount)
             else:
@@ -42,61 +110,88 @@ class MonopolyMonetaryPlayersCard(MonopolyCard):
             player.pay(inout, -1 * total)
 
 class MonopolyGetOutOfJailCard(MonopolyCard):
+    __slots__ = ()
+
+    kept = True
+
     def __init__(self, message):
         super(MonopolyGetOutOfJailCard, self).__init__(message)
 
     def activate(self, inout, player, _game):
-        inout.tell(self.message)
-        player.give_jail_card()
+        _game.events.emit(events.DrewCard, player, self)
+        player.give_jail_card(self)
 
 class MonopolyTaxCard(MonopolyCard):
+    __slots__ = ()
+
     def __init__(self, message):
         super(MonopolyTaxCard, self).__init__(message)
 
     def activate(self, inout, player, _game):
-        inout.tell(self.message)
-        houses = 0
-        hotels = 0
-        for holding in player.holdings:
-            if holding.houses < 5:
-                houses += holding.houses
-            else:
-                hotels += 1
-
-        player.pay(inout, houses * 25 + hotels * 100)
+        _game.events.emit(events.DrewCard, player, self)
+        player.pay(inout, player.num_houses * 25 + player.num_hotels * 100)
 
+# Sends the player to the tile at tile_index, collecting GO's salary if they
+# pass it
 class MonopolyAdvanceCard(MonopolyCard):
+    __slots__ = ('tile_index',)
+
     def __init__(self, tile_index, message):
         super(MonopolyAdvanceCard, self).__init__(message)
         self.tile_index = tile_index
 
-    def activate(self, inout, _player, _game):
-        inout.tell(self.message)
-        # XXX ...
+    def activate(self, inout, player, _game):
+        _game.events.emit(events.DrewCard, player, self)
+        b = _game.board
+        b.advance_player_to(inout, player, b.tiles[self.tile_index])
 
+# Sends the player on to the nearest tile of type tile_type, a railroad or a
+# utility.  If someone else owns it they're owed more than usual: twice the
+# rent for a railroad, and ten times a fresh throw of the dice for a utility.
 class MonopolyAdvanceToTileTypeCard(MonopolyCard):
+    __slots__ = ('tile_type',)
+
     def __init__(self, tile_type, message):
         super(MonopolyAdvanceToTileTypeCard, self).__init__(message)
         self.tile_type = tile_type
 
-    def activate(self, inout, _player, _game):
-        inout.tell(self.message)
-        # XXX ...
-
+    def activate(self, inout, player, _game):
+        _game.events.emit(events.DrewCard, player, self)
+        b = _game.board
+        tile = b.nearest_tile(self.tile_type, player.position)
+        if tile is not None:
+            b.advance_player_to(inout, player, tile, rent=self.rent)
+
+    # What the owner of tile is owed, and the roll it came from
+    def rent(self, tile, _game):
+        if self.tile_type is board.MonopolyBoardUtilityTile:
+            roll = _game.rng.roll_two_dice()
+            return 10 * roll, roll
+        return 2 * tile.rent, _game.board.last_roll
+
+# Sends the player back num_spaces tiles, without collecting anything for
+# passing GO
 class MonopolyMoveBackCard(MonopolyCard):
+    __slots__ = ('num_spaces',)
+
     def __init__(self, num_spaces, message):
         super(MonopolyMoveBackCard, self).__init__(message)
         self.num_spaces = num_spaces
 
-    def activate(self, inout, _player, _game):
-        inout.tell(self.message)
-        # XXX ...
+    def activate(self, inout, player, _game):
+        _game.events.emit(events.DrewCard, player, self)
+        b = _game.board
+        tile = b.back_tile(self.num_spaces, player.position)
+        b.advance_player_to(inout, player, tile, dont_pass_go=True)
 
 class MonopolyGoToJailCard(MonopolyCard):
+    __slots__ = ()
+
     def __init__(self, message):
         super(MonopolyGoToJailCard, self).__init__(message)
 
     def activate(self, inout, player, game):
+        game.events.emit(events.DrewCard, player, self)
         game.board.advance_player_to(inout, player, game.board.jail_tile)
 
 def create_card(action, message):
@@ -3,8 +3,13 @@
 import sys
 import unittest
 
-import monop_testing
+import board
 import cards
+import game
+import monop
+import monop_testing
+import rng
+import util
 
 class MonpolyCardsTest(monop_testing.MonopolyTestCase):
     def test_monetary_card_add(self):
@@ -41,7 +46,174 @@ class MonpolyCardsTest(monop_testing.MonopolyTestCase):
 
         self.assertEqual(self.inout.output, msg + '\n')
 
-# XXX: Test the rest of the card types.
+# Dice that always come up 3, 4
+class FixedDice(object):
+    def roll_two_dice(self):
+        return util.TWO_DICE_ROLLS[2][3]
+
+class MovementCardsTest(unittest.TestCase):
+    def setUp(self):
+        self.inout = monop_testing.TestInputOutput()
+        self.game = game.MonopolyGame(monop.load_board())
+        for i in range(2):
+            self.game.add_player(
+                monop_testing.MonopolyTestPlayer('tester%d' % i, self.game))
+        self.player, self.other = self.game.players
+        self.tiles = self.game.board.tiles
+
+    def draw(self, card, position):
+        self.player.position = position
+        self.player.money = 1000
+        card.activate(self.inout, self.player, self.game)
+
+    def test_nearest_tile(self):
+        b = self.game.board
+        rr, utility = board.MonopolyBoardRRTile, board.MonopolyBoardUtilityTile
+        self.assertEqual(b.nearest_tile(rr, 7).index, 15)
+        self.assertEqual(b.nearest_tile(rr, 36).index, 5)
+        self.assertEqual(b.nearest_tile(rr, 5).index, 15)
+        self.assertEqual(b.nearest_tile(utility, 22).index, 28)
+        self.assertEqual(b.nearest_tile(utility, 36).index, 12)
+        self.assertIsNone(b.nearest_tile(board.MonopolyBoardJailTile, 0))
+
+        # Boards put together by hand work them out for themselves
+        test_board = monop_testing.create_test_monopoly_board()
+        test_board.add_tile(board.MonopolyBoardRRTile(test_board, 'RR', 200))
+        self.assertEqual(test_board.nearest_tile(rr, 1).index, 1)
+
+    def test_back_tile(self):
+        b = self.game.board
+        # The chance cards' go back 3 spaces is worked out when they're loaded
+        self.assertIn(3, b.definition.back)
+        self.assertEqual(b.back_tile(3, 22).index, 19)
+        self.assertEqual(b.back_tile(3, 2).index, 39)
+        # Distances the cards don't use are kept by the board, not in the
+        # definition every board shares
+        self.assertEqual(b.back_tile(5, 1).index, 36)
+        self.assertNotIn(5, b.definition.back)
+
+        test_board = monop_testing.create_test_monopoly_board()
+        test_board.add_tile(board.MonopolyBoardRRTile(test_board, 'RR', 200))
+        self.assertEqual(test_board.back_tile(1, 0).index, 1)
+
+    def test_advance(self):
+        self.draw(cards.MonopolyAdvanceCard(24, 'msg'), 22)
+        self.assertEqual(self.player.position, 24)
+        self.assertEqual(self.player.money, 1000)
+
+    def test_advance_past_go(self):
+        self.draw(cards.MonopolyAdvanceCard(5, 'msg'), 36)
+        self.assertEqual(self.player.position, 5)
+        self.assertEqual(self.player.money, 1200)
+
+    def test_advance_to_railroad(self):
+        for i in (15, 25):
+            self.tiles[i].owner = self.other
+        self.draw(cards.MonopolyAdvanceToTileTypeCard(
+            board.MonopolyBoardRRTile, 'msg'), 7)
+
+        self.assertEqual(self.player.position, 15)
+        self.assertEqual(self.player.money, 1000 - 2 * 50)
+        self.assertEqual(self.other.money, 1500 + 2 * 50)
+
+    def test_advance_to_utility(self):
+        self.tiles[28].owner = self.other
+        self.game.rng = FixedDice()
+        self.draw(cards.MonopolyAdvanceToTileTypeCard(
+            board.MonopolyBoardUtilityTile, 'msg'), 22)
+
+        self.assertEqual(self.player.position, 28)
+        self.assertEqual(self.player.money, 1000 - 70)
+        self.assertEqual(self.other.money, 1500 + 70)
+
+    def test_advance_to_unowned(self):
+        self.draw(cards.MonopolyAdvanceToTileTypeCard(
+            board.MonopolyBoardUtilityTile, 'msg'), 36)
+        self.assertEqual(self.player.position, 12)
+        self.assertEqual(self.player.money, 1200)
+
+    def test_move_back(self):
+        self.draw(cards.MonopolyMoveBackCard(3, 'msg'), 22)
+        self.assertEqual(self.player.position, 19)
+        self.assertEqual(self.player.money, 1000)
+
+        # Going back past GO doesn't collect anything
+        self.draw(cards.MonopolyMoveBackCard(3, 'msg'), 2)
+        self.assertEqual(self.player.position, 39)
+        self.assertEqual(self.player.money, 1000)
+
+class DeckTest(unittest.TestCase):
+    def setUp(self):
+        self.board = monop.load_board()
+        self.game = game.MonopolyGame(self.board, rng.GameRandom(5))
+        for i in range(2):
+            self.game.add_player(
+                monop_testing.MonopolyTestPlayer('tester%d' % i, self.game))
+        self.player, self.other = self.game.players
+        self.deck = self.board.chance_deck
+        self.jail_card = [c for c in self.deck
+            if isinstance(c, cards.MonopolyGetOutOfJailCard)][0]
+        self.inout = monop_testing.TestInputOutput()
+
+    def test_shuffled(self):
+        definition = self.board.definition
+        self.assertEqual(sorted(self.deck), sorted(definition.chance_cards))
+        self.assertNotEqual(list(self.deck), definition.chance_cards)
+
+        # The same seed shuffles the same way
+        other = game.MonopolyGame(monop.load_board(), rng.GameRandom(5))
+        self.assertEqual(list(other.board.chance_deck), list(self.deck))
+        self.assertEqual(list(other.board.cc_deck), list(self.board.cc_deck))
+
+        self.board.reset()
+        self.assertEqual(list(self.deck), definition.chance_cards)
+
+    def test_every_card_before_any_again(self):
+        self.deck.cards.remove(self.jail_card)
+        order = list(self.deck)
+        drawn = [self.deck.draw() for _ in xrange(2 * len(order))]
+        self.assertEqual(drawn, order + order)
+
+    def test_jail_card_kept(self):
+        self.deck.cards.remove(self.jail_card)
+        self.deck.cards.appendleft(self.jail_card)
+        size = len(self.deck)
+
+        self.board.tiles[7].activate(self.inout, self.player, self.game)
+        self.assertEqual(self.player.jail_cards, [self.jail_card])
+        self.assertEqual(len(self.deck), size - 1)
+        self.assertNotIn(self.jail_card, self.deck)
+
+        # Used, it goes back on the bottom
+        self.player.jail()
+        self.player.use_jail_card()
+        self.assertEqual(self.player.jail_cards, [])
+        self.assertEqual(self.deck.cards[-1], self.jail_card)
+
+    def test_jail_cards_used_in_deck_order(self):
+        cc_card = [c for c in self.board.cc_deck
+            if isinstance(c, cards.MonopolyGetOutOfJailCard)][0]
+        self.board.cc_deck.cards.remove(cc_card)
+        self.deck.cards.remove(self.jail_card)
+        self.player.give_jail_card(self.jail_card)
+        self.player.give_jail_card(cc_card)
+        self.assertEqual(self.player.jail_cards, [cc_card, self.jail_card])
+
+        # Going out to the bank hands them back
+        self.player.resign_to_bank()
+        self.assertEqual(self.board.cc_deck.cards[-1], cc_card)
+        self.assertEqual(self.deck.cards[-1], self.jail_card)
+
+    def test_rollback(self):
+        before = list(self.deck)
+        cp = self.game.checkpoint()
+        for _ in xrange(5):
+            self.deck.draw()
+        self.assertNotEqual(list(self.deck), before)
+
+        self.game.rollback(cp)
+        self.game.release(cp)
+        self.assertEqual(list(self.deck), before)
 
 if __name__ == "__main__":
     sys.exit(unittest.main())
@@ -0,0 +1,283 @@
+import collections
+import math
+import time
+
+import bots
+
+# The kinds of decisions a DeadlineBot makes, and 'turn' for a whole turn
+DECISION_KINDS = ('jail', 'unmortgage', 'build', 'buy', 'mortgage', 'turn')
+
+# How many houses a DeadlineBot thinks about building: as many as it can while
+# keeping each of these amounts of cash (as well as its own reserve), and none
+# at all
+BUILD_RESERVES = (0, 200, 500)
+
+# A point in time a decision has to be made by.  A deadline of None seconds
+# never passes.
+class Deadline(object):
+    __slots__ = ('at',)
+
+    def __init__(self, seconds):
+        self.at = None if seconds is None else time.time() + seconds
+
+    # Seconds left, or None if there's no deadline
+    def remaining(self):
+        if self.at is None:
+            return None
+        return max(self.at - time.time(), 0.0)
+
+    def expired(self):
+        return self.at is not None and time.time() >= self.at
+
+# Counts how long something took, in buckets a quarter of a doubling wide
+# starting at a microsecond, so a percentile read back is never more than
+# about 19% over.  Histograms of the same thing from different places (worker
+# processes, say) can be merged.
+class LatencyHistogram(object):
+    BUCKETS_PER_DOUBLING = 4
+
+    def __init__(self):
+        self.buckets = collections.Counter()
+        self.count = 0
+        # How many times the budget was blown
+        self.timeouts = 0
+        self.max = 0.0
+
+    def add(self, seconds, timed_out=False):
+        us = seconds * 1e6
+        bucket = 0
+        if us > 1:
+            bucket = int(math.ceil(math.log(us, 2) * self.BUCKETS_PER_DOUBLING))
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.timeouts += timed_out
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.timeouts += other.timeouts
+        self.max = max(self.max, other.max)
+
+    # The time, in seconds, that p percent of everything counted took at most
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rank = max(int(math.ceil(self.count * p / 100.0)), 1)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                upper = 2 ** (float(bucket) / self.BUCKETS_PER_DOUBLING) / 1e6
+                return min(upper, self.max)
+
+# A LatencyHistogram for every kind of decision each strategy makes
+class LatencyRecorder(object):
+    def __init__(self):
+        # (strategy name, decision kind) -> LatencyHistogram
+        self.histograms = {}
+
+    def add(self, strategy, kind, seconds, timed_out=False):
+        key = (strategy, kind)
+        if key not in self.histograms:
+            self.histograms[key] = LatencyHistogram()
+        self.histograms[key].add(seconds, timed_out)
+
+    def merge(self, other):
+        for key, hist in other.histograms.iteritems():
+            if key not in self.histograms:
+                self.histograms[key] = LatencyHistogram()
+            self.histograms[key].merge(hist)
+
+    def report(self):
+        lines = ['{:<16} {:<10} {:>7} {:>9} {:>9} {:>9} {:>8}'.format(
+            'strategy', 'decision', 'count', 'p50 ms', 'p99 ms', 'max ms',
+            'timeouts')]
+        for (strategy, kind), hist in sorted(self.histograms.iteritems()):
+            lines.append('{:<16} {:<10} {:>7} {:>9.2f} {:>9.2f} {:>9.2f} {:>8}'
+                .format(strategy, kind, hist.count,
+                    1000 * hist.percentile(50), 1000 * hist.percentile(99),
+                    1000 * hist.max, hist.timeouts))
+        return '\n'.join(lines) + '\n'
+
+# A bot that makes each of its choices against a deadline, for when a game
+# can't be kept waiting on it.  Whenever it has a real choice to make -- how
+# to get out of jail, whether to unmortgage, how many houses to build, whether
+# to buy a property, or what to mortgage when it runs out of money -- the
+# choices are listed as actions and handed to refine, which strategies
+# override to work out better and better answers for as long as they're given.
+# Whatever it last came up with before the deadline is what the bot does.  If
+# it came up with nothing in time, the bot does what the plain bot would have,
+# which is always the first action.
+#
+# budget is how many seconds every decision gets and budgets can give some
+# kinds (see DECISION_KINDS) different ones; None means no limit.  Whole turns
+# are timed too, but only count as timed out if budgets gives 'turn' a budget.
+# How long everything took goes into latency, a LatencyRecorder, which can be
+# shared between players to compare strategies.
+class DeadlineBot(bots.BotMonopolyPlayer):
+    __slots__ = ('budgets', 'latency')
+
+    def __init__(self, name, game, budget=None, budgets=None, latency=None):
+        super(DeadlineBot, self).__init__(name, game)
+
+        self.budgets = dict.fromkeys(DECISION_KINDS, budget)
+        self.budgets['turn'] = None
+        if budgets:
+            self.budgets.update(budgets)
+        if latency is None:
+            latency = LatencyRecorder()
+        self.latency = latency
+
+    # Yields better and better actions for decision until it runs out of
+    # ideas.  It should stop by itself rather than go on past the deadline,
+    # since anything it yields after that is thrown away.  The plain bot's
+    # choice is all this one has.
+    def refine(self, decision, actions, deadline):
+        yield actions[0]
+
+    # Runs refine against the deadline for decision, returning the action to
+    # take and whether refine ran out of time
+    def choose(self, decision, actions):
+        deadline = Deadline(self.budgets[decision[0]])
+        action = actions[0]
+        timed_out = False
+
+        answers = self.refine(decision, actions, deadline)
+        try:
+            for answer in answers:
+                if deadline.expired():
+                    timed_out = True
+                    break
+                action = answer
+        finally:
+            answers.close()
+
+        return action, timed_out
+
+    def decide(self, inout, decision, actions):
+        if len(actions) > 1:
+            start = time.time()
+            action, timed_out = self.choose(decision, actions)
+            self.latency.add(type(self).__name__, decision[0],
+                time.time() - start, timed_out)
+        else:
+            action = actions[0]
+        self.take(inout, decision, action)
+
+    # ======= Decisions =======
+
+    # While someone is searching (see MonopolyGame.searching) the bot just
+    # plays by the plain bot rules
+
+    def have_turn(self, inout):
+        if self.game.searching:
+            return super(DeadlineBot, self).have_turn(inout)
+
+        start = time.time()
+        super(DeadlineBot, self).have_turn(inout)
+        elapsed = time.time() - start
+        budget = self.budgets['turn']
+        self.latency.add(type(self).__name__, 'turn', elapsed,
+            budget is not None and elapsed > budget)
+
+    def leave_jail(self, inout):
+        if self.game.searching:
+            return super(DeadlineBot, self).leave_jail(inout)
+
+        fine = self.game.rules.jail_fine
+        actions = ['roll']
+        if self.money >= fine:
+            actions.insert(0, 'pay')
+            if not (self.pays_jail and self.can_spend(fine)):
+                actions.reverse()
+        if self.jail_cards:
+            actions.insert(0, 'card')
+        self.decide(inout, ('jail', None), actions)
+
+    def unmortgage_holdings(self, inout):
+        if self.game.searching or not [h for h in self.holdings
+                if h.unmortgagable and
+                self.can_spend(self.game.rules.unmortgage_cost(h))]:
+            return super(DeadlineBot, self).unmortgage_holdings(inout)
+
+        self.decide(inout, ('unmortgage', None), [True, False])
+
+    def build(self, inout):
+        if self.game.searching:
+            return super(DeadlineBot, self).build(inout)
+
+        price = self.game.rules.house_price
+        room = sum(sum(5 - t.houses for t in tiles)
+            for tiles in self.buildable_monopolies())
+        actions = []
+        for reserve in (self.reserve,) + BUILD_RESERVES:
+            n = min(room, max(0, (self.money - reserve) // price))
+            if n not in actions:
+                actions.append(n)
+        if 0 not in actions:
+            actions.append(0)
+        if actions != [0]:
+            self.decide(inout, ('build', None), actions)
+
+    def offer_property(self, inout, prop):
+        if self.game.searching or not self.can_spend(prop.cost):
+            return super(DeadlineBot, self).offer_property(inout, prop)
+
+        self.decide(inout, ('buy', prop.index), [True, False])
+
+    def out_of_money(self, inout):
+        if self.game.searching or \
+                not [h for h in self.holdings if h.mortgagable]:
+            return super(DeadlineBot, self).out_of_money(inout)
+
+        self.decide(inout, ('mortgage', None), ['in order', 'cheapest'])
+
+    # Carries out action for decision, a (kind, tile index) pair
+    def take(self, inout, decision, action):
+        kind, index = decision
+        if kind == 'jail':
+            if action == 'card':
+                self.use_jail_card()
+            elif action == 'pay':
+                self.pay_for_jail(inout)
+        elif kind == 'unmortgage':
+            if action:
+                super(DeadlineBot, self).unmortgage_holdings(inout)
+        elif kind == 'build':
+            self.build_houses(inout, action)
+        elif kind == 'buy':
+            if action:
+                self.game.board.tiles[index].purchase(inout, self)
+        elif kind == 'mortgage':
+            if action == 'cheapest':
+                self.mortgage_cheapest(inout)
+            else:
+                super(DeadlineBot, self).out_of_money(inout)
+
+    # Builds up to n houses, evenly, like build does
+    def build_houses(self, inout, n):
+        for tiles in self.buildable_monopolies():
+            while n:
+                tile = min(tiles, key=lambda t: t.houses)
+                if tile.houses == 5 or \
+                        self.money < self.game.rules.house_price:
+                    break
+                if tile.houses < 4:
+                    tile.place_house(inout, self)
+                else:
+                    tile.place_hotel(inout, self)
+                n -= 1
+
+    # Mortgages whatever gives up the least rent first: lone properties before
+    # monopolies, cheapest first
+    def mortgage_cheapest(self, inout):
+        for holding in sorted(self.holdings,
+                key=lambda h: (h.part_of_monopoly, h.cost)):
+            if self.money >= 0:
+                return
+            if holding.mortgagable:
+                holding.mortgage(inout, self)
+
+        if self.money < 0:
+            self.resign_to_bank()
@@ -0,0 +1,137 @@
+#!/usr/bin/python
+
+import functools
+import sys
+import time
+import unittest
+
+import bots
+import decisions
+import monop
+import monop_testing
+import simulate
+import util
+
+class DeadlineTest(unittest.TestCase):
+    def test_no_deadline(self):
+        deadline = decisions.Deadline(None)
+        self.assertFalse(deadline.expired())
+        self.assertIsNone(deadline.remaining())
+
+    def test_passed(self):
+        deadline = decisions.Deadline(0)
+        self.assertTrue(deadline.expired())
+        self.assertEqual(deadline.remaining(), 0.0)
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_percentiles(self):
+        hist = decisions.LatencyHistogram()
+        for _ in xrange(99):
+            hist.add(0.001)
+        hist.add(0.1, timed_out=True)
+
+        self.assertEqual(hist.count, 100)
+        self.assertEqual(hist.timeouts, 1)
+        self.assertTrue(0.001 <= hist.percentile(50) < 0.0012)
+        self.assertTrue(0.001 <= hist.percentile(99) < 0.0012)
+        self.assertEqual(hist.percentile(100), 0.1)
+
+    def test_empty(self):
+        self.assertEqual(decisions.LatencyHistogram().percentile(99), 0.0)
+
+    def test_merge(self):
+        recorder = decisions.LatencyRecorder()
+        recorder.add('A', 'buy', 0.001)
+        other = decisions.LatencyRecorder()
+        other.add('A', 'buy', 0.002, timed_out=True)
+        other.add('B', 'jail', 0.003)
+        recorder.merge(other)
+
+        self.assertEqual(recorder.histograms['A', 'buy'].count, 2)
+        self.assertEqual(recorder.histograms['A', 'buy'].timeouts, 1)
+        self.assertEqual(recorder.histograms['B', 'jail'].max, 0.003)
+        report = recorder.report()
+        self.assertIn('jail', report)
+        self.assertEqual(len(report.splitlines()), 3)
+
+# Would rather not buy anything, but takes its time making up its mind
+class SlowBot(decisions.DeadlineBot):
+    __slots__ = ()
+
+    def refine(self, decision, actions, deadline):
+        if decision[0] == 'buy':
+            time.sleep(0.01)
+            yield False
+        else:
+            yield actions[0]
+
+# Comes up with a quick answer for buying, then a slow one
+class HastyBot(decisions.DeadlineBot):
+    __slots__ = ()
+
+    def refine(self, decision, actions, deadline):
+        if decision[0] == 'buy':
+            yield False
+            time.sleep(0.01)
+        yield actions[0]
+
+class PayingDeadlineBot(decisions.DeadlineBot):
+    __slots__ = ()
+    pays_jail = True
+
+class DeadlineBotTest(unittest.TestCase):
+    def setUp(self):
+        self.board = monop.load_board()
+        self.inout = util.NullInputOutput()
+
+    def play(self, strategies, turns=300):
+        monop_game, seats = simulate.start_game(self.board, strategies,
+            seed=5)
+        simulate.play_turns(monop_game, self.inout, turns)
+        return monop_game, seats
+
+    def test_plays_like_plain_bot(self):
+        for deadline_bot, plain_bot in [
+                (decisions.DeadlineBot, bots.BotMonopolyPlayer),
+                (PayingDeadlineBot, bots.BuyEverythingBot)]:
+            expected = monop_testing.game_state(
+                *self.play([plain_bot, bots.CautiousBot]))
+            monop_game, seats = self.play([deadline_bot, bots.CautiousBot])
+
+            self.assertEqual(monop_testing.game_state(monop_game, seats),
+                expected)
+            self.assertIn((deadline_bot.__name__, 'buy'),
+                seats[0].latency.histograms)
+            self.assertIn((deadline_bot.__name__, 'turn'),
+                seats[0].latency.histograms)
+
+    def test_fallback_on_timeout(self):
+        strategy = functools.partial(SlowBot, budget=0.001)
+        monop_game, seats = self.play([strategy, bots.CautiousBot], turns=30)
+
+        # Its answer always came too late, so it bought like the plain bot
+        self.assertTrue(seats[0].holdings)
+        hist = seats[0].latency.histograms['SlowBot', 'buy']
+        self.assertEqual(hist.timeouts, hist.count)
+
+    def test_anytime(self):
+        strategy = functools.partial(HastyBot, budget=0.005)
+        monop_game, seats = self.play([strategy, bots.CautiousBot], turns=30)
+
+        # Its first answer came in time and is the one it went with
+        self.assertEqual(seats[0].holdings, [])
+        hist = seats[0].latency.histograms['HastyBot', 'buy']
+        self.assertTrue(hist.count > 0)
+        self.assertEqual(hist.timeouts, hist.count)
+
+    def test_no_budget(self):
+        strategy = functools.partial(SlowBot, budget=0.001,
+            budgets={'buy': None})
+        monop_game, seats = self.play([strategy, bots.CautiousBot], turns=30)
+
+        self.assertEqual(seats[0].holdings, [])
+        self.assertEqual(seats[0].latency.histograms['SlowBot', 'buy']
+            .timeouts, 0)
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,208 @@
+import collections
+
+# Everything that happens in a game is announced as one of the events below, on
+# the game's EventBus.  Nothing is made unless someone is subscribed, so a game
+# nobody is watching doesn't pay for any of it.
+#
+# Each event knows how to describe itself in text (render), which is what
+# TextRenderer uses to tell a human what's going on.  Events hold everything
+# they need to do that, so they can be kept and rendered after the game has
+# moved on.
+
+def _event(name, fields):
+    return collections.namedtuple(name, fields)
+
+class Rolled(_event('Rolled', ['player', 'roll'])):
+    __slots__ = ()
+
+    def render(self):
+        return "roll is {}\n".format(self.roll)
+
+class GoesAgain(_event('GoesAgain', ['player'])):
+    __slots__ = ()
+
+    def render(self):
+        return "{} rolled doubles.  Goes again\n".format(self.player.name)
+
+class RolledThreeDoubles(_event('RolledThreeDoubles', ['player'])):
+    __slots__ = ()
+
+    def render(self):
+        return "That's 3 doubles.  You go to jail\n"
+
+class Jailed(_event('Jailed', ['player'])):
+    __slots__ = ()
+
+    def render(self):
+        return None
+
+class StayedInJail(_event('StayedInJail', ['player'])):
+    __slots__ = ()
+
+    def render(self):
+        return "Sorry, that doesn't get you out\n"
+
+class RolledOutOfJail(_event('RolledOutOfJail', ['player'])):
+    __slots__ = ()
+
+    def render(self):
+        return "Double roll gets you out.\n"
+
+class PaidJailFine(_event('PaidJailFine', ['player', 'amount'])):
+    __slots__ = ()
+
+    def render(self):
+        return "It's your third turn and you didn't roll doubles.  " \
+            "You have to pay ${}\n".format(self.amount)
+
+class PassedGo(_event('PassedGo', ['player', 'amount'])):
+    __slots__ = ()
+
+    def render(self):
+        return 'You pass === GO === and get ${}\n'.format(self.amount)
+
+class Moved(_event('Moved', ['player', 'tile'])):
+    __slots__ = ()
+
+    def render(self):
+        return "That puts you on {}\n".format(self.tile)
+
+class LandedOnSafe(_event('LandedOnSafe', ['player', 'tile'])):
+    __slots__ = ()
+
+    def render(self):
+        return "This is a safe place\n"
+
+class OfferedProperty(_event('OfferedProperty', ['player', 'tile'])):
+    __slots__ = ()
+
+    def render(self):
+        return "That would cost ${}\n".format(self.tile.cost)
+
+class Bought(_event('Bought', ['player', 'tile', 'cost'])):
+    __slots__ = ()
+
+    def render(self):
+        return None
+
+class LandedOnOwn(_event('LandedOnOwn', ['player', 'tile'])):
+    __slots__ = ()
+
+    def render(self):
+        return "You own it.\n"
+
+class LandedOnOwned(_event('LandedOnOwned', ['player', 'tile', 'owner'])):
+    __slots__ = ()
+
+    def render(self):
+        return "Owned by {}\n".format(self.owner.name)
+
+class LandedOnMortgaged(_event('LandedOnMortgaged', ['player', 'tile'])):
+    __slots__ = ()
+
+    def render(self):
+        return 'The thing is mortgaged.  You got lucky this time\n'
+
+class PaidRent(_event('PaidRent',
+        ['player', 'tile', 'amount', 'houses', 'roll'])):
+    __slots__ = ()
+
+    def render(self):
+        return self.tile.rent_text(self.amount, self.houses, self.roll)
+
+class DrewCard(_event('DrewCard', ['player', 'card'])):
+    __slots__ = ()
+
+    def render(self):
+        return self.card.announcement()
+
+class BuiltHouse(_event('BuiltHouse', ['player', 'tile'])):
+    __slots__ = ()
+
+    def render(self):
+        return None
+
+class Mortgaged(_event('Mortgaged', ['player', 'tile', 'amount'])):
+    __slots__ = ()
+
+    def render(self):
+        return 'That got you ${}\n'.format(self.amount)
+
+class Unmortgaged(_event('Unmortgaged', ['player', 'tile', 'amount'])):
+    __slots__ = ()
+
+    def render(self):
+        return 'That cost you ${}\n'.format(self.amount)
+
+class Resigned(_event('Resigned', ['player'])):
+    __slots__ = ()
+
+    def render(self):
+        return "{} is out of the game\n".format(self.player)
+
+class Won(_event('Won', ['player'])):
+    __slots__ = ()
+
+    def render(self):
+        return "{} wins!\n".format(self.player)
+
+ALL_EVENTS = (Rolled, GoesAgain, RolledThreeDoubles, Jailed, StayedInJail,
+    RolledOutOfJail, PaidJailFine, PassedGo, Moved, LandedOnSafe,
+    OfferedProperty, Bought, LandedOnOwn, LandedOnOwned, LandedOnMortgaged,
+    PaidRent, DrewCard, BuiltHouse, Mortgaged, Unmortgaged, Resigned, Won)
+
+class EventBus(object):
+    def __init__(self):
+        # event type -> callbacks subscribed to it
+        self._subscribers = {}
+        # event type -> callbacks subscribed to its arguments
+        self._arg_subscribers = {}
+
+    # Calls callback with every event of the given types from now on, or every
+    # event if no types are given.
+    def subscribe(self, callback, *event_types):
+        for event_type in event_types or ALL_EVENTS:
+            self._subscribers.setdefault(event_type, []).append(callback)
+
+    # Like subscribe, but callback is called with the event's fields as
+    # arguments rather than with the event itself.  No event gets made for
+    # these, which makes them the cheaper way to follow a lot of events.
+    def subscribe_args(self, callback, *event_types):
+        for event_type in event_types or ALL_EVENTS:
+            self._arg_subscribers.setdefault(event_type, []).append(callback)
+
+    def unsubscribe(self, callback):
+        for subscribers in [self._subscribers, self._arg_subscribers]:
+            for event_type, callbacks in subscribers.items():
+                if callback in callbacks:
+                    callbacks.remove(callback)
+                if not callbacks:
+                    del subscribers[event_type]
+
+    def wants(self, event_type):
+        return event_type in self._subscribers or \
+            event_type in self._arg_subscribers
+
+    # Makes the event out of args and hands it to everyone subscribed to it.
+    # With nobody subscribed nothing is made at all.
+    def emit(self, event_type, *args):
+        callbacks = self._subscribers.get(event_type)
+        if callbacks:
+            event = event_type(*args)
+            for callback in callbacks:
+                callback(event)
+
+        callbacks = self._arg_subscribers.get(event_type)
+        if callbacks:
+            for callback in callbacks:
+                callback(*args)
+
+# The text front end: tells inout about every event, as the game always used to
+class TextRenderer(object):
+    def __init__(self, inout):
+        self.inout = inout
+
+    def __call__(self, event):
+        text = event.render()
+        if text:
+            self.inout.tell(text)
@@ -0,0 +1,104 @@
+#!/usr/bin/python
+
+import sys
+import unittest
+
+import bots
+import cards
+import events
+import monop
+import monop_testing
+import simulate
+import util
+
+class EventBusTest(unittest.TestCase):
+    def setUp(self):
+        self.bus = events.EventBus()
+        self.seen = []
+
+    def test_no_subscribers(self):
+        made = []
+        class Counted(events.Rolled):
+            __slots__ = ()
+            def __new__(cls, *args):
+                made.append(args)
+                return super(Counted, cls).__new__(cls, *args)
+
+        self.bus.emit(Counted, None, 7)
+        self.assertEqual(made, [])
+
+    def test_subscribe_to_types(self):
+        self.bus.subscribe(self.seen.append, events.Rolled)
+        self.bus.emit(events.Rolled, 'p', 7)
+        self.bus.emit(events.Jailed, 'p')
+
+        self.assertEqual(self.seen, [events.Rolled('p', 7)])
+
+    def test_subscribe_to_everything(self):
+        self.bus.subscribe(self.seen.append)
+        self.bus.emit(events.Rolled, 'p', 7)
+        self.bus.emit(events.Jailed, 'p')
+
+        self.assertEqual(self.seen,
+            [events.Rolled('p', 7), events.Jailed('p')])
+
+    def test_unsubscribe(self):
+        self.bus.subscribe(self.seen.append)
+        self.bus.unsubscribe(self.seen.append)
+        self.bus.emit(events.Rolled, 'p', 7)
+
+        self.assertEqual(self.seen, [])
+        self.assertFalse(self.bus.wants(events.Rolled))
+
+class EventsInGameTest(monop_testing.MonopolyTestCase):
+    def test_card_events(self):
+        seen = []
+        self.game.events.subscribe(seen.append, events.DrewCard)
+
+        card = cards.MonopolyMonetaryCard(100, 'Bank error')
+        card.activate(self.inout, self.player, self.game)
+
+        self.assertEqual(seen, [events.DrewCard(self.player, card)])
+        self.assertEqual(self.inout.output, 'Bank error\n')
+
+    def test_rendering(self):
+        self.game.events.emit(events.PassedGo, self.player, 200)
+        self.game.events.emit(events.Bought, self.player, None, 100)
+        self.game.events.emit(events.Won, self.player)
+
+        self.assertEqual(self.inout.output,
+            'You pass === GO === and get $200\ntester0 (1) wins!\n')
+
+    def test_resign_events(self):
+        seen = []
+        self.game.events.subscribe(seen.append, events.Resigned, events.Won)
+
+        others = self.game.players[1:]
+        for plr in others:
+            plr.resign_to_bank()
+
+        self.assertEqual(seen, [events.Resigned(p) for p in others] +
+            [events.Won(self.player)])
+
+class SimulatedEventsTest(unittest.TestCase):
+    def test_bot_game_events(self):
+        b = monop.load_board()
+        monop_game, seats = simulate.start_game(b,
+            [bots.BuyEverythingBot, bots.CautiousBot], seed=3)
+
+        seen = []
+        monop_game.events.subscribe(seen.append)
+        simulate.play_turns(monop_game, util.NullInputOutput(), 1000)
+
+        kinds = set(type(e) for e in seen)
+        for kind in [events.Rolled, events.Moved, events.Bought,
+                events.PaidRent, events.Won]:
+            self.assertIn(kind, kinds)
+        self.assertEqual(seen[-1], events.Won(monop_game.winner))
+
+        # Every event can be told as text
+        for e in seen:
+            e.render()
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -1,7 +1,12 @@
 import sys
+import weakref
 
 import board
+import events
+import journal
 import player
+import rng
+import rules
 import util
 
 class MonopolyUsageError(Exception):
@@ -12,14 +17,36 @@ def maybe_quit(inout):
         sys.exit(0)
 
 class MonopolyGame(object):
-    def __init__(self, board_):
+    # All of the game's dice rolls and card draws come from rng, a
+    # rng.GameRandom.  Give it one made from a known seed to be able to play
+    # the same game again.  It's played by the house rules in rules_ (a
+    # rules.HouseRules), or by the standard ones.
+    def __init__(self, board_, rng_=None, rules_=None):
+        if rng_ is None:
+            rng_ = rng.GameRandom()
+        self.rng = rng_
+        self.rules = rules_ if rules_ is not None else rules.STANDARD
+
         self.players = []
-        self.player_iter = None
+        self.next_player_index = 0
         self.next_player_num = 1
 
         self.current_player = None
+        self.winner = None
 
         self.board = board_
+        # Every game is played with the cards in a different order
+        self.board.shuffle_decks(self.rng)
+
+        # Everything that happens in the game is emitted here; see events.py
+        self.events = events.EventBus()
+
+        # Keeps track of changes while there are checkpoints to go back to
+        self.journal = None
+
+        # Set while a player is trying moves out ahead of time (see mcts.py).
+        # Players should just play while it's set rather than look ahead too.
+        self.searching = False
 
     # Here we are wrapping the given InputOutput object with our own version so
     # that when we pass the object to other functions, the player can still
@@ -29,23 +56,44 @@ class MonopolyGame(object):
             self.game = game
             self.inout = inout
 
+            # Commands that can be given whenever a command is asked for
+            self.extra_commands = util.CommandTable({
+                'quit': lambda: maybe_quit(self),
+                'print': lambda: self.game.print_board(self),
+                'where': lambda: self.game.print_player_locations(self),
+                'own holdings':
+                    lambda: self.game.current_player.print_holdings(self.inout),
+                'holdings': lambda: self.game.print_holdings(self.inout),
+            })
+            # Tables asked with -> them with extra_commands added on.  They're
+            # kept here rather than with the tables (see
+            # CommandTable.extended), since the tables can be shared between
+            # games and extra_commands would keep this game alive.  Lots of
+            # tables are made for just one question (see
+            # ask_cmd_until_done), so they're only kept while the table is.
+            self._with_extras = weakref.WeakKeyDictionary()
+
         def ask(self, *args, **kwargs):
             return self.inout.ask(*args, **kwargs)
 
         def tell(self, *args, **kwargs):
             return self.inout.tell(*args, **kwargs)
 
+        def flush(self):
+            return self.inout.flush()
+
         def ask_cmd(self, msg, commands, default=None):
-            extra_commands = {
-                'quit': lambda: maybe_quit(self),
-                'print': lambda: self.game.print_board(self),
-                'where': lambda: self.game.print_player_locations(self),
-                'own holdings':
-                    lambda: self.game.current_player.print_holdings(self.inout),
-                'holdings': lambda: self.game.print_holdings(self.inout),
-            }
-            commands.update(extra_commands)
-            return self.inout.ask_cmd(msg, commands, default=default)
+            # Tables made for just this question aren't worth keeping
+            if not isinstance(commands, util.CommandTable):
+                table = util.CommandTable(commands, default)
+                return self.inout.ask_cmd(msg,
+                    table.merged(self.extra_commands))
+
+            table = self._with_extras.get(commands)
+            if table is None:
+                table = self._with_extras[commands] = \
+                    commands.merged(self.extra_commands)
+            return self.inout.ask_cmd(msg, table)
 
     def print_board(self, inout):
         self.board.full_print(inout)
@@ -62,9 +110,64 @@ class MonopolyGame(object):
 
         inout.ask_cmd_until_done('Whose holdings do you want to see? ', cmds)
 
+    # Notes down the given attributes as about to change, if keeping track of
+    # changes
+    def record(self, *attrs):
+        if self.journal is not None:
+            for attr in attrs:
+                self.journal.record(self, attr)
+
+    # Marks where the game is now, so it can be put back the way it is with
+    # rollback.  From here on every change to the game is noted down, until
+    # every checkpoint has been released.  Putting it back only takes as long
+    # as the changes made since.
+    #
+    # The dice and cards are put back too, so the game goes on just as if
+    # nothing had been tried.  Set rng to something else after the checkpoint
+    # to try things out with other dice.
+    def checkpoint(self):
+        if self.journal is None:
+            self.journal = journal.Journal()
+            self.board.journal = self.journal
+        self.journal.checkpoints += 1
+        return (len(self.journal.entries), self.rng, self.rng.getstate())
+
+    # Undoes everything done since cp.  cp can be rolled back to again until
+    # it is released.
+    def rollback(self, cp):
+        mark, rng_, rng_state = cp
+        j = self.journal
+        # Putting things back mustn't be noted down as more changes
+        self.journal = self.board.journal = None
+        try:
+            j.undo_to(mark)
+        finally:
+            self.journal = self.board.journal = j
+        self.rng = rng_
+        self.rng.setstate(rng_state)
+
+    # Done with cp, keeping the changes since it.  Once no checkpoints are
+    # left, changes stop being noted down.
+    def release(self, cp):
+        self.journal.checkpoints -= 1
+        if not self.journal.checkpoints:
+            self.journal = self.board.journal = None
+
     def player_resign(self, plr):
+        self.record('players', 'next_player_index', 'winner')
+        i = self.players.index(plr)
         self.players.remove(plr)
 
+        # Keep the turn order pointing at the same next player
+        if i < self.next_player_index:
+            self.next_player_index -= 1
+
+        self.events.emit(events.Resigned, plr)
+
+        if len(self.players) == 1:
+            self.winner = self.players[0]
+            self.events.emit(events.Won, self.winner)
+
     def trade(self, trading_player, inout):
         if len(self.players) == 1:
             inout.tell("There ain't no-one around to trade WITH!!\n")
@@ -92,7 +195,7 @@ class MonopolyGame(object):
             max_player = None
             same_roll = 1
             for player_ in self.players:
-                roll = util.roll_two_dice()
+                roll = self.rng.roll_two_dice()
                 inout.tell("{} rolls {}\n".format(player_, roll))
                 if roll > max_roll:
                     max_roll = roll
@@ -156,7 +259,7 @@ class MonopolyGame(object):
 
         inout.tell("\n")
 
-        self.player_iter = iter(self.players)
+        self.next_player_index = 0
 
     def add_player(self, plr):
         assert plr.name not in [p.name for p in self.players]
@@ -172,15 +275,18 @@ class MonopolyGame(object):
         self.players.append(plr)
 
     def get_next_player(self):
-        try:
-            return self.player_iter.next()
-        except StopIteration:
-            self.player_iter = iter(self.players)
-            return self.player_iter.next()
+        self.record('next_player_index')
+        if self.next_player_index >= len(self.players):
+            self.next_player_index = 0
+        plr = self.players[self.next_player_index]
+        self.next_player_index += 1
+        return plr
 
     def roll_dice(self, inout):
-        roll = util.roll_two_dice()
-        inout.tell("roll is {}\n".format(roll))
+        roll = self.rng.roll_two_dice()
+        self.events.emit(events.Rolled, self.current_player, roll)
+        self.record('current_player')
+        self.current_player.record('num_doubles')
 
         # XXX: This num_doubles thing sucks....
 
@@ -190,10 +296,10 @@ class MonopolyGame(object):
             # If we are in jail, our roll goes to trying to get us out.  Only
             # doubles lets this happen
             if not roll.is_doubles():
-                inout.tell("Sorry, that doesn't get you out\n")
+                self.events.emit(events.StayedInJail, self.current_player)
                 self.current_player.jailbreak_failure(inout)
             else:
-                inout.tell("Double roll gets you out.\n")
+                self.events.emit(events.RolledOutOfJail, self.current_player)
                 self.current_player.jailbreak_success()
         else:
             # If we are not in jail and we roll doubles, this player gets to go
@@ -202,30 +308,44 @@ class MonopolyGame(object):
                 go_again = True
                 self.current_player.num_doubles += 1
             else:
-                self.current_player.num_double = 0
+                self.current_player.num_doubles = 0
 
         # If you roll doubles 3 times, its off to jail for you
         if self.current_player.num_doubles >= 3:
             self.current_player.num_doubles = 0
             go_again = False
-            inout.tell("That's 3 doubles.  You go to jail\n")
+            self.events.emit(events.RolledThreeDoubles, self.current_player)
             self.board.advance_player_to(
                 inout, self.current_player, self.board.jail_tile)
 
         # We check jail state again to catch the case where the player got out
-        # of or into jail on this turn.
-        if not self.current_player.in_jail:
+        # of or into jail on this turn.  Paying to get out of jail might also
+        # have bankrupted them.
+        if not self.current_player.in_jail and \
+                self.current_player in self.players:
             self.board.advance_player_by_roll(inout, self.current_player, roll)
 
-        # advance to the next person's turn
-        if not go_again:
-            self.current_player = self.get_next_player()
+        # Landing in jail ends your turn, doubles or not
+        if self.current_player.in_jail:
+            go_again = False
+
+        # advance to the next person's turn.  A player who went bankrupt
+        # doesn't get to go again.
+        if not go_again or self.current_player not in self.players:
+            self.end_turn()
         else:
-            inout.tell("{} rolled doubles.  Goes again\n"
-                .format(self.current_player.name))
+            self.events.emit(events.GoesAgain, self.current_player)
+
+    # Moves on to the next player's turn
+    def end_turn(self):
+        self.current_player.record('num_doubles')
+        self.current_player.num_doubles = 0
+        self.record('current_player')
+        self.current_player = self.get_next_player()
 
     def run_game(self, inout):
         inout = MonopolyGame.MonopolyGameInputOutput(self, inout)
+        self.events.subscribe(events.TextRenderer(inout))
 
         self.get_players(inout)
         self.initial_roll(inout)
@@ -233,16 +353,17 @@ class MonopolyGame(object):
 
     def run_game_with_players(self, players, inout):
         inout = MonopolyGame.MonopolyGameInputOutput(self, inout)
+        self.events.subscribe(events.TextRenderer(inout))
 
         for p in players:
             self.add_player(p)
 
-        self.player_iter = iter(self.players)
+        self.next_player_index = 0
 
         self.initial_roll(inout)
         self._run_game(inout)
 
-    # The main game loop
+    # The main game loop, which goes until there is only one player left
     def _run_game(self, inout):
-        while True:
+        while self.winner is None:
             self.current_player.have_turn(inout)
@@ -1,10 +1,13 @@
 #!/usr/bin/python
 
+import gc
 import sys
 import unittest
+import weakref
 
 import game
 import monop
+import monop_testing
 import player
 import util
 
@@ -44,6 +47,62 @@ class AIInputOutput(util.InputOutput):
     def tell(self, msg):
         sys.stdout.write(msg)
 
+class MonopolyGameTest(monop_testing.MonopolyTestCase):
+    def test_turn_order(self):
+        players = list(self.game.players)
+        for plr in players:
+            self.assertEqual(self.game.get_next_player(), plr)
+
+        # And around again
+        self.assertEqual(self.game.get_next_player(), players[0])
+
+    def test_turn_order_after_resign(self):
+        players = list(self.game.players)
+        self.game.get_next_player()
+        self.game.get_next_player()
+
+        # Players resigning before or after the next player doesn't change who
+        # goes next.
+        self.game.player_resign(players[0])
+        self.game.player_resign(players[3])
+        self.assertEqual(self.game.get_next_player(), players[2])
+        self.assertEqual(self.game.get_next_player(), players[4])
+        self.assertEqual(self.game.get_next_player(), players[1])
+
+    def test_dropped_game_collected(self):
+        # Asking through shared tables (like util.YES_NO) mustn't leave
+        # anything behind in them that keeps the game alive
+        monop_game = game.MonopolyGame(monop.load_board())
+        inout = monop_game.MonopolyGameInputOutput(monop_game,
+            monop_testing.TestInputOutput())
+        inout.inout.set_ask_callback(lambda msg: 'yes')
+        self.assertTrue(inout.ask_yn_question('Really? '))
+
+        ref = weakref.ref(monop_game)
+        del monop_game, inout
+        gc.collect()
+        self.assertIsNone(ref())
+        self.assertEqual(util.YES_NO._extended, {})
+
+    def test_throwaway_tables_not_kept(self):
+        monop_game = game.MonopolyGame(monop.load_board())
+        inout = monop_game.MonopolyGameInputOutput(monop_game,
+            monop_testing.TestInputOutput())
+        inout.inout.set_ask_callback(
+            lambda msg: 'done' if msg.startswith('Whose') else 'yes')
+        for _ in xrange(50):
+            monop_game.print_holdings(inout)
+            inout.ask_yn_question('Really? ', {'maybe': lambda: None})
+        self.assertTrue(len(inout._with_extras) <= 2)
+
+    def test_winner(self):
+        players = list(self.game.players)
+        for plr in players[1:]:
+            self.assertIsNone(self.game.winner)
+            plr.resign_to_bank()
+
+        self.assertEqual(self.game.winner, players[0])
+
 class MonopolyFullGameTest(unittest.TestCase):
     def setUp(self):
         self.game = game.MonopolyGame(monop.load_board())
@@ -0,0 +1,35 @@
+# Keeps track of the changes made to a game so they can be undone, for trying
+# moves out and taking them back (see MonopolyGame.checkpoint).
+#
+# Everything in the game that changes goes through a record call first, which
+# notes down the attribute's value before the change.  Undoing is setting them
+# all back, newest first.  Attributes that are properties (like a tile's owner)
+# are set back through the property, so whatever is worked out from them (like
+# a group's ownership counts) is put back too.
+import collections
+
+class Journal(object):
+    __slots__ = ('entries', 'checkpoints')
+
+    def __init__(self):
+        # (object, attribute name, value before the change)
+        self.entries = []
+        # How many checkpoints are still being held on to
+        self.checkpoints = 0
+
+    def record(self, obj, attr):
+        old = getattr(obj, attr)
+        # Lists and deques get changed in place, so keep a copy
+        if type(old) is list:
+            old = list(old)
+        elif type(old) is collections.deque:
+            old = collections.deque(old)
+        self.entries.append((obj, attr, old))
+
+    # Undoes everything since there were mark entries.  Whoever owns the
+    # journal has to stop recording while this goes on.
+    def undo_to(self, mark):
+        entries = self.entries
+        while len(entries) > mark:
+            obj, attr, old = entries.pop()
+            setattr(obj, attr, old)
@@ -0,0 +1,124 @@
+#!/usr/bin/python
+
+import sys
+import unittest
+
+import bots
+import monop
+import monop_testing
+import rng
+import simulate
+import util
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.board = monop.load_board()
+        self.inout = util.NullInputOutput()
+        self.strategies = [bots.BuyEverythingBot, bots.CautiousBot,
+            bots.BuyEverythingBot]
+
+    def start(self, seed):
+        return simulate.start_game(self.board, self.strategies, seed=seed)
+
+    def test_rollback(self):
+        monop_game, seats = self.start(3)
+        simulate.play_turns(monop_game, self.inout, 40)
+
+        before = monop_testing.game_state(monop_game, seats)
+        cp = monop_game.checkpoint()
+        simulate.play_turns(monop_game, self.inout, 200)
+        self.assertNotEqual(monop_testing.game_state(monop_game, seats), before)
+
+        monop_game.rollback(cp)
+        self.assertEqual(monop_testing.game_state(monop_game, seats), before)
+
+        # The same checkpoint can be gone back to again
+        simulate.play_turns(monop_game, self.inout, 30)
+        monop_game.rollback(cp)
+        self.assertEqual(monop_testing.game_state(monop_game, seats), before)
+        monop_game.release(cp)
+        self.assertIsNone(monop_game.journal)
+        self.assertIsNone(self.board.journal)
+
+    def test_rollback_to_the_end(self):
+        # Going back from a finished game brings the losers back in
+        monop_game, seats = self.start(1)
+        before = monop_testing.game_state(monop_game, seats)
+        cp = monop_game.checkpoint()
+        simulate.play_turns(monop_game, self.inout, 5000)
+        self.assertIsNotNone(monop_game.winner)
+
+        monop_game.rollback(cp)
+        monop_game.release(cp)
+        self.assertEqual(monop_testing.game_state(monop_game, seats), before)
+
+    def test_nested(self):
+        monop_game, seats = self.start(7)
+        outer = monop_game.checkpoint()
+        simulate.play_turns(monop_game, self.inout, 20)
+        middle = monop_testing.game_state(monop_game, seats)
+
+        inner = monop_game.checkpoint()
+        simulate.play_turns(monop_game, self.inout, 20)
+        monop_game.rollback(inner)
+        monop_game.release(inner)
+        self.assertEqual(monop_testing.game_state(monop_game, seats), middle)
+        self.assertIsNotNone(monop_game.journal)
+
+        monop_game.rollback(outer)
+        monop_game.release(outer)
+        self.assertIsNone(monop_game.journal)
+
+    def test_game_goes_on_the_same(self):
+        # Trying things out and taking them back doesn't change how the game
+        # would have gone otherwise
+        expected, expected_seats = self.start(11)
+        simulate.play_turns(expected, self.inout, 1000)
+        expected_state = monop_testing.game_state(expected, expected_seats)
+
+        monop_game, seats = self.start(11)
+        for _ in xrange(10):
+            simulate.play_turns(monop_game, self.inout, 10)
+            cp = monop_game.checkpoint()
+            monop_game.rng = rng.GameRandom(99)
+            simulate.play_turns(monop_game, self.inout, 50)
+            monop_game.rollback(cp)
+            monop_game.release(cp)
+        simulate.play_turns(monop_game, self.inout, 900)
+
+        self.assertEqual(monop_testing.game_state(monop_game, seats), expected_state)
+
+    def test_proportional_to_changes(self):
+        monop_game, seats = self.start(3)
+        simulate.play_turns(monop_game, self.inout, 40)
+        cp = monop_game.checkpoint()
+        simulate.play_turns(monop_game, self.inout, 1)
+        changes = len(monop_game.journal.entries) - cp[0]
+        self.assertTrue(0 < changes < 50)
+        monop_game.rollback(cp)
+        self.assertEqual(len(monop_game.journal.entries), cp[0])
+        monop_game.release(cp)
+
+    def test_mortgage_rollback(self):
+        monop_game, seats = self.start(3)
+        player = monop_game.players[0]
+        tile = monop_game.board.tiles[1]
+        tile.owner = player
+
+        before = monop_testing.game_state(monop_game, seats)
+        cp = monop_game.checkpoint()
+        tile.mortgage(self.inout, player)
+        self.assertNotEqual(player.mortgaged_value, 0)
+        monop_game.rollback(cp)
+        self.assertFalse(tile.mortgaged)
+        self.assertEqual(player.mortgaged_value, 0)
+        self.assertEqual(monop_testing.game_state(monop_game, seats), before)
+        monop_game.release(cp)
+
+    def test_no_journal_without_checkpoints(self):
+        monop_game, seats = self.start(3)
+        simulate.play_turns(monop_game, self.inout, 100)
+        self.assertIsNone(monop_game.journal)
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,245 @@
+#!/usr/bin/python
+
+import hashlib
+import os
+import sys
+
+import numpy as np
+
+import board
+import cards
+import monop
+
+# Works out exactly how likely a player is to end their turn on each tile, by
+# treating the game as a Markov chain and solving for its stationary
+# distribution.
+#
+# Every roll of the dice is one step of the chain.  A state is where the player
+# is, plus how many doubles they have rolled so far this turn (0 to 2), or which
+# of their three turns in jail they are on.  Turns end on exactly the states
+# with no doubles rolled, so those are the ones landing_probabilities() reports.
+#
+# The player is assumed to always try rolling their way out of jail.  Card
+# decks are drawn from at random, with every card equally likely.
+
+# Bump this whenever the model changes so old cached results aren't used
+MODEL_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.expanduser('~/.cache/monopy')
+
+MAX_DOUBLES = 3
+JAIL_TURNS = 3
+
+# Probability of rolling each total with two dice, split by doubles or not
+_NOT_DOUBLES = np.zeros(13)
+_DOUBLES = np.zeros(13)
+for _d1 in range(1, 7):
+    for _d2 in range(1, 7):
+        if _d1 == _d2:
+            _DOUBLES[_d1 + _d2] += 1 / 36.0
+        else:
+            _NOT_DOUBLES[_d1 + _d2] += 1 / 36.0
+
+def num_states(b):
+    return MAX_DOUBLES * len(b.tiles) + JAIL_TURNS
+
+def tile_state(b, index, doubles):
+    return doubles * len(b.tiles) + index
+
+def jail_state(b, turn):
+    return MAX_DOUBLES * len(b.tiles) + turn - 1
+
+def _nearest(b, index, tile_type):
+    tile = b.nearest_tile(tile_type, index)
+    if tile is None:
+        raise ValueError('No {} on the board'.format(tile_type.__name__))
+    return tile.index
+
+# Where a card sends a player drawing it on the given tile.  The jail is
+# len(b.tiles), and None means the card doesn't move the player.
+def _card_destination(b, card, index):
+    if isinstance(card, cards.MonopolyGoToJailCard):
+        return len(b.tiles)
+    elif isinstance(card, cards.MonopolyAdvanceCard):
+        return card.tile_index
+    elif isinstance(card, cards.MonopolyAdvanceToTileTypeCard):
+        return _nearest(b, index, card.tile_type)
+    elif isinstance(card, cards.MonopolyMoveBackCard):
+        return (index - card.num_spaces) % len(b.tiles)
+    return None
+
+# Fills in row index of the landing matrix: the chance of a player who lands on
+# that tile ending up on each tile (or in jail) once the tile is done with
+# them.
+def _resolve_landing(b, landing, index, resolving):
+    tile = b.tiles[index]
+    row = landing[index]
+    row[:] = 0
+
+    if isinstance(tile, board.MonopolyBoardGotoJailTile):
+        row[len(b.tiles)] = 1.0
+    elif isinstance(tile, board.MonopolyBoardCardTile) and tile.deck:
+        resolving.add(index)
+        p = 1.0 / len(tile.deck)
+        for card in tile.deck:
+            dest = _card_destination(b, card, index)
+            if dest is None:
+                row[index] += p
+            elif dest == len(b.tiles) or dest in resolving:
+                row[dest] += p
+            else:
+                # Cards can send you onto another card tile
+                _resolve_landing(b, landing, dest, resolving)
+                row += p * landing[dest]
+        resolving.remove(index)
+    else:
+        row[index] = 1.0
+
+def landing_matrix(b):
+    n = len(b.tiles)
+    landing = np.zeros((n, n + 1))
+    for index in range(n):
+        _resolve_landing(b, landing, index, set())
+    return landing
+
+def transition_matrix(b):
+    n = len(b.tiles)
+    landing = landing_matrix(b)
+    jail_index = b.jail_tile.index
+
+    # Where a roll from each tile ends up, for rolls that aren't and are doubles
+    identity = np.eye(n)
+    not_doubles = np.zeros((n, n + 1))
+    doubles = np.zeros((n, n + 1))
+    for s in range(2, 13):
+        move = np.roll(identity, s, axis=1).dot(landing)
+        not_doubles += _NOT_DOUBLES[s] * move
+        doubles += _DOUBLES[s] * move
+
+    p = np.zeros((num_states(b), num_states(b)))
+    tiles = np.arange(n)
+    jail1 = jail_state(b, 1)
+
+    for d in range(MAX_DOUBLES):
+        rows = tile_state(b, tiles, d)
+
+        # Not rolling doubles ends the turn
+        p[rows, tile_state(b, 0, 0):tile_state(b, n, 0)] += not_doubles[:, :n]
+        p[rows, jail1] += not_doubles[:, n]
+
+        if d + 1 < MAX_DOUBLES:
+            p[rows, tile_state(b, 0, d + 1):tile_state(b, n, d + 1)] += \
+                doubles[:, :n]
+            # Going to jail ends the turn even after doubles
+            p[rows, jail1] += doubles[:, n]
+        else:
+            # Third doubles in a row sends you straight to jail
+            p[rows, jail1] += _DOUBLES.sum()
+
+    for turn in range(1, JAIL_TURNS + 1):
+        row = jail_state(b, turn)
+
+        # Doubles gets you out and moving, but not another roll
+        p[row, tile_state(b, 0, 0):tile_state(b, n, 0)] += \
+            doubles[jail_index, :n]
+        p[row, jail1] += doubles[jail_index, n]
+
+        if turn < JAIL_TURNS:
+            p[row, jail_state(b, turn + 1)] += _NOT_DOUBLES.sum()
+        else:
+            # On the last turn you pay up and move by what you rolled
+            p[row, tile_state(b, 0, 0):tile_state(b, n, 0)] += \
+                not_doubles[jail_index, :n]
+            p[row, jail1] += not_doubles[jail_index, n]
+
+    return p
+
+def stationary_distribution(p):
+    # Solve pi = pi P with the probabilities summing to one, swapping one of
+    # the (redundant) balance equations for the sum.
+    a = p.T - np.eye(len(p))
+    a[-1, :] = 1.0
+    rhs = np.zeros(len(p))
+    rhs[-1] = 1.0
+    return np.linalg.solve(a, rhs)
+
+def _cache_path(b, cache_dir):
+    key = hashlib.sha1('{}:{}'.format(MODEL_VERSION, b.digest)).hexdigest()
+    return os.path.join(cache_dir, 'landing-{}.npy'.format(key))
+
+# The long-run probability of ending a turn on each tile, indexed like
+# b.tiles, with one extra entry on the end for being in jail.  Results for
+# boards loaded from files are cached in cache_dir (None to not cache).
+def landing_probabilities(b, cache_dir=DEFAULT_CACHE_DIR):
+    path = None
+    if cache_dir is not None and b.digest is not None:
+        path = _cache_path(b, cache_dir)
+        if os.path.exists(path):
+            return np.load(path)
+
+    n = len(b.tiles)
+    pi = stationary_distribution(transition_matrix(b))
+    probs = np.zeros(n + 1)
+    probs[:n] = pi[tile_state(b, 0, 0):tile_state(b, n, 0)]
+    probs[n] = pi[jail_state(b, 1):jail_state(b, JAIL_TURNS) + 1].sum()
+    # Clear out rounding noise on tiles nobody can end a turn on
+    probs = np.clip(probs, 0.0, None)
+    probs /= probs.sum()
+
+    if path is not None:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        # Write then rename, so a half written file is never picked up
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            np.save(f, probs)
+        os.rename(tmp_path, path)
+
+    return probs
+
+# How many times a player lands on each tile per turn, on average, counting
+# every landing rather than just the one their turn ends on.  A turn ends on
+# each step of the chain into a state with no doubles rolled or into jail.
+def landings_per_turn(b):
+    n = len(b.tiles)
+    pi = stationary_distribution(transition_matrix(b))
+
+    landings = np.zeros(n)
+    for d in range(MAX_DOUBLES):
+        landings += pi[tile_state(b, 0, d):tile_state(b, n, d)]
+    turns = pi[tile_state(b, 0, 0):tile_state(b, n, 0)].sum() + \
+        pi[jail_state(b, 1):jail_state(b, JAIL_TURNS) + 1].sum()
+
+    return np.clip(landings, 0.0, None) / turns
+
+# What a roll comes to on average, which is what utility rent is worked out
+# from here
+AVERAGE_ROLL = 7
+
+# The rent one opponent can be expected to pay for each tile per turn they
+# have, at each of its rent levels.  Indexed by tile and then level, with the
+# levels of the tiles' rent tables (see MonopolyBoardPropertyTile.rent_level).
+def expected_rent(b, landings=None):
+    if landings is None:
+        landings = landings_per_turn(b)
+
+    props = [t for t in b.tiles
+        if isinstance(t, board.MonopolyBoardPropertyTile)]
+    levels = max([len(t.rent_table) for t in props] + [1])
+    rents = np.zeros((len(b.tiles), levels))
+    for tile in props:
+        table = np.array(tile.rent_table, dtype=float)
+        if isinstance(tile, board.MonopolyBoardUtilityTile):
+            table *= AVERAGE_ROLL
+        rents[tile.index, :len(table)] = table
+
+    return landings[:, None] * rents
+
+def main():
+    b = monop.load_board()
+    probs = landing_probabilities(b)
+    for tile, prob in zip(b.tiles + [b.jail_tile], probs):
+        print '{:<25} {:6.3%}'.format(tile, prob)
+
+if __name__ == "__main__":
+    sys.exit(main())
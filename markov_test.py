@@ -0,0 +1,88 @@
+#!/usr/bin/python
+
+import copy
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import board
+import markov
+import monop
+
+class MarkovTest(unittest.TestCase):
+    def setUp(self):
+        self.board = monop.load_board()
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_transition_matrix_rows(self):
+        p = markov.transition_matrix(self.board)
+        self.assertEqual(p.shape, (markov.num_states(self.board),) * 2)
+        for row_sum in p.sum(axis=1):
+            self.assertAlmostEqual(row_sum, 1.0)
+
+    def test_landing_probabilities(self):
+        probs = markov.landing_probabilities(self.board, cache_dir=None)
+
+        self.assertEqual(len(probs), len(self.board.tiles) + 1)
+        self.assertAlmostEqual(probs.sum(), 1.0)
+
+        # Nobody ends a turn on go to jail, and jail is the most likely place
+        # to be.
+        for tile, prob in zip(self.board.tiles, probs):
+            if isinstance(tile, board.MonopolyBoardGotoJailTile):
+                self.assertEqual(prob, 0.0)
+        self.assertEqual(probs.argmax(), len(self.board.tiles))
+
+    def test_card_landing(self):
+        landing = markov.landing_matrix(self.board)
+
+        # Chance cards move you to Boardwalk, jail and the nearest railroads
+        chance = self.board.tiles.index(
+            [t for t in self.board.tiles
+                if isinstance(t, board.MonopolyBoardChanceTile)][0])
+        self.assertTrue(landing[chance, 39] > 0)
+        self.assertTrue(landing[chance, len(self.board.tiles)] > 0)
+        self.assertTrue(landing[chance, chance] < 1.0)
+        self.assertAlmostEqual(landing[chance].sum(), 1.0)
+
+    def test_landings_per_turn(self):
+        landings = markov.landings_per_turn(self.board)
+        probs = markov.landing_probabilities(self.board, cache_dir=None)
+
+        # Doubles mean more than one landing a turn
+        self.assertTrue(landings.sum() > 1.0)
+        for tile in self.board.tiles:
+            self.assertTrue(landings[tile.index] >= probs[tile.index] - 1e-12)
+
+    def test_expected_rent(self):
+        landings = markov.landings_per_turn(self.board)
+        rents = markov.expected_rent(self.board, landings)
+
+        boardwalk = self.board.tiles[39]
+        self.assertAlmostEqual(rents[39, 6],
+            landings[39] * boardwalk.rent_table[6])
+        # A hotel earns more than a bare property
+        self.assertTrue(rents[39, 6] > rents[39, 0])
+        # Tiles that aren't property don't earn anything
+        self.assertEqual(list(rents[0]), [0.0] * rents.shape[1])
+
+    def test_cache(self):
+        probs = markov.landing_probabilities(self.board, self.cache_dir)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        cached = markov.landing_probabilities(self.board, self.cache_dir)
+        self.assertEqual(list(probs), list(cached))
+
+    def test_no_cache_without_digest(self):
+        definition = copy.copy(self.board.definition)
+        definition.digest = None
+        markov.landing_probabilities(definition.new_board(), self.cache_dir)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
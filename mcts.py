@@ -0,0 +1,300 @@
+#!/usr/bin/python
+
+import argparse
+import functools
+import math
+import multiprocessing
+import pickle
+import sys
+import time
+
+import bots
+import decisions
+import events
+import monop
+import rng
+import simulate
+import util
+
+# Rollouts are done in rounds this big.  Which choice each rollout in a round
+# tries is picked before any of them are played, so a round can be handed out
+# to worker processes all at once.
+ROUND_SIZE = 16
+
+_null_inout = util.NullInputOutput()
+
+# How good things turned out for plr at the end of a rollout: 1 for winning,
+# 0 for going out, otherwise their share of what everyone still playing is
+# worth
+def score(game, plr):
+    if game.winner is not None:
+        return 1.0 if game.winner is plr else 0.0
+    if plr not in game.players:
+        return 0.0
+
+    worths = [max(p.total_worth, 0) for p in game.players]
+    if not sum(worths):
+        return 1.0 / len(worths)
+    return float(max(plr.total_worth, 0)) / sum(worths)
+
+# Picks which choice each of the next size rollouts tries, by UCB1.  Choices
+# that haven't been tried yet go first.  A choice picked earlier in the round
+# counts as tried without having scored anything, so the round gets spread
+# out over the choices that are close.
+def pick_round(visits, totals, size, exploration):
+    visits = list(visits)
+    picks = []
+    for _ in xrange(size):
+        if 0 in visits:
+            i = visits.index(0)
+        else:
+            log_n = math.log(sum(visits))
+            i = max(xrange(len(visits)), key=lambda i: totals[i] / visits[i] +
+                exploration * math.sqrt(log_n / visits[i]))
+        visits[i] += 1
+        picks.append(i)
+    return picks
+
+# Tries action out once from where game is now, with dice from seed, and puts
+# the game back to cp afterwards.  The player at seat makes the choice and
+# everyone plays by the plain bot rules from there on.
+def rollout(game, cp, seat, decision, action, seed, max_turns):
+    plr = game.players[seat]
+    game.rng = rng.GameRandom(seed)
+    try:
+        plr.take(_null_inout, decision, action)
+        plr.finish_turn(_null_inout, decision)
+        simulate.play_turns(game, _null_inout, max_turns)
+        return score(game, plr)
+    finally:
+        game.rollback(cp)
+
+# Each worker process keeps the game it was last sent, since every round of a
+# decision is played from the same place
+_worker_game = None
+
+def _rollout_worker(args):
+    global _worker_game
+    key, state, seat, decision, action, seed, max_turns = args
+
+    if _worker_game is None or _worker_game[0] != key:
+        if _worker_game is not None:
+            _worker_game[1].release(_worker_game[2])
+        game = pickle.loads(state)
+        _worker_game = (key, game, game.checkpoint())
+
+    _, game, cp = _worker_game
+    return rollout(game, cp, seat, decision, action, seed, max_turns)
+
+# A bot that decides what to do by trying each choice out (see DeadlineBot for
+# the choices it has).  For every choice it plays the rest of the game out
+# many times, with random dice and everyone playing by the plain bot rules,
+# and goes with the one that got tried the most.  UCB1 picks which choice each
+# rollout tries, so the promising ones get more of them.
+#
+# Rollouts are played on the game itself and rolled back afterwards (see
+# MonopolyGame.checkpoint).  Given a multiprocessing pool they are handed out
+# to its workers instead, each playing on a pickled copy of the game.
+#
+# rollouts is how many rollouts to do for each decision and time_budget how
+# many seconds to spend on one, whichever runs out first; either can be None.
+# The search gives its best answer so far after every round and stops when
+# another rollout (or with a pool, another round) wouldn't fit in the time
+# left.
+#
+# Every rollout is seeded from seed and its number, so with only a rollout
+# budget the bot always plays the same way given the same seed, with or
+# without a pool.  The seed comes from the game's if it isn't given.
+class MCTSBot(decisions.DeadlineBot):
+    __slots__ = ('seed', 'rollouts', 'max_turns', 'exploration', 'pool',
+        'decisions', 'rollouts_done', 'search_time')
+
+    pays_jail = True
+
+    def __init__(self, name, game, rollouts=200, time_budget=None,
+            max_turns=100, exploration=math.sqrt(2), pool=None, seed=None,
+            budgets=None, latency=None):
+        super(MCTSBot, self).__init__(name, game, budget=time_budget,
+            budgets=budgets, latency=latency)
+
+        if rollouts is None and time_budget is None:
+            raise ValueError('MCTSBot needs a rollout or time budget')
+
+        if seed is None:
+            seed = rng.child_seed(game.rng.seed, 'mcts/' + name)
+        self.seed = seed
+        self.rollouts = rollouts
+        # How many turns a rollout is played for at most
+        self.max_turns = max_turns
+        self.exploration = exploration
+        self.pool = pool
+
+        # How many searches have been done, and how many rollouts they did
+        # in how long
+        self.decisions = 0
+        self.rollouts_done = 0
+        self.search_time = 0.0
+
+    @property
+    def rollouts_per_sec(self):
+        if not self.search_time:
+            return 0.0
+        return self.rollouts_done / self.search_time
+
+    # Plays the rest of the turn that decision came up in, the way have_turn
+    # would have.  Buying and mortgaging happen partway through a roll, which
+    # can't be picked up again from the middle, so those just end the turn.
+    def finish_turn(self, inout, decision):
+        kind = decision[0]
+        if self.game.winner is not None:
+            return
+        if kind == 'jail':
+            self.unmortgage_holdings(inout)
+        if kind in ('jail', 'unmortgage'):
+            self.build(inout)
+        if kind in ('jail', 'unmortgage', 'build'):
+            self.game.roll_dice(inout)
+        else:
+            self.game.end_turn()
+
+    # ======= Searching =======
+
+    def refine(self, decision, actions, deadline):
+        start = time.time()
+        game = self.game
+        seat = game.players.index(self)
+
+        # Nobody should see what happens in the rollouts, and the game's own
+        # dice are put back by the rollback
+        saved_events = game.events
+        game.events = events.EventBus()
+        game.searching = True
+        pool = self.pool
+        self.pool = None
+        cp = game.checkpoint()
+        done = 0
+        try:
+            state = None
+            if pool is not None:
+                # The workers' copies get their dice from the rollouts, so
+                # there's no need to send the game's own
+                real_rng = game.rng
+                game.rng = rng.GameRandom(0)
+                try:
+                    state = pickle.dumps(game, 2)
+                finally:
+                    game.rng = real_rng
+            key = (self.seed, self.decisions)
+
+            visits = [0] * len(actions)
+            totals = [0.0] * len(actions)
+            # The longest a round took, and a rollout on its own
+            round_time = rollout_time = 0.0
+            out_of_time = False
+            while not out_of_time and \
+                    (self.rollouts is None or done < self.rollouts):
+                remaining = deadline.remaining()
+                if remaining is not None and remaining < round_time and \
+                        pool is not None:
+                    return
+
+                round_start = time.time()
+                size = ROUND_SIZE
+                if self.rollouts is not None:
+                    size = min(size, self.rollouts - done)
+                picks = pick_round(visits, totals, size, self.exploration)
+                tasks = [(actions[i], rng.child_seed(self.seed,
+                    '{}/{}'.format(self.decisions, done + j)))
+                    for j, i in enumerate(picks)]
+
+                if pool is None:
+                    # Played here, the round can be cut short when the next
+                    # rollout might not fit in the time left
+                    scores = []
+                    for action, seed in tasks:
+                        remaining = deadline.remaining()
+                        if remaining is not None and remaining < rollout_time:
+                            out_of_time = True
+                            break
+                        rollout_start = time.time()
+                        scores.append(rollout(game, cp, seat, decision,
+                            action, seed, self.max_turns))
+                        rollout_time = max(rollout_time,
+                            time.time() - rollout_start)
+                else:
+                    scores = pool.map(_rollout_worker, [(key, state, seat,
+                        decision, action, seed, self.max_turns)
+                        for action, seed in tasks])
+
+                for i, s in zip(picks, scores):
+                    visits[i] += 1
+                    totals[i] += s
+                done += len(scores)
+                round_time = max(round_time, time.time() - round_start)
+
+                # The choice tried the most is the one UCB1 trusts the most
+                if scores:
+                    yield actions[max(xrange(len(actions)),
+                        key=lambda i: (visits[i], totals[i]))]
+        finally:
+            game.rollback(cp)
+            game.release(cp)
+            self.pool = pool
+            game.searching = False
+            game.events = saved_events
+
+            self.decisions += 1
+            self.rollouts_done += done
+            self.search_time += time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Play the MCTS bot against another bot')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--against', default='buyer',
+        choices=sorted(bots.STRATEGIES))
+    parser.add_argument('--rollouts', type=int, default=200,
+        help='rollouts per decision')
+    parser.add_argument('--time-budget', type=float, default=None,
+        help='seconds per decision')
+    parser.add_argument('--max-turns', type=int, default=100,
+        help='turns per rollout')
+    parser.add_argument('--workers', type=int, default=0,
+        help='worker processes for rollouts (0 for none)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    pool = None
+    if args.workers:
+        pool = multiprocessing.Pool(args.workers)
+
+    b = monop.load_board()
+    latency = decisions.LatencyRecorder()
+    strategy = functools.partial(MCTSBot, rollouts=args.rollouts,
+        time_budget=args.time_budget, max_turns=args.max_turns, pool=pool,
+        latency=latency)
+    wins = num_decisions = rollouts = 0
+    search_time = 0.0
+    for game_num in xrange(args.games):
+        strategies = [strategy, bots.STRATEGIES[args.against]]
+        if game_num % 2:
+            strategies.reverse()
+        monop_game, seats = simulate.start_game(b, strategies,
+            seed=rng.child_seed(args.seed, game_num))
+        simulate.play_turns(monop_game, _null_inout, 1000)
+
+        plr = [p for p in seats if isinstance(p, MCTSBot)][0]
+        wins += monop_game.winner is plr
+        num_decisions += plr.decisions
+        rollouts += plr.rollouts_done
+        search_time += plr.search_time
+
+    print 'won {} of {} games against {}'.format(wins, args.games,
+        args.against)
+    print '{} decisions, {:.1f} ms each, {:.0f} rollouts/sec'.format(
+        num_decisions, 1000 * search_time / max(num_decisions, 1),
+        rollouts / search_time if search_time else 0.0)
+    sys.stdout.write(latency.report())
+
+if __name__ == "__main__":
+    sys.exit(main())
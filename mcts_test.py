@@ -0,0 +1,98 @@
+#!/usr/bin/python
+
+import functools
+import multiprocessing
+import sys
+import unittest
+
+import bots
+import mcts
+import monop
+import monop_testing
+import simulate
+import util
+
+class PickRoundTest(unittest.TestCase):
+    def test_untried_first(self):
+        self.assertEqual(mcts.pick_round([0, 0, 0], [0.0] * 3, 4, 1.4),
+            [0, 1, 2, 0])
+
+    def test_prefers_better(self):
+        picks = mcts.pick_round([10, 10], [9.0, 1.0], 8, 0.5)
+        self.assertTrue(picks.count(0) > picks.count(1))
+
+class MCTSBotTest(unittest.TestCase):
+    def setUp(self):
+        self.board = monop.load_board()
+        self.inout = util.NullInputOutput()
+
+    def play(self, seed, turns=30, rollouts=8, **kwargs):
+        strategy = functools.partial(mcts.MCTSBot, rollouts=rollouts,
+            max_turns=20, **kwargs)
+        monop_game, seats = simulate.start_game(self.board,
+            [strategy, bots.BuyEverythingBot], seed=seed)
+        simulate.play_turns(monop_game, self.inout, turns)
+        return monop_game, seats
+
+    def test_deterministic(self):
+        first = self.play(3)
+        first_state = monop_testing.game_state(*first)
+        second = self.play(3)
+        self.assertEqual(monop_testing.game_state(*second), first_state)
+        self.assertTrue(first[1][0].decisions > 0)
+        self.assertEqual(first[1][0].decisions, second[1][0].decisions)
+
+    def test_pool_plays_the_same(self):
+        pool = multiprocessing.Pool(2)
+        try:
+            pooled = self.play(3, turns=15, pool=pool)
+        finally:
+            pool.terminate()
+        self.assertEqual(monop_testing.game_state(*pooled),
+            monop_testing.game_state(*self.play(3, turns=15)))
+
+    def test_search_leaves_game_alone(self):
+        monop_game, seats = self.play(5, turns=10)
+        plr = seats[0]
+        seen = []
+        monop_game.events.subscribe(seen.append)
+        before = monop_testing.game_state(monop_game, seats)
+
+        tile = [t for t in self.board.tiles if hasattr(t, 'owner') and
+            t.owner is None][0]
+        plr.choose(('buy', tile.index), [True, False])
+
+        self.assertEqual(monop_testing.game_state(monop_game, seats), before)
+        self.assertEqual(seen, [])
+        self.assertIsNone(monop_game.journal)
+        self.assertFalse(monop_game.searching)
+
+    def test_rollouts_per_sec(self):
+        monop_game, seats = self.play(3)
+        plr = seats[0]
+        self.assertEqual(plr.rollouts_done, plr.decisions * 8)
+        self.assertTrue(plr.rollouts_per_sec > 0)
+
+    def test_time_budget(self):
+        monop_game, seats = self.play(3, turns=10, rollouts=None,
+            time_budget=0.02)
+        plr = seats[0]
+        self.assertTrue(plr.rollouts_done > 0)
+        for (_, kind), hist in plr.latency.histograms.iteritems():
+            if kind != 'turn':
+                self.assertTrue(hist.percentile(50) < 0.1)
+
+    def test_score(self):
+        monop_game, seats = self.play(3, turns=0)
+        self.assertAlmostEqual(mcts.score(monop_game, seats[0]), 0.5)
+        seats[1].resign_to_bank()
+        self.assertEqual(mcts.score(monop_game, seats[0]), 1.0)
+        self.assertEqual(mcts.score(monop_game, seats[1]), 0.0)
+
+    def test_needs_a_budget(self):
+        monop_game, _ = self.play(3, turns=0)
+        self.assertRaises(ValueError, mcts.MCTSBot, 'x', monop_game,
+            rollouts=None)
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
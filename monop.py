@@ -1,20 +1,29 @@
+import os
 import sys
 
 import game
 import board
 import util
 
-def load_board():
-    b = board.MonopolyBoard()
-    b.load_board('./brd.json')
-    b.load_com_chest_cards('./com_chest_cards.json')
-    b.load_chance_cards('./chance_cards.json')
+# Where the board and card files are, so they're found whatever directory
+# things are run from
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
 
-    return b
+# A new board for a game.  The board and card files are only read the first
+# time.
+def load_board():
+    definition = board.load_definition(os.path.join(DATA_DIR, 'brd.json'),
+        os.path.join(DATA_DIR, 'com_chest_cards.json'),
+        os.path.join(DATA_DIR, 'chance_cards.json'))
+    return definition.new_board()
 
 def main():
     monop = game.MonopolyGame(load_board())
-    monop.run_game(util.CliInputOutput())
+    inout = util.BufferedInputOutput(util.CliInputOutput())
+    try:
+        monop.run_game(inout)
+    finally:
+        inout.flush()
 
 if __name__ == "__main__":
     sys.exit(main())
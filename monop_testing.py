@@ -5,6 +5,7 @@ import util
 from game import MonopolyGame
 
 import board
+import events
 import player
 
 class TestInputOutput(util.InputOutput):
@@ -23,9 +24,10 @@ class TestInputOutput(util.InputOutput):
 
 def create_test_monopoly_board():
     b = board.MonopolyBoard()
-    b.tiles = [board.MonopolyBoardGoTile(b, 'Go')]
+    b.add_tile(board.MonopolyBoardGoTile(b, 'Go'))
     b.go_tile = b.tiles[0]
     b.jail_tile = board.MonopolyBoardJailTile(b, 'Jail')
+    b.jail_tile.index = 0
 
     return b
 
@@ -46,7 +48,24 @@ class MonopolyTestCase(unittest.TestCase):
         self.inout = TestInputOutput()
         self.board = create_test_monopoly_board()
         self.game = MonopolyGame(self.board)
+        self.game.events.subscribe(events.TextRenderer(self.inout))
         for i in range(5):
             self.game.add_player(
                 MonopolyTestPlayer('tester%d' % i, self.game))
         self.player = self.game.players[0]
+
+# Everything about a game that can change while it's played
+def game_state(monop_game, seats):
+    b = monop_game.board
+    players = [(p.money, p.position, list(p.jail_cards), p.turns_in_jail,
+        p.num_doubles, [t.index for t in p.holdings]) for p in seats]
+    tiles = [(seats.index(t.owner) if t.owner else None, t.houses,
+        t.mortgaged, t.rent_level) for t in b.tiles if hasattr(t, 'owner')]
+    groups = [sorted((seats.index(o) if o else None, n)
+        for o, n in g.owned.iteritems()) for _, g in sorted(b.groups.items())]
+    decks = [list(deck) for deck in b.decks]
+    return (players, tiles, groups, decks, b.last_roll,
+        [seats.index(p) for p in monop_game.players],
+        seats.index(monop_game.current_player),
+        monop_game.next_player_index,
+        seats.index(monop_game.winner) if monop_game.winner else None)
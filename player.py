@@ -1,16 +1,39 @@
 import board
+import events
 import game
+import util
 
 class MonopolyPlayer(object):
+    __slots__ = ('name', 'money', 'num', 'position', 'last_roll', 'jail_cards',
+        'holdings', 'game', 'turns_in_jail', 'num_doubles', 'holdings_worth',
+        'num_houses', 'num_hotels', 'mortgaged_value', 'monopolies')
+
+    # Totals over the player's holdings, kept up to date as they change (see
+    # count_holding) rather than added up whenever they're wanted
+    TOTALS = ('holdings_worth', 'num_houses', 'num_hotels', 'mortgaged_value')
+
     def __init__(self, name, _game):
         self.name = name
-        self.money = 1500
+        self.money = _game.rules.starting_cash
         self.num = 0
-        self.current_tile = None
+        # Index of the tile the player is on.  In jail this is the jail tile's
+        # index, the same as someone just visiting.
+        self.position = 0
         self.last_roll = None
-        self.jail_cards = 0
+        # The get out of jail free cards held, in the order they get used
+        self.jail_cards = []
         self.holdings = []
 
+        # See TOTALS
+        self.holdings_worth = 0
+        self.num_houses = 0
+        self.num_hotels = 0
+        self.mortgaged_value = 0
+
+        # The names of the groups the player owns all of, kept up to date by
+        # the groups (see MonopolyGroup.update_monopoly)
+        self.monopolies = set()
+
         self.game = _game
 
         self.turns_in_jail = 0
@@ -31,77 +54,113 @@ class MonopolyPlayer(object):
                 "3rd (and final)"
             ))
 
+    @property
+    def current_tile(self):
+        if self.in_jail:
+            return self.game.board.jail_tile
+        return self.game.board.tiles[self.position]
+
+    @current_tile.setter
+    def current_tile(self, tile):
+        self.record('position')
+        self.position = tile.index
+
+    # Notes down the given attributes as about to change, if the game is
+    # keeping track of changes (see MonopolyGame.checkpoint)
+    def record(self, *attrs):
+        journal = self.game.journal
+        if journal is not None:
+            for attr in attrs:
+                journal.record(self, attr)
+
     def add_to_holdings(self, prop):
+        self.record('holdings', *self.TOTALS)
         self.holdings.append(prop)
+        self.count_holding(prop, 1)
+
+    # Gives up all the player's holdings
+    def clear_holdings(self):
+        self.record('holdings', *self.TOTALS)
+        self.holdings = []
+        for attr in self.TOTALS:
+            setattr(self, attr, 0)
+
+    # Adds what holding is worth and has on it to the player's totals, or takes
+    # it off again with sign -1.  Holdings call this around every change to
+    # their houses or mortgage.
+    def count_holding(self, holding, sign):
+        self.holdings_worth += sign * holding.total_worth
+        if holding.houses == 5:
+            self.num_hotels += sign
+        else:
+            self.num_houses += sign * holding.houses
+        if holding.mortgaged:
+            self.mortgaged_value += sign * holding.mortgage_value
 
     def jail(self):
         if self.in_jail:
             raise game.MonopolyUsageError("Player is already in jail")
 
+        self.record('turns_in_jail')
         self.turns_in_jail = 1
+        self.game.events.emit(events.Jailed, self)
 
     def jailbreak_failure(self, inout):
         if not self.in_jail:
             raise game.MonopolyUsageError("Player isn't in jail")
 
+        self.record('turns_in_jail')
         self.turns_in_jail += 1
 
         if self.turns_in_jail > 3:
-            inout.tell("It's your third turn and you didn't roll doubles.  "
-                "You have to pay $50\n")
-            # We are now out of tries to get out of jail, so we have to pay $50
-            self.pay(inout, 50)
+            fine = self.game.rules.jail_fine
+            self.game.events.emit(events.PaidJailFine, self, fine)
+            # We are now out of tries to get out of jail, so we have to pay
+            self.pay(inout, fine)
             self.turns_in_jail = 0
 
     def jailbreak_success(self):
         if not self.in_jail:
             raise game.MonopolyUsageError("Player isn't in jail")
 
+        self.record('turns_in_jail')
         self.turns_in_jail = 0
 
     @property
     def in_jail(self):
         return self.turns_in_jail > 0
 
-    @property
-    def monopolies(self):
-        monopolies = set()
-        for holding in self.holdings:
-            if holding.part_of_monopoly:
-                monopolies.add(holding.monopoly)
-
-        return monopolies
-
     @property
     def total_worth(self):
-        n = self.money
-        for h in self.holdings:
-            n += h.total_worth
-
-        return n
+        return self.money + self.holdings_worth
 
     def print_holdings(self, inout):
         inout.tell("{}'s holdings (Total worth: {})\n"
             .format(self, self.total_worth))
         inout.tell('${}'.format(self.money))
         if self.jail_cards:
-            inout.tell(', {} get-out-of-jail-free card{}'
-                .format(self.jail_cards, 's' if self.jail_cards > 1 else ''))
+            inout.tell(', {} get-out-of-jail-free card{}'.format(
+                len(self.jail_cards), 's' if len(self.jail_cards) > 1 else ''))
         inout.tell('\n')
         board.print_tiles(self.holdings, inout)
 
-    def place_on_tile(self, inout, tile):
+    def place_on_tile(self, inout, tile, rent=None):
         self.current_tile = tile
-        inout.tell("That puts you on {}\n".format(self.current_tile))
-        self.current_tile.activate(inout, self, self.game)
+        self.game.events.emit(events.Moved, self, self.current_tile)
+        if rent is None:
+            self.current_tile.activate(inout, self, self.game)
+        else:
+            self.current_tile.activate(inout, self, self.game, rent)
 
     def pay(self, inout, amount):
+        self.record('money')
         self.money -= amount
         if self.money < 0:
             self.out_of_money(inout)
         assert self.money >= 0
 
     def award(self, amount):
+        self.record('money')
         self.money += amount
 
     def use_jail_card(self):
@@ -110,15 +169,15 @@ class MonopolyPlayer(object):
         if not self.in_jail:
             raise game.MonopolyUsageError("Player isn't in jail")
 
-        self.jail_cards -= 1
+        self.record('jail_cards')
+        self.return_jail_card(self.jail_cards.pop(0))
         self.jailbreak_success()
 
     def pay_for_jail(self, inout):
         if not self.in_jail:
             raise game.MonopolyUsageError("Player isn't in jail")
 
-        # Price for jail is $50
-        self.pay(inout, 50)
+        self.pay(inout, self.game.rules.jail_fine)
         self.jailbreak_success()
 
     def resign_to(self, other_player):
@@ -129,19 +188,48 @@ class MonopolyPlayer(object):
         assert self.money >= 0
 
         other_player.award(self.money)
+        self.record('money', 'jail_cards')
         self.money = 0
         for holding in self.holdings:
             holding.owner = other_player
             other_player.add_to_holdings(holding)
-        self.holdings = []
+        self.clear_holdings()
 
-        other_player.jail_cards += self.jail_cards
-        self.jail_cards = 0
+        for card in self.jail_cards:
+            other_player.give_jail_card(card)
+        self.jail_cards = []
 
         self.game.player_resign(self)
 
-    def give_jail_card(self):
-        self.jail_cards += 1
+    # Going bankrupt to the bank rather than to another player.  The bank takes
+    # back everything so it can be sold again.
+    def resign_to_bank(self):
+        for holding in self.holdings:
+            holding.owner = None
+            holding.houses = 0
+            holding.mortgaged = False
+        self.record('money', 'jail_cards')
+        self.clear_holdings()
+
+        self.money = 0
+        for card in self.jail_cards:
+            self.return_jail_card(card)
+        self.jail_cards = []
+
+        self.game.player_resign(self)
+
+    # card is None for one that didn't come out of a deck
+    def give_jail_card(self, card=None):
+        self.record('jail_cards')
+        self.jail_cards.append(card)
+        self.jail_cards.sort(key=self.game.board.deck_number)
+
+    # Puts a jail card that's been used back on the bottom of its deck
+    def return_jail_card(self, card):
+        b = self.game.board
+        n = b.deck_number(card)
+        if n < len(b.decks):
+            b.decks[n].put_back(card)
 
     # ======= These are suppose to be implemented by subclass =======
 
@@ -155,6 +243,14 @@ class MonopolyPlayer(object):
         pass
 
 class HumanMonopolyPlayer(MonopolyPlayer):
+    # The commands a turn is played with, made the first time they're asked
+    # for (see commands)
+    __slots__ = ('_commands',)
+
+    def __init__(self, name, _game):
+        super(HumanMonopolyPlayer, self).__init__(name, _game)
+        self._commands = None
+
     # XXX: These two functions are very similar, it would be nice if they could
     # code share somehow.
     def run_mortgage(self, inout):
@@ -255,7 +351,7 @@ class HumanMonopolyPlayer(MonopolyPlayer):
         while self.money <= 0:
             inout.tell('That leaves you ${} in debt\n'.format(-self.money))
             inout.ask_cmd('How are you going to fix it up? ',
-                commands=self.default_commands(inout))
+                commands=self.commands(inout)[0])
 
     def offer_property(self, inout, prop):
         if inout.ask_yn_question("Do you want to buy? "):
@@ -278,9 +374,19 @@ class HumanMonopolyPlayer(MonopolyPlayer):
             'resign': lambda: self.resign(inout)
         }
 
+    # util.CommandTables of the default commands, and of those and rolling for
+    # having a turn.  They're only made again if inout changes, which it
+    # doesn't during a game.
+    def commands(self, inout):
+        if self._commands is None or self._commands[0] is not inout:
+            commands = self.default_commands(inout)
+            default_table = util.CommandTable(commands)
+            commands['roll'] = lambda: self.game.roll_dice(inout)
+            turn_table = util.CommandTable(commands, default='roll')
+            self._commands = (inout, default_table, turn_table)
+        return self._commands[1:]
+
     def have_turn(self, inout):
         self.print_location(inout)
-        commands = self.default_commands(inout)
-        commands['roll'] = lambda: self.game.roll_dice(inout)
-        inout.ask_cmd("-- Command: ", commands=commands, default='roll')
+        inout.ask_cmd("-- Command: ", commands=self.commands(inout)[1])
 
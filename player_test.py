@@ -4,9 +4,14 @@ import sys
 import unittest
 import textwrap
 
+import bots
 import game
 import board
+import monop
 import monop_testing
+import player
+import simulate
+import util
 
 class MonopolyPlayerTest(monop_testing.MonopolyTestCase):
     def test_initial_money(self):
@@ -128,6 +133,17 @@ class MonopolyPlayerTest(monop_testing.MonopolyTestCase):
         self.assertTrue(self.player.ran_out_of_money)
         self.assertEqual(self.player.couldnt_pay, 1)
 
+    def test_human_commands_made_once(self):
+        human = player.HumanMonopolyPlayer('human', self.game)
+        default_table, turn_table = human.commands(self.inout)
+
+        self.assertEqual(human.commands(self.inout),
+            (default_table, turn_table))
+        self.assertIn('roll', turn_table)
+        self.assertNotIn('roll', default_table)
+        self.assertIsNot(human.commands(monop_testing.TestInputOutput())[1],
+            turn_table)
+
     def test_total_worth(self):
         test_holding = board.MonopolyBoardPropertyTile(
             self.board, "Test Tile", 100, "Red", [])
@@ -151,9 +167,45 @@ class MonopolyPlayerTest(monop_testing.MonopolyTestCase):
 
         self.assertEqual(other_player.money, player_money + initial_money)
         self.assertEqual(other_player.holdings, [test_holding])
-        self.assertEqual(other_player.jail_cards, 1)
+        self.assertEqual(len(other_player.jail_cards), 1)
 
     # TODO: test rest of player
 
+class PlayerTotalsTest(unittest.TestCase):
+    # The totals worked out the long way
+    def totals(self, plr):
+        monopolies = set(h.monopoly for h in plr.holdings
+            if h.part_of_monopoly)
+        return (sum(h.total_worth for h in plr.holdings),
+            sum(h.houses for h in plr.holdings if h.houses < 5),
+            len([h for h in plr.holdings if h.houses == 5]),
+            sum(h.mortgage_value for h in plr.holdings if h.mortgaged),
+            monopolies)
+
+    def check(self, seats):
+        for plr in seats:
+            self.assertEqual((plr.holdings_worth, plr.num_houses,
+                plr.num_hotels, plr.mortgaged_value, plr.monopolies),
+                self.totals(plr))
+
+    def test_kept_up(self):
+        b = monop.load_board()
+        inout = util.NullInputOutput()
+        for seed in xrange(4):
+            monop_game, seats = simulate.start_game(b,
+                [bots.BuyEverythingBot, bots.CautiousBot, bots.CautiousBot],
+                seed)
+            for _ in xrange(40):
+                # What was tried and then undone leaves them alone too
+                cp = monop_game.checkpoint()
+                simulate.play_turns(monop_game, inout, 10)
+                self.check(seats)
+                monop_game.rollback(cp)
+                monop_game.release(cp)
+                self.check(seats)
+
+                simulate.play_turns(monop_game, inout, 10)
+                self.check(seats)
+
 if __name__ == "__main__":
     sys.exit(unittest.main())
@@ -0,0 +1,365 @@
+#!/usr/bin/python
+
+import argparse
+import binascii
+import collections
+import io
+import sys
+
+import bots
+import events
+import monop
+import rules
+import simulate
+
+# A replay file is MAGIC followed by any number of games, one after another.
+# Each game is:
+#
+#   seed        zigzag varint
+#   board       the 20 byte sha1 digest of the board the game was played on
+#               (all zeros if the board has none)
+#   rules       varint count, then the value of each rules.HouseRules field
+#               in order, as varint length + utf-8 text
+#   turns       varint
+#   winner      varint, the winner's seat + 1, or 0 if nobody won
+#   players     varint count, then for each seat the player's name and
+#               strategy (see bots.STRATEGIES) as varint length + utf-8 bytes
+#   events      varint length in bytes, then the events themselves
+#
+# An event is one byte holding its code (the top four bits) and the seat of
+# the player it happened to (the bottom four), followed by its arguments as
+# varints (see _ENCODINGS).  A turn usually comes to under ten bytes.
+#
+# Games are written whole, so a reader can skip over the events of a game it
+# isn't interested in without decoding them.
+
+MAGIC = 'MONOPY\x00\x02'
+# Replays from before the rules were recorded, which are all played by
+# rules.STANDARD
+_MAGIC_1 = 'MONOPY\x00\x01'
+
+MAX_SEATS = 16
+
+# The event classes that are recorded, by code, along with the functions that
+# turn their fields (after the player) into ints.  Anything else that happens
+# in a game follows from these.
+_ENCODINGS = [
+    (events.Rolled, lambda w, roll: ((roll.values[0] - 1) * 6 +
+        roll.values[1] - 1,)),
+    (events.Moved, lambda w, tile: (tile.index,)),
+    (events.PassedGo, lambda w, amount: (amount,)),
+    (events.Bought, lambda w, tile, _cost: (tile.index,)),
+    (events.PaidRent, lambda w, tile, amount, _houses, _roll:
+        (tile.index, amount)),
+    (events.DrewCard, lambda w, card: (w.card_codes[card],)),
+    (events.Jailed, lambda w: ()),
+    (events.PaidJailFine, lambda w, amount: (amount,)),
+    (events.BuiltHouse, lambda w, tile: (tile.index,)),
+    (events.Mortgaged, lambda w, tile, _amount: (tile.index,)),
+    (events.Unmortgaged, lambda w, tile, _amount: (tile.index,)),
+    (events.Resigned, lambda w: ()),
+]
+
+_CODES = dict((kind, code) for code, (kind, _) in enumerate(_ENCODINGS, 1))
+_KINDS = dict((code, kind) for kind, code in _CODES.iteritems())
+_NUM_ARGS = {
+    events.PaidRent: 2,
+    events.Jailed: 0,
+    events.Resigned: 0,
+}
+
+class ReplayFormatError(Exception):
+    pass
+
+# An event read back out of a replay.  kind is the events class it was
+# recorded from, seat is the seat of the player it happened to, and args are
+# its arguments as recorded: tile indexes rather than tiles, a roll as
+# (die1 - 1) * 6 + (die2 - 1) and a card as its index in the deck * 2 + 0 for
+# community chest or 1 for chance.
+Record = collections.namedtuple('Record', ['kind', 'seat', 'args'])
+
+def write_varint(buf, n):
+    while n > 0x7f:
+        buf.append((n & 0x7f) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+def read_varint(data, pos):
+    n = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayFormatError('Truncated varint')
+        b = ord(data[pos])
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if not b & 0x80:
+            return n, pos
+        shift += 7
+
+def _zigzag(n):
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+def _unzigzag(n):
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+def _write_string(buf, s):
+    s = s.encode('utf-8')
+    write_varint(buf, len(s))
+    buf.extend(s)
+
+def strategy_name(plr):
+    for name, strategy in bots.STRATEGIES.iteritems():
+        if type(plr) is strategy:
+            return name
+    return ''
+
+# Records one game at a time to stream.  Call start once the players are
+# seated and finish once the game is over; in between the writer listens to
+# the game's events.  Nothing is written until the game is finished.
+#
+# Leave out the magic to write games that are going to be added on to the end
+# of another replay.
+class ReplayWriter(object):
+    def __init__(self, stream, magic=True):
+        self.stream = stream
+        if magic:
+            self.stream.write(MAGIC)
+
+        self.game = None
+        self.players = None
+        self.seats = None
+        self.card_codes = None
+        self.events = None
+        self.recorders = None
+
+    def start(self, game, seats):
+        if len(seats) > MAX_SEATS:
+            raise ValueError('A replay can only hold {} players'
+                .format(MAX_SEATS))
+        if not isinstance(game.rng.seed, (int, long)):
+            raise ValueError('Only games with integer seeds can be recorded')
+
+        self.game = game
+        self.seats = dict((plr, i) for i, plr in enumerate(seats))
+        self.players = seats
+
+        self.card_codes = {}
+        # Numbered by where cards are in the definition, since the decks
+        # themselves get shuffled
+        definition = game.board.definition
+        for deck_num, deck in enumerate(
+                [definition.cc_cards, definition.chance_cards]):
+            for i, card in enumerate(deck):
+                self.card_codes[card] = i * 2 + deck_num
+
+        self.events = bytearray()
+        self.recorders = []
+        for kind, encode in _ENCODINGS:
+            recorder = self._recorder(_CODES[kind], encode)
+            game.events.subscribe_args(recorder, kind)
+            self.recorders.append(recorder)
+
+    # A callback that records events of one kind
+    def _recorder(self, code, encode):
+        buf = self.events
+        seats = self.seats
+        def record(player, *fields):
+            buf.append(code << 4 | seats[player])
+            for arg in encode(self, *fields):
+                if arg < 0x80:
+                    buf.append(arg)
+                else:
+                    write_varint(buf, arg)
+        return record
+
+    def finish(self, turns):
+        game = self.game
+        for recorder in self.recorders:
+            game.events.unsubscribe(recorder)
+
+        buf = bytearray()
+        write_varint(buf, _zigzag(game.rng.seed))
+        digest = game.board.definition and game.board.digest
+        if digest:
+            buf.extend(binascii.unhexlify(digest))
+        else:
+            buf.extend('\x00' * 20)
+        write_varint(buf, len(game.rules))
+        for value in game.rules:
+            _write_string(buf, repr(value))
+        write_varint(buf, turns)
+        if game.winner is None:
+            write_varint(buf, 0)
+        else:
+            write_varint(buf, self.seats[game.winner] + 1)
+        write_varint(buf, len(self.players))
+        for plr in self.players:
+            _write_string(buf, plr.name)
+            _write_string(buf, strategy_name(plr))
+        write_varint(buf, len(self.events))
+
+        self.stream.write(buf)
+        self.stream.write(self.events)
+
+        self.game = None
+        self.players = None
+        self.seats = None
+        self.card_codes = None
+        self.events = None
+        self.recorders = None
+
+# One game out of a replay file.  Its events are only decoded when asked for.
+class GameLog(object):
+    def __init__(self, seed, digest, turns, winner, players, data,
+            rules_=rules.STANDARD):
+        self.seed = seed
+        # Hex, like MonopolyBoard.digest, or None if the board had none
+        self.digest = digest
+        # The rules.HouseRules the game was played by
+        self.rules = rules_
+        self.turns = turns
+        # The winner's seat, or None
+        self.winner = winner
+        # (name, strategy) for each seat
+        self.players = players
+        self.data = data
+
+    def records(self):
+        data = self.data
+        pos = 0
+        while pos < len(data):
+            b = ord(data[pos])
+            pos += 1
+            kind = _KINDS.get(b >> 4)
+            if kind is None:
+                raise ReplayFormatError('Unknown event code {}'.format(b >> 4))
+
+            args = []
+            for _ in xrange(_NUM_ARGS.get(kind, 1)):
+                n, pos = read_varint(data, pos)
+                args.append(n)
+
+            yield Record(kind, b & 0xf, tuple(args))
+
+# Reads games out of stream one at a time, so a file of any size can be gone
+# through in a constant amount of memory.
+class ReplayReader(object):
+    def __init__(self, stream):
+        self.stream = stream
+        magic = stream.read(len(MAGIC))
+        if magic not in (MAGIC, _MAGIC_1):
+            raise ReplayFormatError('Not a replay file')
+        self.has_rules = magic == MAGIC
+
+    def _read(self, n):
+        data = self.stream.read(n)
+        if len(data) != n:
+            raise ReplayFormatError('Truncated game')
+        return data
+
+    def _read_varint(self, first=None):
+        n = 0
+        shift = 0
+        while True:
+            if first is not None:
+                b, first = ord(first), None
+            else:
+                b = ord(self._read(1))
+            n |= (b & 0x7f) << shift
+            if not b & 0x80:
+                return n
+            shift += 7
+
+    def _read_string(self):
+        return self._read(self._read_varint()).decode('utf-8')
+
+    def _read_rules(self):
+        if self._read_varint() != len(rules.HouseRules._fields):
+            raise ReplayFormatError('Wrong number of house rules')
+        values = []
+        for field in rules.HouseRules._fields:
+            text = self._read_string()
+            try:
+                values.append(type(getattr(rules.STANDARD, field))(text))
+            except ValueError:
+                raise ReplayFormatError('Bad value for {}: {}'.format(field,
+                    text))
+        return rules.HouseRules(*values)
+
+    def __iter__(self):
+        while True:
+            first = self.stream.read(1)
+            if not first:
+                return
+
+            seed = _unzigzag(self._read_varint(first))
+            digest = binascii.hexlify(self._read(20))
+            if digest == '0' * 40:
+                digest = None
+            rules_ = self._read_rules() if self.has_rules else rules.STANDARD
+            turns = self._read_varint()
+            winner = self._read_varint() - 1
+            if winner < 0:
+                winner = None
+
+            players = []
+            for _ in xrange(self._read_varint()):
+                players.append((self._read_string(), self._read_string()))
+
+            data = self._read(self._read_varint())
+
+            yield GameLog(seed, digest, turns, winner, players, data, rules_)
+
+# Plays a recorded game again from its seed and strategies and checks that it
+# goes exactly the same way.
+def verify(board, game_log):
+    if board.digest != game_log.digest:
+        return False
+
+    strategies = []
+    for _, name in game_log.players:
+        if name not in bots.STRATEGIES:
+            raise ValueError("Can't replay a game with a '{}' player"
+                .format(name))
+        strategies.append(bots.STRATEGIES[name])
+
+    out = io.BytesIO()
+    simulate.simulate(board, strategies, seed=game_log.seed,
+        max_turns=game_log.turns, recorder=ReplayWriter(out),
+        rules_=game_log.rules)
+    out.seek(0)
+
+    replayed = next(iter(ReplayReader(out)))
+    return replayed.data == game_log.data and \
+        replayed.turns == game_log.turns and \
+        replayed.winner == game_log.winner
+
+def main():
+    parser = argparse.ArgumentParser(description='Look through a replay file')
+    parser.add_argument('file')
+    parser.add_argument('--verify', action='store_true',
+        help='play every game again and check it goes the same way')
+    args = parser.parse_args()
+
+    b = monop.load_board() if args.verify else None
+
+    games = turns = num_events = size = 0
+    mismatched = 0
+    with open(args.file, 'rb') as f:
+        for game_log in ReplayReader(f):
+            games += 1
+            turns += game_log.turns
+            num_events += sum(1 for _ in game_log.records())
+            if b is not None and not verify(b, game_log):
+                mismatched += 1
+        size = f.tell()
+
+    print '{} games, {} turns, {} events in {} bytes ({:.1f} bytes/turn)' \
+        .format(games, turns, num_events, size, float(size) / max(turns, 1))
+    if b is not None:
+        print '{} of them replayed differently'.format(mismatched)
+        return 1 if mismatched else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
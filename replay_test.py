@@ -0,0 +1,138 @@
+#!/usr/bin/python
+
+import io
+import sys
+import unittest
+
+import bots
+import events
+import monop
+import replay
+import rules
+import simulate
+import tournament
+
+class VarintTest(unittest.TestCase):
+    def test_round_trip(self):
+        for n in [0, 1, 127, 128, 300, 2 ** 40, 2 ** 64 - 1]:
+            buf = bytearray()
+            replay.write_varint(buf, n)
+            self.assertEqual(replay.read_varint(str(buf), 0), (n, len(buf)))
+
+    def test_small_is_one_byte(self):
+        buf = bytearray()
+        replay.write_varint(buf, 127)
+        self.assertEqual(len(buf), 1)
+
+    def test_truncated(self):
+        self.assertRaises(replay.ReplayFormatError, replay.read_varint,
+            '\x80', 0)
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.board = monop.load_board()
+        self.strategies = [bots.BuyEverythingBot, bots.CautiousBot]
+
+    def record(self, seeds, max_turns=1000, rules_=None):
+        out = io.BytesIO()
+        writer = replay.ReplayWriter(out)
+        results = [simulate.simulate(self.board, self.strategies, seed=seed,
+            max_turns=max_turns, recorder=writer, rules_=rules_)
+            for seed in seeds]
+        out.seek(0)
+        return results, out
+
+    def test_round_trip(self):
+        results, out = self.record([3, 4, -5])
+        logs = list(replay.ReplayReader(out))
+
+        self.assertEqual([g.seed for g in logs], [3, 4, -5])
+        for res, game_log in zip(results, logs):
+            self.assertEqual(game_log.turns, res.turns)
+            self.assertEqual(game_log.winner, res.winner)
+            self.assertEqual(game_log.digest, self.board.digest)
+            self.assertEqual(game_log.players,
+                [('player0', 'buyer'), ('player1', 'cautious')])
+
+    def test_records(self):
+        results, out = self.record([3])
+        game_log = next(iter(replay.ReplayReader(out)))
+        records = list(game_log.records())
+
+        rolls = [r for r in records if r.kind is events.Rolled]
+        self.assertTrue(len(rolls) >= results[0].turns)
+        self.assertEqual(records[0].kind, events.Rolled)
+        self.assertEqual(records[0].seat, 0)
+        self.assertTrue(0 <= records[0].args[0] < 36)
+
+        # The loser goes out of the game at the end
+        self.assertEqual(records[-1], replay.Record(events.Resigned,
+            1 - results[0].winner, ()))
+
+    def test_compact(self):
+        results, out = self.record(range(10))
+        turns = sum(res.turns for res in results)
+        self.assertTrue(len(out.getvalue()) < turns * 20)
+
+    def test_verify(self):
+        _, out = self.record([3, 8], max_turns=50)
+        for game_log in replay.ReplayReader(out):
+            self.assertTrue(replay.verify(self.board, game_log))
+
+            game_log.seed += 1
+            self.assertFalse(replay.verify(self.board, game_log))
+
+    def test_rules(self):
+        house_rules = rules.STANDARD.parse('go_salary=50,starting_cash=700,'
+            'mortgage_interest=0.25')
+        _, out = self.record([3, 8], max_turns=200, rules_=house_rules)
+        for game_log in replay.ReplayReader(out):
+            self.assertEqual(game_log.rules, house_rules)
+            self.assertTrue(replay.verify(self.board, game_log))
+
+            game_log.rules = rules.STANDARD
+            self.assertFalse(replay.verify(self.board, game_log))
+
+    # Replays from before the rules were recorded are played by the standard
+    # ones
+    def test_without_rules(self):
+        _, out = self.record([3])
+        game_log = next(iter(replay.ReplayReader(out)))
+        seed = bytearray()
+        replay.write_varint(seed, 3 * 2)
+        header = bytearray()
+        replay.write_varint(header, len(rules.STANDARD))
+        for value in rules.STANDARD:
+            replay._write_string(header, repr(value))
+        data = out.getvalue()[len(replay.MAGIC):]
+        start = len(seed) + 20
+        self.assertEqual(data[start:start + len(header)], str(header))
+        old = replay._MAGIC_1 + data[:start] + data[start + len(header):]
+
+        old_log = next(iter(replay.ReplayReader(io.BytesIO(old))))
+        self.assertEqual(old_log.rules, rules.STANDARD)
+        self.assertEqual(old_log.data, game_log.data)
+        self.assertTrue(replay.verify(self.board, old_log))
+
+    def test_not_a_replay(self):
+        self.assertRaises(replay.ReplayFormatError, replay.ReplayReader,
+            io.BytesIO('hello there'))
+
+    def test_truncated(self):
+        _, out = self.record([3])
+        data = out.getvalue()[:-1]
+        reader = replay.ReplayReader(io.BytesIO(data))
+        self.assertRaises(replay.ReplayFormatError, list, reader)
+
+    def test_tournament(self):
+        out = io.BytesIO()
+        stats = tournament.run_tournament(['buyer', 'cautious'], 7,
+            workers=2, chunk_size=3, replay_stream=out)
+        out.seek(0)
+
+        logs = list(replay.ReplayReader(out))
+        self.assertEqual(len(logs), 7)
+        self.assertEqual(sum(g.turns for g in logs), stats.turns)
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
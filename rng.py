@@ -0,0 +1,80 @@
+import hashlib
+import random
+
+import util
+
+# How many dice rolls are made at a time
+BLOCK_SIZE = 1024
+
+# Every roll of two dice, in one flat list so a roll is a single lookup
+_ALL_ROLLS = tuple(r for rolls in util.TWO_DICE_ROLLS for r in rolls)
+
+# The seed for the nth stream split off of seed.  Streams made this way don't
+# overlap in any way that matters, so games seeded with child_seed(seed, 0),
+# child_seed(seed, 1), ... can be played in any order, on any machine, and each
+# one still plays out the same.
+def child_seed(seed, n):
+    h = hashlib.sha256('{}/{}'.format(seed, n)).hexdigest()
+    return int(h[:16], 16)
+
+# Shuffles seq in place by Fisher-Yates, with draws from r's draw_index, so
+# anything that hands out draws shuffles the same way given the same ones (see
+# vecsim.ScriptedGameRandom)
+def shuffle_by_draws(r, seq):
+    for i in xrange(len(seq) - 1, 0, -1):
+        j = r.draw_index(i + 1)
+        seq[i], seq[j] = seq[j], seq[i]
+
+# All the randomness for one game.  Dice and card draws come from separate
+# streams, so how the cards are shuffled doesn't change the dice and the
+# other way around.  Rolls are made in blocks and handed out one at a time.
+# Card draws are only needed to shuffle the decks at the start (a few dozen
+# a game), so they're made as they're asked for.
+#
+# Playing a game again with a GameRandom made from the same seed plays it out
+# exactly the same way.
+class GameRandom(object):
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed = seed
+
+        self._dice = random.Random(child_seed(seed, 'dice'))
+        self._cards = random.Random(child_seed(seed, 'cards'))
+
+        self._rolls = []
+        self._next_roll = 0
+
+    # A GameRandom for the nth game played from this one's seed
+    def spawn(self, n):
+        return GameRandom(child_seed(self.seed, n))
+
+    def _refill_rolls(self):
+        rand = self._dice.random
+        self._rolls = [_ALL_ROLLS[int(rand() * 36)]
+            for _ in xrange(BLOCK_SIZE)]
+        self._next_roll = 0
+
+    def roll_two_dice(self):
+        if self._next_roll == len(self._rolls):
+            self._refill_rolls()
+        roll = self._rolls[self._next_roll]
+        self._next_roll += 1
+        return roll
+
+    # A random number from 0 to n - 1, for shuffling the cards
+    def draw_index(self, n):
+        return int(self._cards.random() * n)
+
+    # Everything needed to go back to where the streams are now
+    def getstate(self):
+        return (self._dice.getstate(), self._cards.getstate(), self._rolls,
+            self._next_roll)
+
+    def setstate(self, state):
+        dice, cards, self._rolls, self._next_roll = state
+        self._dice.setstate(dice)
+        self._cards.setstate(cards)
+
+    def shuffle(self, seq):
+        shuffle_by_draws(self, seq)
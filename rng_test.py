@@ -0,0 +1,58 @@
+#!/usr/bin/python
+
+import sys
+import unittest
+
+import rng
+
+class GameRandomTest(unittest.TestCase):
+    def draw(self, r, n):
+        # Enough to go through more than one block
+        return [(r.roll_two_dice().values, r.draw_index(16))
+            for _ in xrange(n)]
+
+    def test_same_seed(self):
+        n = rng.BLOCK_SIZE * 2 + 10
+        self.assertEqual(self.draw(rng.GameRandom(42), n),
+            self.draw(rng.GameRandom(42), n))
+
+    def test_different_seeds(self):
+        self.assertNotEqual(self.draw(rng.GameRandom(1), 100),
+            self.draw(rng.GameRandom(2), 100))
+
+    def test_dice_dont_depend_on_cards(self):
+        r1 = rng.GameRandom(5)
+        r2 = rng.GameRandom(5)
+        for _ in xrange(50):
+            r2.draw_index(10)
+
+        self.assertEqual([r1.roll_two_dice() for _ in xrange(50)],
+            [r2.roll_two_dice() for _ in xrange(50)])
+
+    def test_draw_index_range(self):
+        r = rng.GameRandom(3)
+        draws = set(r.draw_index(5) for _ in xrange(500))
+        self.assertEqual(draws, set(range(5)))
+
+    def test_roll_distribution(self):
+        r = rng.GameRandom(3)
+        rolls = [r.roll_two_dice() for _ in xrange(3600)]
+        self.assertEqual(set(rolls), set(range(2, 13)))
+        doubles = len([roll for roll in rolls if roll.is_doubles()])
+        self.assertTrue(450 < doubles < 750)
+
+    def test_spawn(self):
+        r = rng.GameRandom(9)
+        self.assertEqual(r.spawn(3).seed, rng.GameRandom(9).spawn(3).seed)
+        self.assertNotEqual(r.spawn(3).seed, r.spawn(4).seed)
+        self.assertEqual(r.spawn(3).seed, rng.child_seed(9, 3))
+
+    def test_seed_chosen(self):
+        # Even without a seed, the one used is kept so the game can be replayed
+        r = rng.GameRandom()
+        self.assertIsNotNone(r.seed)
+        self.assertEqual(self.draw(rng.GameRandom(r.seed), 10),
+            self.draw(r, 10))
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
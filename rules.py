@@ -0,0 +1,38 @@
+import collections
+import hashlib
+import json
+
+# The house rules a game is played by: how much passing GO pays, how much
+# money everyone starts with, what a house (or a hotel) costs, the fine for
+# getting out of jail, and the interest on paying a mortgage off, as a share
+# of the mortgage.  The game (MonopolyGame.rules) and everything playing it
+# read them from there rather than having the amounts written in.
+class HouseRules(collections.namedtuple('HouseRules', ['go_salary',
+        'starting_cash', 'house_price', 'jail_fine', 'mortgage_interest'])):
+    __slots__ = ()
+
+    # What paying off tile's mortgage costs
+    def unmortgage_cost(self, tile):
+        return int(tile.mortgage_value * (1 + self.mortgage_interest))
+
+    # Stands for the rules, for telling apart results played under different
+    # ones (see sweep.py)
+    @property
+    def digest(self):
+        return hashlib.sha256(json.dumps(self._asdict(), sort_keys=True)) \
+            .hexdigest()
+
+    # Rules with the values in text (name=value, ...) changed from these
+    def parse(self, text):
+        changes = {}
+        for item in text.split(','):
+            name, _, value = item.partition('=')
+            name = name.strip()
+            if name not in self._fields:
+                raise ValueError('There is no house rule {}'.format(name))
+            changes[name] = type(getattr(self, name))(value)
+        return self._replace(**changes)
+
+# The rules as they are in the box
+STANDARD = HouseRules(go_salary=200, starting_cash=1500, house_price=100,
+    jail_fine=50, mortgage_interest=0.10)
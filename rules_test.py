@@ -0,0 +1,78 @@
+#!/usr/bin/python
+
+import sys
+import unittest
+
+import board
+import game
+import monop
+import monop_testing
+import rules
+
+class HouseRulesTest(unittest.TestCase):
+    def setUp(self):
+        self.rules = rules.STANDARD._replace(go_salary=300,
+            starting_cash=1000, house_price=150, jail_fine=80,
+            mortgage_interest=0.5)
+        self.inout = monop_testing.TestInputOutput()
+        self.game = game.MonopolyGame(monop.load_board(), rules_=self.rules)
+        for i in range(2):
+            self.game.add_player(
+                monop_testing.MonopolyTestPlayer('tester%d' % i, self.game))
+        self.player = self.game.players[0]
+        self.board = self.game.board
+
+    def test_standard(self):
+        standard = game.MonopolyGame(monop.load_board())
+        self.assertEqual(standard.rules, rules.STANDARD)
+        self.assertEqual(rules.STANDARD.go_salary, 200)
+        self.assertEqual(rules.STANDARD.starting_cash, 1500)
+
+    def test_starting_cash(self):
+        self.assertEqual(self.player.money, 1000)
+
+    def test_go_salary(self):
+        self.player.position = 38
+        self.board.advance_player_to(self.inout, self.player,
+            self.board.tiles[0])
+        self.assertEqual(self.player.money, 1300)
+
+    def test_jail_fine(self):
+        self.player.jail()
+        self.player.pay_for_jail(self.inout)
+        self.assertEqual(self.player.money, 1000 - 80)
+
+    def test_house_price_and_interest(self):
+        tiles = [t for t in self.board.tiles
+            if isinstance(t, board.MonopolyBoardPropertyTile) and
+            t.monopoly == 'Purple']
+        for tile in tiles:
+            tile.owner = self.player
+            self.player.add_to_holdings(tile)
+        self.player.money = 1000
+
+        tiles[0].place_house(self.inout, self.player)
+        self.assertEqual(self.player.money, 1000 - 150)
+
+        tiles[1].mortgage(self.inout, self.player)
+        money = self.player.money
+        tiles[1].unmortgage(self.inout, self.player)
+        self.assertEqual(self.rules.unmortgage_cost(tiles[1]),
+            int(tiles[1].mortgage_value * 1.5))
+        self.assertEqual(money - self.player.money,
+            self.rules.unmortgage_cost(tiles[1]))
+
+    def test_parse(self):
+        parsed = rules.STANDARD.parse('jail_fine=75, mortgage_interest=0.2')
+        self.assertEqual(parsed.jail_fine, 75)
+        self.assertEqual(parsed.mortgage_interest, 0.2)
+        self.assertEqual(parsed.go_salary, 200)
+        self.assertRaises(ValueError, rules.STANDARD.parse, 'rent=2')
+
+    def test_digest(self):
+        self.assertEqual(self.rules.digest,
+            rules.STANDARD._replace(**self.rules._asdict()).digest)
+        self.assertNotEqual(self.rules.digest, rules.STANDARD.digest)
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
@@ -0,0 +1,441 @@
+#!/usr/bin/python
+
+import argparse
+import asynchat
+import asyncore
+import collections
+import multiprocessing
+import os
+import resource
+import socket
+import sys
+import threading
+import time
+import traceback
+
+import decisions
+import game
+import monop
+import util
+
+# Each game is played in an OS thread of its own, blocked waiting on its
+# player between moves.  They never go very deep, so they can make do with a
+# small stack.
+GAME_STACK_SIZE = 256 * 1024
+
+# Seconds a player has to answer before they get disconnected
+IDLE_TIMEOUT = 300
+
+# Longest line a client can send before they get disconnected
+MAX_LINE = 4096
+
+# How much a game says before it's sent without waiting for the next question
+MAX_SEND = 64 * 1024
+
+class ClientGone(Exception):
+    pass
+
+# The InputOutput a game on the server talks to its player through.  It's
+# used from the game's thread: everything told is sent straight away, and
+# asking waits for the answer to come in.  Games wrap it in a
+# util.BufferedInputOutput so what they say goes out along with the next
+# question.
+class NetworkInputOutput(util.InputOutput):
+    def __init__(self, conn):
+        self.conn = conn
+
+    def tell(self, msg):
+        # Tile and card names come from json, so what's told is often
+        # unicode.  What players type in (their names, say) comes as utf-8
+        # bytes, which can't go through unicode().
+        if isinstance(msg, unicode):
+            msg = msg.encode('utf-8')
+        self.conn.server.send(self.conn, msg)
+
+    def ask(self, msg):
+        self.tell(msg)
+        return self.conn.wait_for_line()
+
+# One player's connection, with the game they're playing.  Everything but
+# wait_for_line belongs to the server's loop.
+class GameConnection(asynchat.async_chat):
+    def __init__(self, server, sock):
+        asynchat.async_chat.__init__(self, sock, map=server.map)
+        self.set_terminator('\n')
+        self.server = server
+        self.incoming = []
+        self.incoming_len = 0
+
+        # Lines the game hasn't read yet, guarded by ready
+        self.lines = collections.deque()
+        self.ready = threading.Condition(threading.Lock())
+        self.closed = False
+        # Whether the game is waiting on a line, and since when
+        self.waiting = False
+        self.asked_at = time.time()
+
+        self.thread = threading.Thread(target=self.play_game)
+        self.thread.daemon = True
+
+    def collect_incoming_data(self, data):
+        self.incoming.append(data)
+        self.incoming_len += len(data)
+        if self.incoming_len > MAX_LINE:
+            self.handle_close()
+
+    # Lines are decoded as they come in, so that what players type (their
+    # names, say) goes into the game as unicode alongside the tile names
+    # rather than as bytes that can't be mixed with them
+    def found_terminator(self):
+        line = ''.join(self.incoming).rstrip('\r')
+        self.incoming = []
+        self.incoming_len = 0
+        with self.ready:
+            self.lines.append(line)
+            self.ready.notify()
+
+    def handle_close(self):
+        with self.ready:
+            self.closed = True
+            self.ready.notify()
+        self.close()
+        self.server.connections.discard(self)
+
+    # Called by the game's thread
+    def wait_for_line(self):
+        with self.ready:
+            self.waiting = True
+            while not self.lines and not self.closed:
+                self.ready.wait()
+            self.waiting = False
+            if not self.lines:
+                raise ClientGone()
+            return self.lines.popleft()
+
+    # The game's thread
+    def play_game(self):
+        inout = util.BufferedInputOutput(NetworkInputOutput(self),
+            threshold=MAX_SEND)
+        try:
+            monop_game = game.MonopolyGame(monop.load_board())
+            monop_game.run_game(inout)
+        except ClientGone:
+            pass
+        except SystemExit:
+            # They quit
+            pass
+        except Exception:
+            traceback.print_exc()
+            inout.tell('\nSorry, something went wrong with your game\n')
+        finally:
+            try:
+                inout.flush()
+            finally:
+                self.server.game_over(self)
+
+# Hosts a game for everyone who connects, as many at once as it takes.  The
+# connections are all looked after by one loop (serve), which hands the lines
+# that come in to the games and sends what they have to say back out.  The
+# games get to it through a pipe that wakes the loop up.
+#
+# The games themselves aren't driven by the loop: the engine asks its
+# questions from deep inside a turn and expects the answer back there, so
+# each game gets a thread (see GameConnection.play_game) that sleeps between
+# questions.  That's a thread per game being played, each with a
+# GAME_STACK_SIZE stack, which is what limits how many games a server can
+# host; the sockets cost the loop next to nothing.
+class GameServer(asyncore.dispatcher):
+    def __init__(self, host='', port=0, idle_timeout=IDLE_TIMEOUT):
+        self.map = {}
+        asyncore.dispatcher.__init__(self, map=self.map)
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.set_reuse_addr()
+        self.bind((host, port))
+        self.listen(1024)
+        self.address = self.socket.getsockname()
+
+        self.idle_timeout = idle_timeout
+        self.connections = set()
+        # Connections whose games haven't finished, guarded by lock
+        self.playing = set()
+        self.games = 0
+        self.peak_games = 0
+        self.games_played = 0
+
+        # (connection, data, whether to close after) from the games' threads
+        self.outgoing = []
+        self.lock = threading.Lock()
+        wake_read, self.wake_write = os.pipe()
+        # The waker keeps its own copy of the reading end
+        self.waker = _Waker(self, wake_read)
+        os.close(wake_read)
+
+        self.stopped = False
+
+    # Takes everyone who is waiting, rather than one per trip around the loop,
+    # so lots of players turning up at once don't overflow the backlog
+    def handle_accept(self):
+        while True:
+            pair = self.accept()
+            if pair is None:
+                return
+            conn = GameConnection(self, pair[0])
+            self.connections.add(conn)
+            with self.lock:
+                self.playing.add(conn)
+                self.games += 1
+                self.peak_games = max(self.peak_games, self.games)
+            _start_with_stack(conn.thread, GAME_STACK_SIZE)
+
+    # Called from the games' threads
+    def send(self, conn, data, close=False):
+        with self.lock:
+            if not self.outgoing:
+                self._wake()
+            self.outgoing.append((conn, data, close))
+
+    # Wakes up the loop.  Must be called with the lock held.
+    def _wake(self):
+        # Once the server has closed down there's nobody to wake
+        if self.wake_write is not None:
+            os.write(self.wake_write, 'x')
+
+    def game_over(self, conn):
+        with self.lock:
+            self.playing.discard(conn)
+            self.games -= 1
+            self.games_played += 1
+        self.send(conn, '', close=True)
+
+    def send_outgoing(self):
+        with self.lock:
+            outgoing, self.outgoing = self.outgoing, []
+        now = time.time()
+        for conn, data, close in outgoing:
+            if not conn.connected:
+                continue
+            if data:
+                conn.push(data)
+                conn.asked_at = now
+            if close:
+                conn.close_when_done()
+                self.connections.discard(conn)
+
+    def close_idle(self):
+        cutoff = time.time() - self.idle_timeout
+        for conn in list(self.connections):
+            if conn.waiting and conn.asked_at < cutoff:
+                conn.push('\nYou took too long to answer, goodbye\n')
+                conn.close_when_done()
+                self.connections.discard(conn)
+                with conn.ready:
+                    conn.closed = True
+                    conn.ready.notify()
+
+    # Runs the server until stop is called, or for duration seconds, and then
+    # closes it down
+    def serve(self, duration=None):
+        end = None if duration is None else time.time() + duration
+        next_idle_check = 0
+        while not self.stopped and (end is None or time.time() < end):
+            asyncore.loop(timeout=0.2, map=self.map, use_poll=True, count=1)
+            if time.time() >= next_idle_check:
+                self.close_idle()
+                next_idle_check = time.time() + min(self.idle_timeout, 1.0)
+
+        # Games still going end when they next ask something, and they're
+        # waited for so none are left behind talking to a closed server
+        with self.lock:
+            playing = list(self.playing)
+        for conn in playing:
+            with conn.ready:
+                conn.closed = True
+                conn.ready.notify()
+        for conn in playing:
+            conn.thread.join()
+        asyncore.close_all(self.map)
+        with self.lock:
+            os.close(self.wake_write)
+            self.wake_write = None
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            self._wake()
+
+    def handle_close(self):
+        self.close()
+
+# Starts thread with a stack stack_size bytes big.  The size is a setting for
+# the whole process, so it's only changed while the thread starts and then
+# put back, which leaves threads anybody else starts alone.
+def _start_with_stack(thread, stack_size):
+    old = threading.stack_size(stack_size)
+    try:
+        thread.start()
+    finally:
+        threading.stack_size(old)
+
+class _Waker(asyncore.file_dispatcher):
+    def __init__(self, server, fd):
+        asyncore.file_dispatcher.__init__(self, fd, map=server.map)
+        self.server = server
+
+    def writable(self):
+        return False
+
+    def handle_read(self):
+        self.recv(4096)
+        self.server.send_outgoing()
+
+# ======= Load testing =======
+
+# What a load test client says to each question, by how the question ends
+_ANSWERS = [
+    ('How many players? ', '2'),
+    ("name: ", None),
+    ('Do you want to buy? ', 'yes'),
+    ('-- Command: ', 'roll'),
+    ('Do you all really want to quit? ', 'yes'),
+]
+
+# A client that plays one game against the server, as a hot seat for two
+# players, rolling and buying whatever it can until it has answered moves
+# questions, then quitting.  It's no good at getting out of debt, and just
+# says it's done until it gets to quit.
+#
+# How long each answer took to get the next question back goes into latency.
+class LoadTestClient(asynchat.async_chat):
+    def __init__(self, test, address, moves):
+        asynchat.async_chat.__init__(self, map=test.map)
+        self.set_terminator(None)
+        self.test = test
+        self.moves = moves
+        self.received = ''
+        self.names = iter(['alice', 'bob'])
+        self.sent_at = None
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.connect(address)
+
+    def collect_incoming_data(self, data):
+        self.received = (self.received + data)[-256:]
+        question = self.received.rsplit('\n', 1)[-1]
+        if not (question.endswith(': ') or question.endswith('? ')):
+            return
+
+        if self.sent_at is None:
+            self.test.started()
+        else:
+            self.test.latency.add(time.time() - self.sent_at)
+        self.received = ''
+        self.answer(question)
+
+    def answer(self, question):
+        self.moves -= 1
+        reply = 'done'
+        for ending, answer in _ANSWERS:
+            if question.endswith(ending):
+                reply = answer or next(self.names)
+                break
+        # Every question in a game takes quit as an answer
+        if self.moves < 0 and reply != 'yes':
+            reply = 'quit'
+        self.sent_at = time.time()
+        self.push(reply + '\n')
+
+    def handle_close(self):
+        self.close()
+        if self.sent_at is not None:
+            self.test.finished()
+
+    def handle_error(self):
+        self.test.errors += 1
+        self.handle_close()
+
+# Plays clients games against the server at address at once, each answering
+# moves questions, and reports how many were going at the same time and how
+# long the server took to answer
+class LoadTest(object):
+    def __init__(self, address, clients, moves):
+        self.map = {}
+        self.latency = decisions.LatencyHistogram()
+        self.playing = 0
+        self.peak_playing = 0
+        self.errors = 0
+        self.clients = [LoadTestClient(self, address, moves)
+            for _ in xrange(clients)]
+
+    def started(self):
+        self.playing += 1
+        self.peak_playing = max(self.peak_playing, self.playing)
+
+    def finished(self):
+        self.playing -= 1
+
+    def run(self, timeout=None):
+        start = time.time()
+        while self.map and (timeout is None or
+                time.time() - start < timeout):
+            asyncore.loop(timeout=0.2, map=self.map, use_poll=True, count=1)
+        self.elapsed = time.time() - start
+
+    def report(self):
+        return ('{} games, {} at once at the most, {} errors\n'
+            '{} answers in {:.1f}s ({:.0f}/sec), '
+            'p50 {:.2f} ms, p99 {:.2f} ms, max {:.2f} ms\n').format(
+            len(self.clients), self.peak_playing, self.errors,
+            self.latency.count, self.elapsed,
+            self.latency.count / max(self.elapsed, 1e-9),
+            1000 * self.latency.percentile(50),
+            1000 * self.latency.percentile(99), 1000 * self.latency.max)
+
+def _serve(host, port, idle_timeout):
+    GameServer(host, port, idle_timeout).serve()
+
+# Lets this process have as many files open as it's allowed to
+def raise_file_limit():
+    _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def main():
+    parser = argparse.ArgumentParser(description='Host monopoly games')
+    parser.add_argument('--host', default='')
+    parser.add_argument('--port', type=int, default=6500)
+    parser.add_argument('--idle-timeout', type=float, default=IDLE_TIMEOUT,
+        help='seconds a player has to answer')
+    parser.add_argument('--load-test', type=int, metavar='CLIENTS',
+        help='play this many games against a server at once and report '
+            'how it held up (starting one, unless --no-server)')
+    parser.add_argument('--moves', type=int, default=100,
+        help='questions each load test game answers before quitting')
+    parser.add_argument('--no-server', action='store_true',
+        help='load test a server that is already running')
+    args = parser.parse_args()
+
+    raise_file_limit()
+
+    if not args.load_test:
+        server = GameServer(args.host, args.port, args.idle_timeout)
+        print 'Serving on port {}'.format(server.address[1])
+        server.serve()
+        return
+
+    proc = None
+    if not args.no_server:
+        proc = multiprocessing.Process(target=_serve,
+            args=(args.host, args.port, args.idle_timeout))
+        proc.daemon = True
+        proc.start()
+        time.sleep(0.5)
+
+    test = LoadTest((args.host or 'localhost', args.port), args.load_test,
+        args.moves)
+    test.run()
+    sys.stdout.write(test.report())
+
+    if proc is not None:
+        proc.terminate()
+    return 1 if test.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/python
+
+import socket
+import sys
+import threading
+import time
+import unittest
+
+import server
+
+class Client(object):
+    def __init__(self, address):
+        self.sock = socket.create_connection(address)
+        self.sock.settimeout(5)
+
+    # Everything up to and including the next question, or until the server
+    # hangs up
+    def read_question(self):
+        data = ''
+        while not (data.endswith(': ') or data.endswith('? ')):
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def answer(self, line):
+        self.sock.sendall(line + '\n')
+        return self.read_question()
+
+    def close(self):
+        self.sock.close()
+
+class GameServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = server.GameServer('localhost', 0, idle_timeout=0.5)
+        self.thread = threading.Thread(target=self.server.serve)
+        self.thread.start()
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        self.server.stop()
+        self.thread.join()
+
+    def connect(self):
+        client = Client(self.server.address)
+        self.clients.append(client)
+        return client
+
+    def wait_for(self, condition):
+        end = time.time() + 5
+        while not condition() and time.time() < end:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def start_game(self, client, names):
+        self.assertEqual(client.read_question(), 'How many players? ')
+        client.answer(str(len(names)))
+        for name in names[:-1]:
+            client.answer(name)
+        return client.answer(names[-1])
+
+    def test_play(self):
+        client = self.connect()
+        out = self.start_game(client, ['alice', 'bob'])
+        self.assertIn('goes first', out)
+        self.assertTrue(out.endswith('-- Command: '))
+
+        out = client.answer('roll')
+        self.assertIn('roll is', out)
+
+        self.assertEqual(client.answer('quit'),
+            'Do you all really want to quit? ')
+        self.assertEqual(client.answer('yes'), '')
+        self.wait_for(lambda: self.server.games_played == 1)
+        self.assertEqual(self.server.games, 0)
+
+    def test_stack_size_left_alone(self):
+        client = self.connect()
+        self.start_game(client, ['alice', 'bob'])
+        self.assertEqual(self.server.games, 1)
+        self.assertEqual(threading.stack_size(), 0)
+
+    def test_unicode_name(self):
+        client = self.connect()
+        out = self.start_game(client, ['zo\xc3\xab', 'bob'])
+        self.assertIn('goes first', out)
+        for answer in ['roll', 'where', 'print', 'own holdings', 'roll']:
+            out = client.answer(answer)
+            self.assertNotIn('went wrong', out)
+            self.assertTrue(out.endswith(': ') or out.endswith('? '), out)
+        self.assertIn('zo\xc3\xab', client.answer('where'))
+
+    def test_stop_ends_games(self):
+        client = self.connect()
+        self.start_game(client, ['alice', 'bob'])
+        self.assertEqual(self.server.games, 1)
+        self.server.stop()
+        self.thread.join()
+        self.assertEqual(self.server.games, 0)
+        self.assertEqual(threading.active_count(), 1)
+
+    def test_games_are_separate(self):
+        first = self.connect()
+        second = self.connect()
+        self.assertIn('alice (1)', self.start_game(first, ['alice', 'bob']))
+        self.assertIn('carol (1)', self.start_game(second, ['carol', 'dan']))
+
+        self.assertNotIn('carol', first.answer('roll'))
+        self.assertEqual(self.server.peak_games, 2)
+
+    def test_idle_timeout(self):
+        client = self.connect()
+        self.assertEqual(client.read_question(), 'How many players? ')
+
+        self.assertIn('too long', client.read_question())
+        self.wait_for(lambda: self.server.games == 0)
+
+    def test_hang_up(self):
+        client = self.connect()
+        client.read_question()
+        client.close()
+        self.wait_for(lambda: self.server.games == 0)
+
+    def test_load(self):
+        test = server.LoadTest(self.server.address, 20, 30)
+        test.run(timeout=30)
+
+        self.assertEqual(test.errors, 0)
+        self.assertEqual(test.playing, 0)
+        self.assertTrue(test.peak_playing > 1)
+        self.assertTrue(test.latency.count >= 20 * 30)
+        self.assertIn('p99', test.report())
+        self.wait_for(lambda: self.server.games_played == 20)
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
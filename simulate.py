@@ -0,0 +1,77 @@
+import collections
+
+import game
+import rng
+import util
+
+# What is left of a simulated game.  winner is the seat number (the index into
+# the strategies the game was played with) of the last player standing, or None
+# if nobody had won when the game hit its turn limit.  net_worths is indexed the
+# same way, with zero for anyone who went bankrupt.
+GameResult = collections.namedtuple('GameResult',
+    ['winner', 'turns', 'net_worths'])
+
+# Sets up a game between bots on a freshly reset board, returning the game and
+# the players in seat order.  The player in the first seat goes first.  If a
+# recorder (a replay.ReplayWriter) is given, it starts recording the game.
+# The game's dice and cards come from game_random if it is given, or else from
+# a rng.GameRandom made from seed.  It's played by the house rules in rules_
+# (a rules.HouseRules), or the standard ones if they aren't given.
+def start_game(board, strategies, seed=None, recorder=None,
+        game_random=None, rules_=None):
+    board.reset()
+
+    if game_random is None:
+        game_random = rng.GameRandom(seed)
+    monop = game.MonopolyGame(board, game_random, rules_)
+    seats = []
+    for i, strategy in enumerate(strategies):
+        plr = strategy('player%d' % i, monop)
+        monop.add_player(plr)
+        seats.append(plr)
+
+    monop.current_player = monop.get_next_player()
+
+    if recorder is not None:
+        recorder.start(monop, seats)
+
+    return monop, seats
+
+# Has turns until somebody wins or max_turns turns have been had, returning
+# the number of turns.
+def play_turns(monop, inout, max_turns):
+    turns = 0
+    while monop.winner is None and turns < max_turns:
+        monop.current_player.have_turn(inout)
+        turns += 1
+    return turns
+
+# Plays a game between bots without talking to anyone.  strategies is a list of
+# bot player classes (see bots.py), one for each seat, and the player in the
+# first seat goes first.  The board is reset before the game, so the same
+# loaded board can be reused for as many games as you like.  The same seed
+# always plays out the same game.  Give a recorder (a replay.ReplayWriter) to
+# keep a replay of the game, and a tally (an aggregate.GameTally) to count
+# what goes on in it.
+def simulate(board, strategies, seed=None, max_turns=1000, recorder=None,
+        tally=None, rules_=None):
+    monop, seats = start_game(board, strategies, seed, recorder,
+        rules_=rules_)
+    if tally is not None:
+        tally.watch(monop)
+    turns = play_turns(monop, util.NullInputOutput(), max_turns)
+
+    if recorder is not None:
+        recorder.finish(turns)
+
+    return game_result(monop, seats, turns)
+
+def game_result(monop, seats, turns):
+    winner = None
+    if monop.winner is not None:
+        winner = seats.index(monop.winner)
+
+    net_worths = tuple(p.total_worth if p in monop.players else 0
+        for p in seats)
+
+    return GameResult(winner, turns, net_worths)
@@ -0,0 +1,49 @@
+#!/usr/bin/python
+
+import sys
+import unittest
+
+import bots
+import monop
+import simulate
+
+class SimulateTest(unittest.TestCase):
+    def setUp(self):
+        self.board = monop.load_board()
+        self.strategies = [bots.BuyEverythingBot, bots.CautiousBot]
+
+    def test_game_finishes(self):
+        res = simulate.simulate(self.board, self.strategies, seed=3)
+
+        self.assertIsNotNone(res.winner)
+        self.assertTrue(res.turns <= 1000)
+        self.assertEqual(len(res.net_worths), 2)
+
+        # Whoever went bankrupt is worth nothing
+        loser = 1 - res.winner
+        self.assertEqual(res.net_worths[loser], 0)
+        self.assertTrue(res.net_worths[res.winner] > 0)
+
+    def test_max_turns(self):
+        res = simulate.simulate(self.board, self.strategies, seed=3,
+            max_turns=10)
+
+        self.assertIsNone(res.winner)
+        self.assertEqual(res.turns, 10)
+
+    def test_same_seed_same_game(self):
+        res1 = simulate.simulate(self.board, self.strategies, seed=7)
+        res2 = simulate.simulate(self.board, self.strategies, seed=7)
+
+        self.assertEqual(res1, res2)
+
+    def test_board_reused(self):
+        simulate.simulate(self.board, self.strategies, seed=7)
+        simulate.simulate(self.board, self.strategies, seed=7, max_turns=0)
+
+        # Starting a new game puts every property back on the market
+        for tile in self.board.get_tiles():
+            self.assertIsNone(getattr(tile, 'owner', None))
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
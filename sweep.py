@@ -0,0 +1,148 @@
+#!/usr/bin/python
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import pickle
+import sys
+
+import bots
+import monop
+import rules
+import tournament
+
+# Where a sweep keeps the results of each point, so running it again only
+# plays the points it hasn't got yet
+CACHE_DIR = '.sweep_cache'
+
+# Goes into every cache key.  Bump it when a change to the engine or the bots
+# means results played before it don't hold any more.
+CACHE_VERSION = 1
+
+# Every combination of values, a rule name -> the values to try, as house
+# rules with everything else from base
+def grid(values, base=rules.STANDARD):
+    names = sorted(values)
+    return [base._replace(**dict(zip(names, combo)))
+        for combo in itertools.product(*[values[n] for n in names])]
+
+# Names the results of playing num_games games between strategy_names by
+# rules_ on the board with board_digest.  The same key always means the same
+# games, since their seeds come from seed (see tournament.run_tournament).
+def cache_key(rules_, board_digest, strategy_names, num_games, seed,
+        max_turns):
+    return hashlib.sha256(json.dumps({
+        'version': CACHE_VERSION,
+        'rules': rules_.digest,
+        'board': board_digest,
+        'strategies': list(strategy_names),
+        'games': num_games,
+        'seed': seed,
+        'max_turns': max_turns,
+    }, sort_keys=True)).hexdigest()
+
+# aggregate.Aggregators on disk, a file for each key
+class ResultCache(object):
+    def __init__(self, path=CACHE_DIR):
+        self.path = path
+
+    def _file(self, key):
+        return os.path.join(self.path, key + '.pickle')
+
+    # The results stored under key, or None if there aren't any
+    def get(self, key):
+        if not os.path.exists(self._file(key)):
+            return None
+        with open(self._file(key), 'rb') as f:
+            return pickle.load(f)
+
+    def put(self, key, summary):
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        # Written out to the side first, so a sweep that gets stopped partway
+        # never leaves half a file behind
+        tmp = self._file(key) + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(summary, f, 2)
+        os.rename(tmp, self._file(key))
+
+# Plays num_games games between strategy_names for each of points (house
+# rules), with the games spread over workers processes, and yields (rules,
+# aggregate.Aggregator of the games, whether it came out of cache) for each
+# as it's done.  Points cache already has aren't played again.
+def run_sweep(strategy_names, points, num_games, cache, workers=None,
+        chunk_size=50, seed=0, max_turns=1000):
+    board_digest = monop.load_board().digest
+    for point in points:
+        key = cache_key(point, board_digest, strategy_names, num_games, seed,
+            max_turns)
+        summary = cache.get(key)
+        cached = summary is not None
+        if not cached:
+            summary = tournament.run_tournament(strategy_names, num_games,
+                workers=workers, chunk_size=chunk_size, seed=seed,
+                max_turns=max_turns, summary=True, rules_=point).summary
+            cache.put(key, summary)
+        yield point, summary, cached
+
+# NAME=VALUE,VALUE,... into the rule name and the values, as the type the
+# standard rules have for it
+def parse_values(text):
+    name, _, values = text.partition('=')
+    name = name.strip()
+    if name not in rules.HouseRules._fields:
+        raise argparse.ArgumentTypeError(
+            'there is no house rule {}'.format(name))
+    convert = type(getattr(rules.STANDARD, name))
+    return name, [convert(v) for v in values.split(',')]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Play bots against each other under different house rules')
+    parser.add_argument('strategies', nargs='+',
+        choices=sorted(bots.STRATEGIES.keys()),
+        help='the bot strategy for each seat')
+    parser.add_argument('--vary', type=parse_values, action='append',
+        default=[], metavar='NAME=VALUE,VALUE,...',
+        help='a house rule and the values to try it with ({}); every '
+        'combination of them is played'.format(
+            ', '.join(rules.HouseRules._fields)))
+    parser.add_argument('-n', '--games', type=int, default=1000,
+        help='games to play for each combination')
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-turns', type=int, default=1000)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    args = parser.parse_args()
+
+    if len(args.strategies) < 2:
+        parser.error('a game needs at least two players')
+
+    values = dict(args.vary)
+    names = sorted(values)
+    strategy_names = sorted(set(args.strategies))
+    print ' '.join(['{:>14}'.format(n) for n in names] +
+        ['{:>20}'.format(s + ' wins') for s in strategy_names] +
+        ['{:>10} {:>10}'.format('unfinished', 'turns')])
+
+    for point, summary, cached in run_sweep(args.strategies,
+            grid(values), args.games, ResultCache(args.cache_dir),
+            workers=args.workers, chunk_size=args.chunk_size, seed=args.seed,
+            max_turns=args.max_turns):
+        columns = ['{:>14}'.format(getattr(point, n)) for n in names]
+        for s in strategy_names:
+            rate, low, high = summary.win_rate(s)
+            columns.append('{:>6.1%} ({:>5.1%}-{:>5.1%})'.format(rate, low,
+                high))
+        columns.append('{:>10.1%} {:>10.1f}'.format(
+            float(summary.unfinished) / max(summary.games, 1),
+            summary.lengths.mean))
+        if cached:
+            columns.append('(cached)')
+        print ' '.join(columns)
+
+if __name__ == "__main__":
+    sys.exit(main())
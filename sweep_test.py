@@ -0,0 +1,58 @@
+#!/usr/bin/python
+
+import shutil
+import sys
+import tempfile
+import unittest
+
+import rules
+import sweep
+
+class SweepTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = sweep.ResultCache(self.dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def sweep(self, values):
+        return list(sweep.run_sweep(['buyer', 'cautious'], sweep.grid(values),
+            6, self.cache, workers=1, max_turns=100))
+
+    def test_grid(self):
+        points = sweep.grid({'go_salary': [100, 200], 'jail_fine': [50, 75]})
+        self.assertEqual(len(points), 4)
+        self.assertIn(rules.STANDARD._replace(go_salary=100, jail_fine=75),
+            points)
+        self.assertEqual(sweep.grid({}), [rules.STANDARD])
+
+    def test_cache_key(self):
+        key = sweep.cache_key(rules.STANDARD, 'board', ['a', 'b'], 10, 0, 100)
+        self.assertEqual(key, sweep.cache_key(rules.STANDARD._replace(),
+            'board', ['a', 'b'], 10, 0, 100))
+        for changed in [
+                (rules.STANDARD._replace(jail_fine=60), 'board', ['a', 'b'],
+                    10, 0, 100),
+                (rules.STANDARD, 'other board', ['a', 'b'], 10, 0, 100),
+                (rules.STANDARD, 'board', ['b', 'a'], 10, 0, 100),
+                (rules.STANDARD, 'board', ['a', 'b'], 11, 0, 100)]:
+            self.assertNotEqual(key, sweep.cache_key(*changed))
+
+    def test_only_new_points_played(self):
+        first = self.sweep({'go_salary': [100, 200]})
+        self.assertEqual([cached for _, _, cached in first], [False, False])
+        self.assertEqual(first[0][1].games, 6)
+
+        second = self.sweep({'go_salary': [100, 200, 300]})
+        self.assertEqual([cached for _, _, cached in second],
+            [True, True, False])
+        self.assertEqual(second[0][1].report(), first[0][1].report())
+
+    def test_parse_values(self):
+        self.assertEqual(sweep.parse_values('mortgage_interest=0.1,0.2'),
+            ('mortgage_interest', [0.1, 0.2]))
+        self.assertRaises(Exception, sweep.parse_values, 'rent=1')
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
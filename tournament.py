@@ -0,0 +1,361 @@
+#!/usr/bin/python
+
+import argparse
+import collections
+import io
+import math
+import multiprocessing
+import sys
+import time
+
+import aggregate
+import bots
+import monop
+import replay
+import rng
+import rules
+import simulate
+
+# Each worker process loads the board once and plays all of its games on it
+_worker_board = None
+
+def _init_worker():
+    global _worker_board
+    _worker_board = monop.load_board()
+
+# A pool of workers to play games.  The board is loaded here first, so that
+# if it can't be the error comes out rather than the pool starting worker
+# after worker that fails to.
+def _start_pool(workers):
+    monop.load_board()
+    return multiprocessing.Pool(workers, initializer=_init_worker)
+
+# Game number n is played with its seat order rotated by n, so every strategy
+# gets its turn going first.  Its seed also comes from the game number, so the
+# same tournament plays out the same no matter how many workers it is split
+# over.
+def seat_order(strategy_names, game_num):
+    rotation = game_num % len(strategy_names)
+    return strategy_names[rotation:] + strategy_names[:rotation]
+
+# Plays some games by the house rules in rules_, returning their results, how
+# long they took, if record is set their replays, and if summary is set an
+# aggregate.Aggregator of them
+def _play_chunk(args):
+    strategy_names, first_game, num_games, seed, max_turns, record, \
+        summary, rules_ = args
+
+    out = recorder = None
+    if record:
+        out = io.BytesIO()
+        recorder = replay.ReplayWriter(out, magic=False)
+
+    num_tiles = len(_worker_board.tiles)
+    aggregator = None
+    if summary:
+        aggregator = aggregate.Aggregator(num_tiles, max_length=max_turns)
+
+    start = time.time()
+    results = []
+    for game_num in xrange(first_game, first_game + num_games):
+        names = seat_order(strategy_names, game_num)
+        strategies = [bots.STRATEGIES[n] for n in names]
+        tally = aggregate.GameTally(num_tiles) if summary else None
+        res = simulate.simulate(_worker_board, strategies,
+            seed=rng.child_seed(seed, game_num), max_turns=max_turns,
+            recorder=recorder, tally=tally, rules_=rules_)
+        results.append((game_num, res))
+        if aggregator is not None:
+            aggregator.add(names, res, tally)
+
+    return results, time.time() - start, out and out.getvalue(), aggregator
+
+# Keeps running totals of the games played so far, so results can be thrown
+# away as they come in.
+class TournamentStats(object):
+    def __init__(self, strategy_names):
+        self.strategy_names = strategy_names
+        self.games = 0
+        self.unfinished = 0
+        self.turns = 0
+        self.wins = collections.Counter()
+        self.elapsed = 0.0
+        # An aggregate.Aggregator of all the games, if one was asked for
+        self.summary = None
+
+    def add(self, game_num, res):
+        self.games += 1
+        self.turns += res.turns
+        if res.winner is None:
+            self.unfinished += 1
+        else:
+            names = seat_order(self.strategy_names, game_num)
+            self.wins[names[res.winner]] += 1
+
+    def win_rate(self, strategy_name):
+        if not self.games:
+            return 0.0
+        return float(self.wins[strategy_name]) / self.games
+
+    @property
+    def games_per_sec(self):
+        if not self.elapsed:
+            return 0.0
+        return self.games / self.elapsed
+
+# Plays num_games games between the given strategies.  If replay_stream is
+# given, a replay of every game is written to it (in the order they finish).
+# With summary set, the workers also keep an aggregate.Aggregator of their
+# games, which are merged into the stats' summary as they come in.  The games
+# are played by the house rules in rules_ (a rules.HouseRules), or the
+# standard ones.
+def run_tournament(strategy_names, num_games, workers=None, chunk_size=50,
+        seed=0, max_turns=1000, replay_stream=None, summary=False,
+        rules_=None):
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    chunks = []
+    for first_game in xrange(0, num_games, chunk_size):
+        chunks.append((strategy_names, first_game,
+            min(chunk_size, num_games - first_game), seed, max_turns,
+            replay_stream is not None, summary, rules_))
+
+    if replay_stream is not None:
+        replay_stream.write(replay.MAGIC)
+
+    stats = TournamentStats(strategy_names)
+
+    start = time.time()
+    pool = _start_pool(workers)
+    try:
+        for results, _, replays, aggregator in pool.imap_unordered(
+                _play_chunk, chunks):
+            for game_num, res in results:
+                stats.add(game_num, res)
+            if replays:
+                replay_stream.write(replays)
+            if aggregator is not None:
+                if stats.summary is None:
+                    stats.summary = aggregator
+                else:
+                    stats.summary.merge(aggregator)
+    finally:
+        pool.close()
+        pool.join()
+    stats.elapsed = time.time() - start
+
+    return stats
+
+# ======= Comparing two strategies =======
+
+# Sequential tests on how two strategies did against each other, looked at
+# after every batch of games.  Only the games somebody won count.  decide
+# gives the strategy that's better, as 0 for the first and 1 for the second,
+# EVEN if they're too close to tell apart, or None if it isn't decided yet.
+EVEN = 'even'
+
+# Wald's sequential probability ratio test of the first strategy winning
+# 0.5 + delta of the games against it winning 0.5 - delta, each wrongly
+# picked with a chance of at most 1 - confidence.  It never says EVEN: two
+# strategies closer than delta take longer to decide, and either may be
+# picked.
+class SPRT(object):
+    def __init__(self, delta=0.05, confidence=0.95):
+        p0, p1 = 0.5 - delta, 0.5 + delta
+        error = 1.0 - confidence
+        self.upper = math.log((1 - error) / error)
+        self.lower = -self.upper
+        self.win = math.log(p1 / p0)
+        self.loss = math.log((1 - p1) / (1 - p0))
+
+    # The log likelihood ratio of the first strategy being the better one
+    def llr(self, wins, losses):
+        return wins * self.win + losses * self.loss
+
+    def decide(self, wins, losses):
+        llr = self.llr(wins, losses)
+        if llr >= self.upper:
+            return 0
+        if llr <= self.lower:
+            return 1
+        return None
+
+# Keeps going until the confidence interval of the first strategy's share of
+# the wins is clear of a half, or is so narrow (no more than delta either
+# side) that it makes no difference.  Looking after every batch makes it
+# wrong a bit more often than the confidence says; SPRT doesn't have that
+# problem.
+class IntervalTest(object):
+    def __init__(self, delta=0.05, confidence=0.95):
+        self.delta = delta
+        self.z = aggregate.z_score(confidence)
+
+    def decide(self, wins, losses):
+        low, high = aggregate.wilson_interval(wins, wins + losses, self.z)
+        if low > 0.5:
+            return 0
+        if high < 0.5:
+            return 1
+        if wins + losses and high - low <= 2 * self.delta:
+            return EVEN
+        return None
+
+SEQUENTIAL_TESTS = {
+    'sprt': SPRT,
+    'interval': IntervalTest,
+}
+
+# Plays two strategies against each other in batches of batch_size games,
+# with the seats taking turns going first, and stops as soon as test (one of
+# the tests above) decides which is better, or after max_games.  The stats
+# that come back say which in decision, along with how many batches it took.
+# The same seed always plays the same games, however many workers they're
+# played on.
+def run_comparison(strategy_names, test, batch_size=100, max_games=100000,
+        workers=None, chunk_size=25, seed=0, max_turns=1000, rules_=None):
+    if len(set(strategy_names)) != 2 or len(strategy_names) != 2:
+        raise ValueError('Only two different strategies can be compared')
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    stats = TournamentStats(strategy_names)
+    stats.decision = None
+    stats.batches = 0
+
+    start = time.time()
+    pool = _start_pool(workers)
+    try:
+        while stats.decision is None and stats.games < max_games:
+            first, last = stats.games, min(stats.games + batch_size, max_games)
+            chunks = [(strategy_names, first_game,
+                min(chunk_size, last - first_game), seed, max_turns, False,
+                False, rules_) for first_game in xrange(first, last,
+                chunk_size)]
+            for results, _, _, _ in pool.imap_unordered(_play_chunk, chunks):
+                for game_num, res in results:
+                    stats.add(game_num, res)
+            stats.batches += 1
+
+            stats.decision = test.decide(stats.wins[strategy_names[0]],
+                stats.wins[strategy_names[1]])
+    finally:
+        pool.close()
+        pool.join()
+    stats.elapsed = time.time() - start
+
+    return stats
+
+def print_comparison(stats):
+    first, second = stats.strategy_names
+    wins, losses = stats.wins[first], stats.wins[second]
+    low, high = aggregate.wilson_interval(wins, wins + losses)
+    print '{} won {} and {} won {} of {} games ({} unfinished)'.format(first,
+        wins, second, losses, stats.games, stats.unfinished)
+    print '{} won {:.1%} of the finished ones (95% interval {:.1%} - {:.1%})' \
+        .format(first, float(wins) / max(wins + losses, 1), low, high)
+    if stats.decision is None:
+        verdict = 'Undecided'
+    elif stats.decision == EVEN:
+        verdict = 'Too close to call'
+    else:
+        verdict = '{} is better'.format(stats.strategy_names[stats.decision])
+    print '{} after {} games in {} batch{} ({:.2f}s)'.format(verdict,
+        stats.games, stats.batches, 'es' if stats.batches > 1 else '',
+        stats.elapsed)
+
+def print_stats(stats, workers, baseline=None):
+    print 'Played {} games in {:.2f}s ({:.1f} games/sec) on {} worker{}'.format(
+        stats.games, stats.elapsed, stats.games_per_sec, workers,
+        's' if workers > 1 else '')
+
+    if baseline is not None and baseline.games_per_sec:
+        speedup = stats.games_per_sec / baseline.games_per_sec
+        print 'One worker does {:.1f} games/sec, so that is {:.2f}x ' \
+            '({:.0%} scaling efficiency)'.format(baseline.games_per_sec,
+                speedup, speedup / workers)
+
+    print 'Average game length: {:.1f} turns'.format(
+        float(stats.turns) / max(stats.games, 1))
+    for name in sorted(set(stats.strategy_names)):
+        print '{:<12} wins {:>8} ({:.1%})'.format(name, stats.wins[name],
+            stats.win_rate(name))
+    print '{:<12}      {:>8} ({:.1%})'.format('unfinished', stats.unfinished,
+        float(stats.unfinished) / max(stats.games, 1))
+
+    if stats.summary is not None:
+        print
+        sys.stdout.write(stats.summary.report(monop.load_board()))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Play bots against each other on every core')
+    parser.add_argument('strategies', nargs='+',
+        choices=sorted(bots.STRATEGIES.keys()),
+        help='the bot strategy for each seat')
+    parser.add_argument('-n', '--games', type=int, default=1000)
+    parser.add_argument('-j', '--workers', type=int,
+        default=multiprocessing.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=50,
+        help='games handed to a worker at a time')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-turns', type=int, default=1000)
+    parser.add_argument('--replay', metavar='FILE',
+        help='write a replay of every game to FILE (see replay.py)')
+    parser.add_argument('--summary', action='store_true',
+        help='also count tile landings, rent and bankruptcies, and give '
+        'confidence intervals for the win rates')
+    parser.add_argument('--rules', type=rules.STANDARD.parse,
+        default=rules.STANDARD, metavar='NAME=VALUE,...',
+        help='house rules to change from the standard ones ({})'.format(
+            ', '.join(rules.HouseRules._fields)))
+    parser.add_argument('--until-decided', choices=sorted(SEQUENTIAL_TESTS),
+        help='compare two strategies in batches, stopping as soon as this '
+        'test decides which is better (or after --games games)')
+    parser.add_argument('--batch-size', type=int, default=200,
+        help='games between looks with --until-decided')
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--delta', type=float, default=0.05,
+        help='the smallest difference from an even share of the wins that '
+        'matters, with --until-decided')
+    parser.add_argument('--baseline-games', type=int, default=200,
+        help='games to play on one worker to work out scaling efficiency '
+        '(0 to skip)')
+    args = parser.parse_args()
+
+    if len(args.strategies) < 2:
+        parser.error('a game needs at least two players')
+
+    if args.until_decided:
+        if len(set(args.strategies)) != 2 or len(args.strategies) != 2:
+            parser.error('only two different strategies can be compared')
+        test = SEQUENTIAL_TESTS[args.until_decided](args.delta,
+            args.confidence)
+        print_comparison(run_comparison(args.strategies, test,
+            batch_size=args.batch_size, max_games=args.games,
+            workers=args.workers, chunk_size=args.chunk_size, seed=args.seed,
+            max_turns=args.max_turns, rules_=args.rules))
+        return
+
+    baseline = None
+    if args.baseline_games and args.workers > 1:
+        baseline = run_tournament(args.strategies, args.baseline_games,
+            workers=1, chunk_size=args.chunk_size, seed=args.seed,
+            max_turns=args.max_turns, rules_=args.rules)
+
+    replay_stream = None
+    if args.replay:
+        replay_stream = open(args.replay, 'wb')
+
+    try:
+        stats = run_tournament(args.strategies, args.games,
+            workers=args.workers, chunk_size=args.chunk_size, seed=args.seed,
+            max_turns=args.max_turns, replay_stream=replay_stream,
+            summary=args.summary, rules_=args.rules)
+    finally:
+        if replay_stream is not None:
+            replay_stream.close()
+    print_stats(stats, args.workers, baseline)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/python
+
+import os
+import sys
+import tempfile
+import unittest
+
+import tournament
+
+class TournamentTest(unittest.TestCase):
+    def test_seat_order(self):
+        names = ['a', 'b', 'c']
+        self.assertEqual(tournament.seat_order(names, 0), ['a', 'b', 'c'])
+        self.assertEqual(tournament.seat_order(names, 1), ['b', 'c', 'a'])
+        self.assertEqual(tournament.seat_order(names, 5), ['c', 'a', 'b'])
+
+    def test_run_tournament(self):
+        stats = tournament.run_tournament(['buyer', 'cautious'], 20,
+            workers=2, chunk_size=3)
+
+        self.assertEqual(stats.games, 20)
+        self.assertEqual(
+            stats.wins['buyer'] + stats.wins['cautious'] + stats.unfinished,
+            20)
+
+    # The board's files are found from anywhere, by the workers too
+    def test_other_directory(self):
+        cwd = os.getcwd()
+        os.chdir(tempfile.gettempdir())
+        try:
+            stats = tournament.run_tournament(['buyer', 'cautious'], 4,
+                workers=2, chunk_size=2, max_turns=100)
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(stats.games, 4)
+
+    def test_summary(self):
+        stats = tournament.run_tournament(['buyer', 'cautious'], 12,
+            workers=2, chunk_size=5, max_turns=300, summary=True)
+
+        self.assertEqual(stats.summary.games, 12)
+        self.assertEqual(stats.summary.unfinished, stats.unfinished)
+        self.assertEqual(stats.summary.strategy_wins['buyer'],
+            stats.wins['buyer'])
+
+    def test_sprt(self):
+        test = tournament.SPRT(delta=0.05, confidence=0.95)
+        self.assertIsNone(test.decide(6, 4))
+        self.assertEqual(test.decide(60, 40), 0)
+        self.assertEqual(test.decide(40, 60), 1)
+        self.assertIsNone(test.decide(500, 500))
+
+    def test_interval_test(self):
+        test = tournament.IntervalTest(delta=0.05, confidence=0.95)
+        self.assertIsNone(test.decide(0, 0))
+        self.assertIsNone(test.decide(6, 4))
+        self.assertEqual(test.decide(80, 40), 0)
+        self.assertEqual(test.decide(40, 80), 1)
+        self.assertEqual(test.decide(500, 500), tournament.EVEN)
+
+    def test_run_comparison(self):
+        test = tournament.SPRT(delta=0.1)
+        stats = tournament.run_comparison(['buyer', 'cautious'], test,
+            batch_size=30, max_games=300, workers=1, max_turns=300)
+
+        self.assertEqual(stats.decision, 0)
+        self.assertTrue(stats.games < 300)
+        self.assertEqual(stats.games, 30 * stats.batches)
+
+        # Split up differently, it's the same games
+        other = tournament.run_comparison(['buyer', 'cautious'], test,
+            batch_size=30, max_games=300, workers=2, chunk_size=7,
+            max_turns=300)
+        self.assertEqual((other.games, other.wins), (stats.games, stats.wins))
+
+        self.assertRaises(ValueError, tournament.run_comparison,
+            ['buyer', 'buyer'], test)
+
+    def test_workers_dont_change_results(self):
+        stats1 = tournament.run_tournament(['buyer', 'cautious'], 10,
+            workers=1, chunk_size=10, seed=4)
+        stats2 = tournament.run_tournament(['buyer', 'cautious'], 10,
+            workers=2, chunk_size=3, seed=4)
+
+        self.assertEqual(stats1.wins, stats2.wins)
+        self.assertEqual(stats1.turns, stats2.turns)
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())
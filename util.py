@@ -3,17 +3,17 @@ import sys
 
 # This Roll class is subclassing the int class, that way it can be treated like
 # an int in almost all cases, but we retain what the roll is so we can print it
-# properly
+# properly.  Rolls are shared (see roll_two_dice), so don't change them.
 class Roll(int):
+    __slots__ = ('values',)
+
     def __new__(cls, *args):
-        values = list(args)
-        value = reduce(lambda x, y: x + y, values)
-        obj = super(Roll, cls).__new__(cls, value)
-        obj.values = values
+        obj = super(Roll, cls).__new__(cls, sum(args))
+        obj.values = args
         return obj
 
     def is_doubles(self):
-        return len(self.values) == 2 and len(set(self.values)) == 1
+        return len(self.values) == 2 and self.values[0] == self.values[1]
 
     def __str__(self):
         return ', '.join([str(v) for v in self.values])
@@ -27,8 +27,115 @@ def roll_dice(n_dice, n_sides=6):
 def roll_one_die():
     return roll_dice(n_dice=1)
 
+# Every possible roll of two dice, made up front so rolling doesn't have to
+# make a new one each time.  TWO_DICE_ROLLS[a - 1][b - 1] is rolling a and b.
+TWO_DICE_ROLLS = tuple(tuple(Roll(a, b) for b in xrange(1, 7))
+    for a in xrange(1, 7))
+
 def roll_two_dice():
-    return roll_dice(n_dice=2)
+    rand = random.random
+    return TWO_DICE_ROLLS[int(rand() * 6)][int(rand() * 6)]
+
+# A set of commands to answer ask_cmd with, names mapped to the callbacks they
+# run, made ready to look answers up in.  Answers don't have to match the case
+# of the name, and can be cut short as long as only one command starts that
+# way.  The default command is what an empty answer picks.
+#
+# The names go into a trie with an edge for both cases of every letter, and
+# each node knows which command an answer ending there picks, so looking one
+# up only takes as long as the answer is, without making anything.  Make a
+# table once for commands that don't change rather than a dict every time.
+class CommandTable(object):
+    __slots__ = ('commands', 'default', 'help', '_root', '_extended',
+        '__weakref__')
+
+    def __init__(self, commands, default=None):
+        assert '' not in commands, 'Empty string is not a valid command'
+        if default:
+            assert default in commands, '%s not a valid option' % default
+
+        self.commands = dict(commands)
+        self.default = default
+
+        options = list(self.commands)
+        if default:
+            options.remove(default)
+            options.append(default + ' (default)')
+        self.help = 'Valid inputs are: ' + ', '.join(sorted(options)) + '\n'
+
+        # Each node is [children by letter, the callbacks of the commands
+        # below it], until the commands are swapped for the one it picks
+        root = [{}, []]
+        nodes = [root]
+        for name, cb in sorted(self.commands.iteritems()):
+            node = root
+            node[1].append(cb)
+            for c in name.lower():
+                child = node[0].get(c)
+                if child is None:
+                    child = [{}, []]
+                    node[0][c] = node[0][c.upper()] = child
+                    nodes.append(child)
+                node = child
+                node[1].append(cb)
+            # Whole names go first, so a name picks its command even when
+            # other names start with it
+            node[1].insert(0, (cb,))
+
+        for node in nodes:
+            cbs = node[1]
+            if cbs and type(cbs[0]) is tuple:
+                node[1] = cbs[0][0]
+            elif len(cbs) == 1:
+                node[1] = cbs[0]
+            else:
+                node[1] = None
+        if default:
+            root[1] = self.commands[default]
+        self._root = root
+
+        # Tables this one has been extended by, and what that made
+        self._extended = {}
+
+    def __contains__(self, name):
+        return name in self.commands
+
+    # The callback answer picks, or None if it doesn't pick just one
+    def lookup(self, answer):
+        node = self._root
+        for c in answer:
+            node = node[0].get(c)
+            if node is None:
+                return None
+        return node[1]
+
+    # This table with other's commands added on, overriding any with the same
+    # names
+    def merged(self, other):
+        commands = dict(self.commands)
+        commands.update(other.commands)
+        return CommandTable(commands, self.default)
+
+    # merged, but only made the first time.  The result is kept in this table
+    # for as long as it lives, so other mustn't be anything that should go
+    # away sooner (like a game's commands added to a table shared between
+    # games); keep those somewhere that goes away with them instead.
+    def extended(self, other):
+        table = self._extended.get(other)
+        if table is None:
+            table = self._extended[other] = self.merged(other)
+        return table
+
+def as_command_table(commands, default=None):
+    if isinstance(commands, CommandTable):
+        return commands
+    return CommandTable(commands, default)
+
+YES_NO = CommandTable({'yes': lambda: True, 'no': lambda: False})
+
+# What the done command of ask_cmd_until_done gives back
+_done = object()
+DONE = CommandTable({'done': lambda: _done})
 
 # This is an abstract class that represents some way of communicating with the
 # player over text.  Subclasses should implement tell and ask.
@@ -48,82 +155,120 @@ class InputOutput(object):
             return n
 
     def ask_yn_question(self, msg, commands=None):
-        if commands is None:
-            commands = {}
-        response = [False]
-        yes = [False]
-        def answer_yes():
-            yes[0] = True
-            response[0] = True
-        def answer_no():
-            yes[0] = False
-            response[0] = True
+        table = YES_NO
+        if commands:
+            table = as_command_table(commands).extended(YES_NO)
 
-        commands['yes'] = answer_yes
-        commands['no'] = answer_no
-
-        while not response[0]:
-            self.ask_cmd(msg, commands)
-
-        return yes[0]
+        # Anything else that was asked for gets done and the question is
+        # asked again
+        while True:
+            answer = self.ask_cmd(msg, table)
+            if answer is not None:
+                return answer
 
     def ask_cmd_until_done(self, msg, commands):
-        done = [False]
-        def finish():
-            done[0] = finish
+        table = as_command_table(commands)
+        assert 'done' not in table
+        table = table.extended(DONE)
 
-        assert 'done' not in commands
-        commands['done'] = finish
-
-        while not done[0]:
-            self.ask_cmd(msg, commands)
+        while self.ask_cmd(msg, table) is not _done:
+            pass
 
+    # Asks until the answer picks one of commands, a CommandTable or a dict of
+    # them to make one from, and returns what its callback does
     def ask_cmd(self, msg, commands, default=None):
-        assert '' not in commands, 'Empty string is not a valid command'
-
-        if default:
-            assert default in commands, '%s not a valid option' % default
-            commands[''] = commands[default]
-
-        # Sort and replace empty string with <RETURN>
-        options = list(commands.keys())
-        if default:
-            options.remove(default)
-            options.remove('')
-            options.append(default + ' (default)')
-        options = sorted(options)
+        table = as_command_table(commands, default)
 
         while True:
             res = self.ask(msg)
 
             if res == '?':
-                self.tell("Valid inputs are: " + ', '.join(options) + '\n')
+                self.tell(table.help)
                 continue
 
-            found = []
-            for cmd, cb in commands.iteritems():
-                # fuzzy match.
-                if cmd.lower().startswith(res.lower()):
-                    found.append(cb)
-                # exact match, remove others and go with this.
-                if cmd.lower() == res.lower():
-                    found = [cb]
-                    break
-
-            if not found or len(found) > 1:
+            cb = table.lookup(res)
+            if cb is None:
                 self.tell('Illegal response: "{}".'.format(res) +
                 "  Use '?' to get a list of valid answers\n")
             else:
-                found[0]()
-                break
+                return cb()
 
     def tell(self, _msg):
         # Meant to be implemented by subclasses
         pass
 
+    # Makes sure everything told so far has gone out.  Only needed by
+    # subclasses that hold on to what's told.
+    def flush(self):
+        pass
+
+class UnexpectedAskError(Exception):
+    pass
+
+# Used for games where nobody is listening, like bot only simulations.  Telling
+# does nothing, and since there is no-one to answer, asking is an error.
+class NullInputOutput(InputOutput):
+    def ask(self, msg):
+        raise UnexpectedAskError(msg)
+
+    def tell(self, _msg):
+        pass
+
+# Talks to whoever is at the terminal.  What's told is written to stream,
+# stdout if it isn't given, and questions are always asked on stdout.
 class CliInputOutput(InputOutput):
+    def __init__(self, stream=None):
+        self.stream = stream
+
     def ask(self, msg):
+        self.flush()
         return raw_input(msg)
 
     def tell(self, msg):
-        sys.stdout.write(msg)
+        (self.stream or sys.stdout).write(msg)
+
+    def flush(self):
+        (self.stream or sys.stdout).flush()
+
+# Wraps another InputOutput, holding on to what's told and passing it on in
+# one go: along with the next question, whenever threshold characters of it
+# have built up, or when flushed.  Printing the board is hundreds of little
+# tells, each of which would otherwise be a write of its own to a terminal,
+# pipe or socket.  Flush it once there's nothing more to be told.
+#
+# What's told is held as utf-8, since tile names come from json as unicode
+# but player names are typed in as bytes, and the two can't be joined up if
+# the bytes aren't ascii.
+class BufferedInputOutput(InputOutput):
+    def __init__(self, inout, threshold=8192):
+        self.inout = inout
+        self.threshold = threshold
+        self.told = []
+        self.size = 0
+
+    def ask(self, msg):
+        return self.inout.ask(self._take() + _utf8(msg))
+
+    def tell(self, msg):
+        msg = _utf8(msg)
+        self.told.append(msg)
+        self.size += len(msg)
+        if self.size >= self.threshold:
+            self.inout.tell(self._take())
+
+    def flush(self):
+        if self.told:
+            self.inout.tell(self._take())
+        self.inout.flush()
+
+    # Everything told since last time, as one string
+    def _take(self):
+        if not self.told:
+            return ''
+        msg = ''.join(self.told)
+        self.told = []
+        self.size = 0
+        return msg
+
+def _utf8(msg):
+    return msg.encode('utf-8') if isinstance(msg, unicode) else msg
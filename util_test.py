@@ -1,8 +1,10 @@
 #!/usr/bin/python
 
+import StringIO
 import sys
 import unittest
 
+import util
 from util import Roll
 from monop_testing import TestInputOutput
 
@@ -82,6 +84,30 @@ class MonopolyUtilTest(unittest.TestCase):
         self.answers = ['derp', 'True', 'False', 'No']
         self.ask_yn_question_test(False)
 
+    def test_ask_yn_question_other_commands(self):
+        printed = []
+        self.answers = ['print', 'n']
+        answer = self.inout.ask_yn_question(self.expected_prompt,
+            {'print': lambda: printed.append(True)})
+        self.assertFalse(answer)
+        self.assertEqual(printed, [True])
+
+    def test_ask_cmd_until_done(self):
+        called = []
+        self.answers = ['a', 'A', 'd']
+        self.inout.ask_cmd_until_done(self.expected_prompt,
+            {'apple': lambda: called.append(1)})
+        self.assertEqual(called, [1, 1])
+
+    def test_ask_cmd_help(self):
+        self.answers = ['?', '']
+        table = util.CommandTable({'roll': lambda: 'rolled',
+            'pay': lambda: None}, default='roll')
+        self.assertEqual(self.inout.ask_cmd(self.expected_prompt, table),
+            'rolled')
+        self.assertEqual(self.inout.output,
+            'Valid inputs are: pay, roll (default)\n')
+
     def test_roll(self):
         r = Roll(1)
         self.assertEqual(r, 1)
@@ -95,5 +121,114 @@ class MonopolyUtilTest(unittest.TestCase):
         self.assertTrue(Roll(34, 34).is_doubles())
         self.assertFalse(Roll(34, 12).is_doubles())
 
+    def test_roll_two_dice(self):
+        for _ in xrange(100):
+            r = util.roll_two_dice()
+            self.assertEqual(len(r.values), 2)
+            self.assertEqual(r, sum(r.values))
+            self.assertTrue(2 <= r <= 12)
+
+            # Rolls come from a table rather than being made each time
+            a, b = r.values
+            self.assertIs(r, util.TWO_DICE_ROLLS[a - 1][b - 1])
+
+class CommandTableTest(unittest.TestCase):
+    def setUp(self):
+        self.commands = dict((name, lambda name=name: name)
+            for name in ['mortgage', 'unmortgage', 'buy houses', 'buy',
+                'Boardwalk'])
+        self.table = util.CommandTable(self.commands)
+
+    def lookup(self, answer):
+        cb = self.table.lookup(answer)
+        return cb and cb()
+
+    def test_exact(self):
+        self.assertEqual(self.lookup('mortgage'), 'mortgage')
+        self.assertEqual(self.lookup('unmortgage'), 'unmortgage')
+
+    def test_prefix(self):
+        self.assertEqual(self.lookup('m'), 'mortgage')
+        self.assertEqual(self.lookup('buy h'), 'buy houses')
+        self.assertEqual(self.lookup('bo'), 'Boardwalk')
+
+    def test_case(self):
+        self.assertEqual(self.lookup('MORT'), 'mortgage')
+        self.assertEqual(self.lookup('boardWALK'), 'Boardwalk')
+
+    def test_whole_name_beats_longer_names(self):
+        self.assertEqual(self.lookup('buy'), 'buy')
+
+    def test_no_match(self):
+        self.assertIsNone(self.lookup('b'))
+        self.assertIsNone(self.lookup('x'))
+        self.assertIsNone(self.lookup('mortgages'))
+        self.assertIsNone(self.lookup(''))
+
+    def test_empty_answer(self):
+        self.assertEqual(util.CommandTable(self.commands, default='buy')
+            .lookup('')(), 'buy')
+        self.assertEqual(util.CommandTable({'only': lambda: 1}).lookup('')(),
+            1)
+
+    def test_extended(self):
+        extra = util.CommandTable({'quit': lambda: 'quit',
+            'buy': lambda: 'other buy'})
+        table = self.table.extended(extra)
+
+        self.assertIs(self.table.extended(extra), table)
+        self.assertEqual(table.lookup('q')(), 'quit')
+        self.assertEqual(table.lookup('buy')(), 'other buy')
+        self.assertIsNone(self.table.lookup('q'))
+        self.assertNotIn('quit', self.commands)
+
+class BufferedInputOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.inner = TestInputOutput()
+        self.told = []
+        tell = self.inner.tell
+        def counting_tell(msg):
+            self.told.append(msg)
+            tell(msg)
+        self.inner.tell = counting_tell
+        self.asked = []
+        def ans(msg):
+            self.asked.append(msg)
+            return 'yes'
+        self.inner.set_ask_callback(ans)
+        self.inout = util.BufferedInputOutput(self.inner, threshold=10)
+
+    def test_sent_with_question(self):
+        self.inout.tell('a')
+        self.inout.tell('b')
+        self.assertEqual(self.told, [])
+        self.assertEqual(self.inout.ask('? '), 'yes')
+        self.assertEqual(self.asked, ['ab? '])
+        self.assertEqual(self.told, [])
+
+    def test_threshold(self):
+        for _ in xrange(6):
+            self.inout.tell('xx')
+        self.assertEqual(self.told, ['x' * 10])
+        self.inout.flush()
+        self.assertEqual(self.told, ['x' * 10, 'xx'])
+        self.inout.flush()
+        self.assertEqual(len(self.told), 2)
+
+    def test_cli(self):
+        stream = StringIO.StringIO()
+        inout = util.BufferedInputOutput(util.CliInputOutput(stream))
+        inout.tell('one ')
+        inout.tell(u'two')
+        self.assertEqual(stream.getvalue(), '')
+        inout.flush()
+        self.assertEqual(stream.getvalue(), 'one two')
+
+    def test_unicode_and_utf8(self):
+        self.inout.tell(u'\u2014 ')
+        self.inout.tell('zo\xc3\xab')
+        self.assertEqual(self.inout.ask(u' (1)? '), 'yes')
+        self.assertEqual(self.asked, ['\xe2\x80\x94 zo\xc3\xab (1)? '])
+
 if __name__ == "__main__":
     sys.exit(unittest.main())
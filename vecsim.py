@@ -0,0 +1,749 @@
+#!/usr/bin/python
+
+import argparse
+import collections
+import sys
+import time
+
+import numpy as np
+
+import board
+import bots
+import cards
+import monop
+import rng
+import rules
+import simulate
+import util
+
+# A second game engine for playing a lot of bot games at once.  The state of
+# every game lives in numpy arrays with a row per game, and each step has one
+# turn in every game still going, so the work per turn is a few dozen array
+# operations no matter how many games there are.
+#
+# It plays by exactly the same rules as the object engine (game.py, board.py,
+# cards.py and bots.py), on the same board and cards, and only for bots (the
+# reserve and pays_jail knobs of bots.BotMonopolyPlayer are all a strategy can
+# be made of).  Given the same dice and card draws, a game goes exactly the
+# same way in both; see ScriptedRandom and ScriptedGameRandom.
+#
+# Anything that changes the rules there needs to be changed here too.
+
+NO_ONE = -1
+
+# What each tile does when landed on
+OTHER, PROPERTY, RAILROAD, UTILITY, CARD, GOTO_JAIL = range(6)
+
+# What each card does
+NOTHING, MONEY, PLAYERS_MONEY, JAIL_CARD, REPAIRS, GO_TO_JAIL, ADVANCE, \
+    ADVANCE_TO, MOVE_BACK = range(9)
+
+# Everything about a board that the engine needs, as arrays indexed by tile,
+# for games played by rules_ (a rules.HouseRules)
+class VecBoard(object):
+    def __init__(self, b, rules_=rules.STANDARD):
+        n = len(b.tiles)
+        self.num_tiles = n
+        self.jail_index = b.jail_tile.index
+
+        self.kind = np.zeros(n, np.int8)
+        self.cost = np.zeros(n, np.int64)
+        self.mortgage_value = np.zeros(n, np.int64)
+        self.unmortgage_cost = np.zeros(n, np.int64)
+        self.deck = np.full(n, -1, np.int8)
+
+        # Groups are numbered in board order, which is also the order bots
+        # build in
+        self.group = np.full(n, -1, np.int8)
+        self.group_tiles = []
+        self.buildable_groups = []
+        names = {}
+
+        for tile in b.tiles:
+            i = tile.index
+            if isinstance(tile, board.MonopolyBoardPropertyTile):
+                if isinstance(tile, board.MonopolyBoardRRTile):
+                    self.kind[i] = RAILROAD
+                elif isinstance(tile, board.MonopolyBoardUtilityTile):
+                    self.kind[i] = UTILITY
+                else:
+                    self.kind[i] = PROPERTY
+                self.cost[i] = tile.cost
+                # The same sums as MonopolyBoardPropertyTile.mortgage and
+                # unmortgage
+                self.mortgage_value[i] = tile.mortgage_value
+                self.unmortgage_cost[i] = rules_.unmortgage_cost(tile)
+
+                if tile.monopoly not in names:
+                    names[tile.monopoly] = len(self.group_tiles)
+                    self.group_tiles.append([])
+                    if tile.rents:
+                        self.buildable_groups.append(names[tile.monopoly])
+                self.group[i] = names[tile.monopoly]
+                self.group_tiles[names[tile.monopoly]].append(i)
+            elif isinstance(tile, board.MonopolyBoardCCTile):
+                self.kind[i] = CARD
+                self.deck[i] = 0
+            elif isinstance(tile, board.MonopolyBoardChanceTile):
+                self.kind[i] = CARD
+                self.deck[i] = 1
+            elif isinstance(tile, board.MonopolyBoardGotoJailTile):
+                self.kind[i] = GOTO_JAIL
+
+        # The tiles' rent tables (see MonopolyBoardPropertyTile.rent_level),
+        # padded out with zeros
+        props = [t for t in b.tiles
+            if isinstance(t, board.MonopolyBoardPropertyTile)]
+        levels = max([len(t.rent_table) for t in props] + [1])
+        self.rent_table = np.zeros((n, levels), np.int64)
+        for tile in props:
+            self.rent_table[tile.index, :len(tile.rent_table)] = \
+                tile.rent_table
+
+        # nearest[kind, t] is the first tile of that kind (RAILROAD or
+        # UTILITY) ahead of t, or -1 if there aren't any; see
+        # MonopolyBoard.nearest_tile
+        self.nearest = np.full((GOTO_JAIL + 1, n), -1, np.int64)
+        for kind, cls in [(RAILROAD, board.MonopolyBoardRRTile),
+                (UTILITY, board.MonopolyBoardUtilityTile)]:
+            for i in xrange(n):
+                tile = b.nearest_tile(cls, i)
+                if tile is not None:
+                    self.nearest[kind, i] = tile.index
+
+        self.group_tiles = [np.array(t) for t in self.group_tiles]
+        self.group_size = np.zeros(n, np.int64)
+        self.same_group = np.zeros((n, n), bool)
+        for tiles in self.group_tiles:
+            self.group_size[tiles] = len(tiles)
+            self.same_group[np.ix_(tiles, tiles)] = True
+
+        # Decks, by the deck numbers above, with the cards numbered in the
+        # order they come in the definition (the games shuffle them)
+        decks = [b.definition.cc_cards, b.definition.chance_cards]
+        self.deck_size = np.array([len(deck) for deck in decks])
+        size = max(self.deck_size.max(), 1)
+        self.card_kind = np.zeros((2, size), np.int8)
+        self.card_amount = np.zeros((2, size), np.int64)
+        for d, deck in enumerate(decks):
+            for i, card in enumerate(deck):
+                self.card_kind[d, i], self.card_amount[d, i] = _card_action(card)
+        # The get out of jail free card in each deck, which is what goes back
+        # in it when one is used
+        self.jail_card = np.array([list(kinds).index(JAIL_CARD)
+            if JAIL_CARD in kinds else -1 for kinds in self.card_kind])
+
+def _card_action(card):
+    if isinstance(card, cards.MonopolyMonetaryCard):
+        return MONEY, card.amount
+    elif isinstance(card, cards.MonopolyMonetaryPlayersCard):
+        return PLAYERS_MONEY, card.amount
+    elif isinstance(card, cards.MonopolyGetOutOfJailCard):
+        return JAIL_CARD, 0
+    elif isinstance(card, cards.MonopolyTaxCard):
+        return REPAIRS, 0
+    elif isinstance(card, cards.MonopolyGoToJailCard):
+        return GO_TO_JAIL, 0
+    elif isinstance(card, cards.MonopolyAdvanceCard):
+        return ADVANCE, card.tile_index
+    elif isinstance(card, cards.MonopolyAdvanceToTileTypeCard):
+        if card.tile_type is board.MonopolyBoardRRTile:
+            return ADVANCE_TO, RAILROAD
+        elif card.tile_type is board.MonopolyBoardUtilityTile:
+            return ADVANCE_TO, UTILITY
+    elif isinstance(card, cards.MonopolyMoveBackCard):
+        return MOVE_BACK, card.num_spaces
+    raise ValueError("Don't know what a {} does".format(type(card).__name__))
+
+# Where the dice rolls and card draws come from.  rolls gives a roll (0 to 35,
+# (die1 - 1) * 6 + die2 - 1) for each of the given games, which are on the
+# given roll, and draws gives a number from 0 to 1 for shuffling the cards in
+# each of the given games, which are on the given draw.
+class VecRandom(object):
+    def __init__(self, seed=None):
+        self.random = np.random.RandomState(seed)
+
+    def rolls(self, games, _roll_nums):
+        return self.random.randint(0, 36, len(games))
+
+    def draws(self, games, _draw_nums):
+        return self.random.random_sample(len(games))
+
+# Dice and draws read out of tables, so the same ones can be given to the
+# object engine (see ScriptedGameRandom).  dice[game, n] is the nth roll and
+# draws[game, n] is the nth draw.  There's a roll for every turn, and another
+# for every time a card sends someone to a utility someone else owns.
+class ScriptedRandom(object):
+    def __init__(self, dice, draws):
+        self.dice = dice
+        self.draws_table = draws
+
+    @classmethod
+    def make(cls, num_games, max_turns, max_draws=None, max_rolls=None,
+            seed=None):
+        if max_draws is None:
+            max_draws = max_turns
+        if max_rolls is None:
+            max_rolls = 2 * max_turns
+        r = np.random.RandomState(seed)
+        return cls(r.randint(0, 36, (num_games, max_rolls)),
+            r.random_sample((num_games, max_draws)))
+
+    def rolls(self, games, roll_nums):
+        return self.dice[games, roll_nums]
+
+    def draws(self, games, draw_nums):
+        return self.draws_table[games, draw_nums]
+
+    # A stand in for rng.GameRandom that plays game number game of these
+    # tables in the object engine
+    def game_random(self, game):
+        return ScriptedGameRandom(self.dice[game], self.draws_table[game])
+
+class ScriptedGameRandom(object):
+    def __init__(self, dice, draws):
+        self.seed = None
+        self.dice = dice
+        self.draws = draws
+        self.next_roll = 0
+        self.next_draw = 0
+
+    def roll_two_dice(self):
+        roll = int(self.dice[self.next_roll])
+        self.next_roll += 1
+        return util.TWO_DICE_ROLLS[roll // 6][roll % 6]
+
+    def draw_index(self, n):
+        u = float(self.draws[self.next_draw])
+        self.next_draw += 1
+        return int(u * n)
+
+    def shuffle(self, seq):
+        rng.shuffle_by_draws(self, seq)
+
+    def getstate(self):
+        return self.next_roll, self.next_draw
+
+    def setstate(self, state):
+        self.next_roll, self.next_draw = state
+
+# Like simulate.GameResult, but with an array of each for all the games.  A
+# winner of NO_ONE means the game wasn't won.
+VecResults = collections.namedtuple('VecResults',
+    ['winner', 'turns', 'net_worths'])
+
+class VecGames(object):
+    def __init__(self, b, strategies, num_games, random=None, max_turns=1000,
+            rules_=None):
+        self.rules = rules_ if rules_ is not None else rules.STANDARD
+        self.board = VecBoard(b, self.rules)
+        self.random = random if random is not None else VecRandom()
+        self.max_turns = max_turns
+
+        for strategy in strategies:
+            if not issubclass(strategy, bots.BotMonopolyPlayer):
+                raise ValueError('Only bots can be simulated')
+        seats = len(strategies)
+        self.seats = seats
+        self.reserve = np.array([s.reserve for s in strategies], np.int64)
+        self.pays_jail = np.array([s.pays_jail for s in strategies], bool)
+
+        n, t = num_games, self.board.num_tiles
+        self.num_games = n
+
+        self.money = np.full((n, seats), self.rules.starting_cash, np.int64)
+        self.position = np.zeros((n, seats), np.int64)
+        self.alive = np.ones((n, seats), bool)
+        self.turns_in_jail = np.zeros((n, seats), np.int64)
+        self.num_doubles = np.zeros((n, seats), np.int64)
+
+        self.owner = np.full((n, t), NO_ONE, np.int8)
+        self.houses = np.zeros((n, t), np.int8)
+        self.mortgaged = np.zeros((n, t), bool)
+        # When each tile was bought, which orders a player's holdings
+        self.bought = np.zeros((n, t), np.int64)
+        self.num_bought = np.zeros(n, np.int64)
+
+        self.current = np.zeros(n, np.int64)
+        self.turns = np.zeros(n, np.int64)
+        self.num_rolls = np.zeros(n, np.int64)
+        self.num_draws = np.zeros(n, np.int64)
+        self.winner = np.full(n, NO_ONE, np.int64)
+
+        # Each game's decks (see cards.Deck) as rings of card numbers:
+        # deck_order[g, d] has deck_count[g, d] cards in it, the top one at
+        # deck_top[g, d].  Get out of jail free cards that players hold are
+        # out of the deck, and held[g, p, d] is how many player p has from
+        # deck d.
+        size = self.board.card_kind.shape[1]
+        self.deck_order = np.tile(np.arange(size), (n, 2, 1))
+        self.deck_top = np.zeros((n, 2), np.int64)
+        self.deck_count = np.tile(self.board.deck_size, (n, 1))
+        self.held = np.zeros((n, seats, 2), np.int64)
+        self._shuffle_decks()
+
+    @property
+    def playing(self):
+        return (self.winner == NO_ONE) & (self.turns < self.max_turns)
+
+    # Players' holdings in the order they were bought, as the tile indexes for
+    # each game, with the tiles that aren't wanted (mask is False) last.
+    # Returns them along with how many of each game's tiles are wanted.
+    def _in_holdings_order(self, g, mask):
+        order_by = np.where(mask, self.bought[g], np.iinfo(np.int64).max)
+        order = np.argsort(order_by, axis=1, kind='mergesort')
+        return order, mask.sum(axis=1)
+
+    def _owned_by(self, g, p):
+        return self.owner[g] == p[:, None]
+
+    # MonopolyPlayer.pay, with bots.BotMonopolyPlayer.out_of_money
+    def _pay(self, g, p, amount):
+        self.money[g, p] -= amount
+        broke = self.money[g, p] < 0
+        if broke.any():
+            self._out_of_money(g[broke], p[broke])
+
+    def _out_of_money(self, g, p):
+        b = self.board
+        mortgagable = self._owned_by(g, p) & ~self.mortgaged[g] & \
+            (self.houses[g] == 0)
+        order, _ = self._in_holdings_order(g, mortgagable)
+        rows = np.arange(len(g))[:, None]
+
+        wanted = mortgagable[rows, order]
+        value = np.where(wanted, b.mortgage_value[order], 0)
+        raised = value.cumsum(axis=1)
+        # Mortgage in order until the money is paid
+        take = wanted & (raised - value < -self.money[g, p][:, None])
+
+        gi = np.broadcast_to(g[:, None], take.shape)[take]
+        self.mortgaged[gi, order[take]] = True
+        self.money[g, p] += np.where(take, value, 0).sum(axis=1)
+
+        broke = self.money[g, p] < 0
+        if broke.any():
+            self._resign_to_bank(g[broke], p[broke])
+
+    def _resign_to_bank(self, g, p):
+        owned = self._owned_by(g, p)
+        gi = np.broadcast_to(g[:, None], owned.shape)[owned]
+        ti = np.nonzero(owned)[1]
+        self.owner[gi, ti] = NO_ONE
+        self.houses[gi, ti] = 0
+        self.mortgaged[gi, ti] = False
+
+        # Their jail cards go back in the decks, community chest first
+        for d in xrange(2):
+            held = self.held[g, p, d]
+            for _ in xrange(held.max() if len(g) else 0):
+                has = held > 0
+                self._put_back(g[has], np.full(has.sum(), d))
+                held -= has
+            self.held[g, p, d] = 0
+
+        self.money[g, p] = 0
+        self.alive[g, p] = False
+
+        won = self.alive[g].sum(axis=1) == 1
+        self.winner[g[won]] = np.argmax(self.alive[g[won]], axis=1)
+
+    def _leave_jail(self, g, p):
+        jailed = self.turns_in_jail[g, p] > 0
+        held = self.held[g, p]
+        card = jailed & (held.sum(axis=1) > 0)
+        # MonopolyPlayer.use_jail_card uses community chest ones first
+        d = np.where(held[card, 0] > 0, 0, 1)
+        self.held[g[card], p[card], d] -= 1
+        self._put_back(g[card], d)
+        self.turns_in_jail[g[card], p[card]] = 0
+
+        pays = jailed & ~card & self.pays_jail[p] & \
+            (self.money[g, p] - self.rules.jail_fine >= self.reserve[p])
+        self.money[g[pays], p[pays]] -= self.rules.jail_fine
+        self.turns_in_jail[g[pays], p[pays]] = 0
+
+    def _unmortgage_holdings(self, g, p):
+        b = self.board
+        mortgaged = self._owned_by(g, p) & self.mortgaged[g]
+        some = mortgaged.any(axis=1)
+        g, p, mortgaged = g[some], p[some], mortgaged[some]
+        if not len(g):
+            return
+
+        order, count = self._in_holdings_order(g, mortgaged)
+        for i in xrange(count.max()):
+            t = order[:, i]
+            cost = b.unmortgage_cost[t]
+            can = (i < count) & (self.money[g, p] - cost >= self.reserve[p])
+            self.money[g[can], p[can]] -= cost[can]
+            self.mortgaged[g[can], t[can]] = False
+
+    def _build(self, g, p):
+        b = self.board
+        price = self.rules.house_price
+        owned = self._owned_by(g, p) & ~self.mortgaged[g]
+        for group in b.buildable_groups:
+            tiles = b.group_tiles[group]
+            mine = owned[:, tiles].all(axis=1)
+            if not mine.any():
+                continue
+            gg, pp = g[mine], p[mine]
+
+            houses = self.houses[gg[:, None], tiles[None, :]].sum(axis=1)
+            affordable = np.maximum(
+                (self.money[gg, pp] - self.reserve[pp]) // price, 0)
+            built = np.minimum(5 * len(tiles) - houses, affordable)
+            some = built > 0
+            gg, pp, houses, built = gg[some], pp[some], houses[some], \
+                built[some]
+            if not len(gg):
+                continue
+
+            self.money[gg, pp] -= price * built
+
+            # Building evenly puts each house on the first of the tiles with
+            # the fewest in the order they were bought, so the first
+            # (houses % len(tiles)) of them have one more than the rest.
+            houses += built
+            bought = self.bought[gg[:, None], tiles[None, :]]
+            rank = (bought[:, None, :] < bought[:, :, None]).sum(axis=2)
+            per_tile = houses[:, None] // len(tiles) + \
+                (rank < (houses % len(tiles))[:, None])
+            self.houses[gg[:, None], tiles[None, :]] = per_tile
+
+    def _go_to_jail(self, g, p):
+        self.turns_in_jail[g, p] = 1
+        self.position[g, p] = self.board.jail_index
+
+    # The same lookup as MonopolyBoardPropertyTile.rent, working out the rent
+    # levels the way its update_rent_level does
+    def _rent(self, g, t, owner, roll):
+        b = self.board
+        kind = b.kind[t]
+        num_owned = (b.same_group[t] &
+            (self.owner[g] == owner[:, None])).sum(axis=1)
+        houses = self.houses[g, t]
+
+        level = np.where(houses > 0, houses + 1,
+            num_owned == b.group_size[t])
+        level = np.where(kind == PROPERTY, level, num_owned)
+        rent = b.rent_table[t, level]
+        rent = np.where(kind == UTILITY, rent * roll, rent)
+        return rent
+
+    # The next roll of the dice in each of games g, which mustn't repeat, as
+    # the number the roll is (0 to 35, see VecRandom)
+    def _roll(self, g):
+        roll = self.random.rolls(g, self.num_rolls[g])
+        self.num_rolls[g] += 1
+        return roll
+
+    # by_card is whether a MonopolyAdvanceToTileTypeCard sent each player
+    # there, which changes the rent they owe (see its rent); None for nobody
+    def _land_on_property(self, g, p, roll, by_card=None):
+        b = self.board
+        t = self.position[g, p]
+        owner = self.owner[g, t]
+
+        unowned = owner == NO_ONE
+        buys = unowned & (self.money[g, p] - b.cost[t] >= self.reserve[p])
+        gb, pb, tb = g[buys], p[buys], t[buys]
+        self.money[gb, pb] -= b.cost[tb]
+        self.owner[gb, tb] = pb
+        self.bought[gb, tb] = self.num_bought[gb]
+        self.num_bought[gb] += 1
+
+        rents = ~unowned & (owner != p) & ~self.mortgaged[g, t]
+        g, p, t, owner, roll = g[rents], p[rents], t[rents], owner[rents], \
+            roll[rents]
+        if not len(g):
+            return
+        rent = self._rent(g, t, owner, roll)
+        if by_card is not None:
+            by_card = by_card[rents]
+            rent = np.where(by_card & (b.kind[t] == RAILROAD), 2 * rent, rent)
+            thrown = by_card & (b.kind[t] == UTILITY)
+            if thrown.any():
+                dice = self._roll(g[thrown])
+                rent[thrown] = 10 * (dice // 6 + dice % 6 + 2)
+        self._pay(g, p, rent)
+        self.money[g, owner] += rent
+
+    # rng.shuffle_by_draws on every deck of every game, in the order
+    # MonopolyBoard.shuffle_decks does them
+    def _shuffle_decks(self):
+        g = np.arange(self.num_games)
+        for d, size in enumerate(self.board.deck_size):
+            order = self.deck_order[:, d]
+            for i in xrange(size - 1, 0, -1):
+                u = self.random.draws(g, self.num_draws[g])
+                self.num_draws[g] += 1
+                j = (u * (i + 1)).astype(np.int64)
+                top = order[g, i].copy()
+                order[g, i] = order[g, j]
+                order[g, j] = top
+
+    # cards.Deck.draw from deck d of each of games g
+    def _take_card(self, g, d):
+        b = self.board
+        top = self.deck_top[g, d]
+        card = self.deck_order[g, d, top]
+        self.deck_top[g, d] = (top + 1) % b.deck_size[d]
+        self.deck_count[g, d] -= 1
+
+        back = b.card_kind[d, card] != JAIL_CARD
+        self._put_back(g[back], d[back], card[back])
+        return card
+
+    # cards.Deck.put_back: card on the bottom of deck d of each of games g,
+    # the deck's jail card if it isn't given
+    def _put_back(self, g, d, card=None):
+        if card is None:
+            card = self.board.jail_card[d]
+        bottom = (self.deck_top[g, d] + self.deck_count[g, d]) % \
+            self.board.deck_size[d]
+        self.deck_order[g, d, bottom] = card
+        self.deck_count[g, d] += 1
+
+    def _draw_card(self, g, p, roll):
+        b = self.board
+        deck = b.deck[self.position[g, p]].astype(np.int64)
+        card = self._take_card(g, deck)
+        kind = b.card_kind[deck, card]
+        amount = b.card_amount[deck, card]
+
+        sel = (kind == MONEY) & (amount >= 0)
+        self.money[g[sel], p[sel]] += amount[sel]
+        sel = (kind == MONEY) & (amount < 0)
+        self._pay(g[sel], p[sel], -amount[sel])
+
+        sel = kind == PLAYERS_MONEY
+        if sel.any():
+            self._players_money(g[sel], p[sel], amount[sel])
+
+        sel = kind == JAIL_CARD
+        self.held[g[sel], p[sel], deck[sel]] += 1
+
+        sel = kind == REPAIRS
+        if sel.any():
+            gs, ps = g[sel], p[sel]
+            houses = np.where(self._owned_by(gs, ps), self.houses[gs], 0)
+            cost = np.where(houses < 5, 25 * houses, 100).sum(axis=1)
+            self._pay(gs, ps, cost)
+
+        sel = kind == GO_TO_JAIL
+        self._go_to_jail(g[sel], p[sel])
+
+        sel = (kind == ADVANCE) | (kind == ADVANCE_TO) | (kind == MOVE_BACK)
+        if sel.any():
+            self._move_by_card(g[sel], p[sel], roll[sel], kind[sel],
+                amount[sel])
+
+    # MonopolyAdvanceCard, MonopolyAdvanceToTileTypeCard and
+    # MonopolyMoveBackCard, and landing where they send the player
+    def _move_by_card(self, g, p, roll, kind, amount):
+        b = self.board
+        old = self.position[g, p]
+        nearest = b.nearest[np.where(kind == ADVANCE_TO, amount, 0), old]
+        new = np.where(kind == ADVANCE, amount,
+            np.where(kind == MOVE_BACK, (old - amount) % b.num_tiles, nearest))
+
+        # There might be nowhere to advance to
+        moves = new >= 0
+        g, p, roll, kind, old, new = g[moves], p[moves], roll[moves], \
+            kind[moves], old[moves], new[moves]
+
+        passed_go = (kind != MOVE_BACK) & ((new < old) | (new == 0))
+        self.money[g[passed_go], p[passed_go]] += self.rules.go_salary
+        self.position[g, p] = new
+        self._land(g, p, roll, kind == ADVANCE_TO)
+
+    # MonopolyMonetaryPlayersCard: everybody still in the game, the player
+    # drawing the card included, pays amount (or gets it if it's negative),
+    # and then the player drawing it gets it all.
+    def _players_money(self, g, p, amount):
+        playing = self.alive[g].copy()
+        for other in xrange(self.seats):
+            sel = playing[:, other]
+            pays = sel & (amount >= 0)
+            self._pay(g[pays], np.full(pays.sum(), other), amount[pays])
+            gets = sel & (amount < 0)
+            self.money[g[gets], other] -= amount[gets]
+
+        total = amount * playing.sum(axis=1)
+        gets = total >= 0
+        self.money[g[gets], p[gets]] += total[gets]
+        self._pay(g[~gets], p[~gets], -total[~gets])
+
+    def _land(self, g, p, roll, by_card=None):
+        kind = self.board.kind[self.position[g, p]]
+
+        sel = (kind == PROPERTY) | (kind == RAILROAD) | (kind == UTILITY)
+        if sel.any():
+            self._land_on_property(g[sel], p[sel], roll[sel],
+                None if by_card is None else by_card[sel])
+
+        sel = kind == CARD
+        if sel.any():
+            self._draw_card(g[sel], p[sel], roll[sel])
+
+        sel = kind == GOTO_JAIL
+        self._go_to_jail(g[sel], p[sel])
+
+    def _next_player(self, g, p):
+        order = (p[:, None] + np.arange(1, self.seats + 1)) % self.seats
+        rows = np.arange(len(g))[:, None]
+        first = np.argmax(self.alive[g[:, None], order], axis=1)
+        return order[rows[:, 0], first]
+
+    # Has one turn in every game that is still going.  Returns how many games
+    # that was.
+    def step(self):
+        g = np.flatnonzero(self.playing)
+        if not len(g):
+            return 0
+        p = self.current[g]
+
+        # bots.BotMonopolyPlayer.have_turn
+        self._leave_jail(g, p)
+        self._unmortgage_holdings(g, p)
+        self._build(g, p)
+
+        # MonopolyGame.roll_dice
+        roll = self._roll(g)
+        die1, die2 = roll // 6, roll % 6
+        doubles = die1 == die2
+        roll = die1 + die2 + 2
+
+        jailed = self.turns_in_jail[g, p] > 0
+        fails = jailed & ~doubles
+        self.turns_in_jail[g[fails], p[fails]] += 1
+        fine = fails & (self.turns_in_jail[g, p] > 3)
+        self._pay(g[fine], p[fine], np.full(fine.sum(), self.rules.jail_fine))
+        self.turns_in_jail[g[fine], p[fine]] = 0
+        self.turns_in_jail[g[jailed & doubles], p[jailed & doubles]] = 0
+
+        go_again = ~jailed & doubles
+        self.num_doubles[g, p] = np.where(jailed, self.num_doubles[g, p],
+            np.where(doubles, self.num_doubles[g, p] + 1, 0))
+
+        three = self.num_doubles[g, p] >= 3
+        self.num_doubles[g[three], p[three]] = 0
+        go_again &= ~three
+        self._go_to_jail(g[three], p[three])
+
+        moves = (self.turns_in_jail[g, p] == 0) & self.alive[g, p]
+        gm, pm, rm = g[moves], p[moves], roll[moves]
+        old = self.position[gm, pm]
+        new = (old + rm) % self.board.num_tiles
+        passed_go = (new < old) | (new == 0)
+        self.money[gm[passed_go], pm[passed_go]] += self.rules.go_salary
+        self.position[gm, pm] = new
+        self._land(gm, pm, rm)
+
+        go_again &= self.turns_in_jail[g, p] == 0
+        done = ~go_again | ~self.alive[g, p]
+        self.num_doubles[g[done], p[done]] = 0
+        self.current[g[done]] = self._next_player(g[done], p[done])
+
+        self.turns[g] += 1
+        return len(g)
+
+    def run(self):
+        while self.step():
+            pass
+        return self.results()
+
+    def net_worths(self):
+        b = self.board
+        worth = np.where(self.owner >= 0,
+            b.cost[None, :] + 25 * self.houses.astype(np.int64), 0)
+        net = self.money.copy()
+        for seat in xrange(self.seats):
+            net[:, seat] += np.where(self.owner == seat, worth, 0).sum(axis=1)
+        return np.where(self.alive, net, 0)
+
+    def results(self):
+        return VecResults(self.winner.copy(), self.turns.copy(),
+            self.net_worths())
+
+# Plays num_games games between the given bot strategies all at once
+def simulate_many(b, strategies, num_games, seed=None, max_turns=1000,
+        random=None, rules_=None):
+    if random is None:
+        random = VecRandom(seed)
+    return VecGames(b, strategies, num_games, random, max_turns,
+        rules_).run()
+
+# Plays the same games in the object engine, one at a time, with the dice and
+# draws from a ScriptedRandom
+def simulate_scripted(b, strategies, scripted, max_turns=1000, rules_=None):
+    results = []
+    for i in xrange(len(scripted.dice)):
+        monop_game, seats = simulate.start_game(b, strategies,
+            game_random=scripted.game_random(i), rules_=rules_)
+        turns = simulate.play_turns(monop_game, util.NullInputOutput(),
+            max_turns)
+        results.append(simulate.game_result(monop_game, seats, turns))
+    return results
+
+# Win rates and game lengths from a set of results
+def summarize(winners, turns, seats):
+    winners = np.asarray(winners)
+    turns = np.asarray(turns)
+    finished = winners != NO_ONE
+    return {
+        'win_rates': [float((winners == s).mean()) for s in xrange(seats)],
+        'unfinished': float((~finished).mean()),
+        'mean_turns': float(turns[finished].mean()) if finished.any() else 0.0,
+        'turn_percentiles': [float(x) for x in
+            np.percentile(turns[finished], [10, 50, 90])]
+            if finished.any() else [0.0] * 3,
+    }
+
+def _print_summary(name, summary, strategy_names, elapsed, num_games):
+    print '{}: {} games in {:.2f}s ({:.0f} games/sec)'.format(name, num_games,
+        elapsed, num_games / elapsed)
+    for strategy_name, rate in zip(strategy_names, summary['win_rates']):
+        print '    {:<12} wins {:.1%}'.format(strategy_name, rate)
+    print '    {:<12}      {:.1%}'.format('unfinished', summary['unfinished'])
+    print '    game length: mean {:.1f}, p10/p50/p90 {}'.format(
+        summary['mean_turns'],
+        '/'.join('{:.0f}'.format(x) for x in summary['turn_percentiles']))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Play a lot of bot games at once with numpy')
+    parser.add_argument('strategies', nargs='+',
+        choices=sorted(bots.STRATEGIES.keys()),
+        help='the bot strategy for each seat')
+    parser.add_argument('-n', '--games', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-turns', type=int, default=1000)
+    parser.add_argument('--compare', type=int, default=0, metavar='N',
+        help='also play N games in the object engine to compare with')
+    args = parser.parse_args()
+
+    if len(args.strategies) < 2:
+        parser.error('a game needs at least two players')
+    strategies = [bots.STRATEGIES[s] for s in args.strategies]
+    b = monop.load_board()
+
+    start = time.time()
+    res = simulate_many(b, strategies, args.games, seed=args.seed,
+        max_turns=args.max_turns)
+    _print_summary('numpy', summarize(res.winner, res.turns, len(strategies)),
+        args.strategies, time.time() - start, args.games)
+
+    if args.compare:
+        start = time.time()
+        results = [simulate.simulate(b, strategies, seed=args.seed + i,
+            max_turns=args.max_turns) for i in xrange(args.compare)]
+        winners = [NO_ONE if r.winner is None else r.winner for r in results]
+        _print_summary('objects', summarize(winners,
+            [r.turns for r in results], len(strategies)), args.strategies,
+            time.time() - start, args.compare)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/python
+
+import sys
+import unittest
+
+import numpy as np
+
+import bots
+import monop
+import player
+import rules
+import vecsim
+
+class VecSimTest(unittest.TestCase):
+    def setUp(self):
+        self.board = monop.load_board()
+
+    # The same dice and cards have to play out the same in both engines
+    def check_same_as_objects(self, strategies, num_games, max_turns, seed,
+            rules_=None):
+        scripted = vecsim.ScriptedRandom.make(num_games, max_turns, seed=seed)
+        res = vecsim.VecGames(self.board, strategies, num_games, scripted,
+            max_turns, rules_).run()
+        expected = vecsim.simulate_scripted(self.board, strategies, scripted,
+            max_turns, rules_)
+
+        for i, exp in enumerate(expected):
+            winner = vecsim.NO_ONE if exp.winner is None else exp.winner
+            self.assertEqual((winner, exp.turns, exp.net_worths),
+                (res.winner[i], res.turns[i], tuple(res.net_worths[i])),
+                'game {} went differently'.format(i))
+
+    def test_same_as_objects_two_players(self):
+        self.check_same_as_objects(
+            [bots.BuyEverythingBot, bots.CautiousBot], 40, 400, 1)
+
+    def test_same_as_objects_four_players(self):
+        self.check_same_as_objects([bots.CautiousBot, bots.BuyEverythingBot,
+            bots.BuyEverythingBot, bots.CautiousBot], 20, 400, 2)
+
+    def test_same_as_objects_house_rules(self):
+        self.check_same_as_objects(
+            [bots.BuyEverythingBot, bots.CautiousBot], 20, 400, 3,
+            rules.STANDARD._replace(go_salary=100, starting_cash=1000,
+                house_price=150, jail_fine=80, mortgage_interest=0.25))
+
+    def test_simulate_many(self):
+        res = vecsim.simulate_many(self.board,
+            [bots.BuyEverythingBot, bots.CautiousBot], 500, seed=3,
+            max_turns=300)
+
+        self.assertEqual(res.winner.shape, (500,))
+        self.assertTrue((res.turns <= 300).all())
+        finished = res.winner != vecsim.NO_ONE
+        self.assertTrue(finished.any())
+        # The loser of a finished game is worth nothing
+        losers = 1 - res.winner[finished]
+        self.assertTrue((res.net_worths[finished, losers] == 0).all())
+
+    def test_same_seed(self):
+        strategies = [bots.BuyEverythingBot, bots.CautiousBot]
+        res1 = vecsim.simulate_many(self.board, strategies, 50, seed=4,
+            max_turns=100)
+        res2 = vecsim.simulate_many(self.board, strategies, 50, seed=4,
+            max_turns=100)
+        for a, b in zip(res1, res2):
+            self.assertTrue(np.array_equal(a, b))
+
+    def test_only_bots(self):
+        self.assertRaises(ValueError, vecsim.VecGames, self.board,
+            [bots.BuyEverythingBot, player.HumanMonopolyPlayer], 10)
+
+if __name__ == "__main__":
+    sys.exit(unittest.main())